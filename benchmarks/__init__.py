@@ -0,0 +1,3 @@
+"""
+Benchmarks for the test framework, see README.md and benchmarks/__main__.py
+"""
@@ -0,0 +1,87 @@
+"""
+Run the benchmarks, compare them to the saved baseline and fail if any got slower
+
+Run it from the root of the project with:
+    python -m benchmarks                  # everything, the flows need chrome and chromedriver
+    python -m benchmarks --no-browser     # only the benchmarks that do not need a browser
+    python -m benchmarks --save-baseline  # make this run the new baseline
+"""
+
+import argparse
+import sys
+
+from benchmarks import bench_mortgage_math, bench_selenium_util
+from benchmarks.harness import DEFAULT_BASELINE_PATH, DEFAULT_THRESHOLD, find_regressions, format_seconds, \
+    load_baseline, machine_description, print_results, save_baseline
+
+# benchmark groups that run without a browser
+_OFFLINE_GROUPS = {"math": bench_mortgage_math.run, "selenium_util": bench_selenium_util.run}
+
+
+def _run_flows(samples):
+    """
+    Run the flow benchmarks in a headless chrome against the stand in pages
+    :param samples: how many times each flow is timed
+    :return: list of BenchmarkResults
+    """
+    # imported here so the offline benchmarks do not need chromedriver
+    from benchmarks import bench_calculator_flows
+    from benchmarks.stand_in_server import StandInServer, use_stand_in_wait_history
+    from test_cases.testcase import new_chrome_driver
+
+    use_stand_in_wait_history()
+    with StandInServer() as server:
+        driver = new_chrome_driver(headless=True)
+        try:
+            return bench_calculator_flows.run(driver, server.url, samples)
+        finally:
+            driver.quit()
+
+
+def main():
+    """
+    Run the benchmarks
+    :return: exit code, 1 if a benchmark regressed or there is no baseline to compare with
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the test framework")
+    parser.add_argument("--only", choices=sorted(_OFFLINE_GROUPS) + ["flows"], action="append",
+                        help="only run this group of benchmarks, can be given more than once")
+    parser.add_argument("--no-browser", action="store_true", help="skip the benchmarks that need a browser")
+    parser.add_argument("--flow-samples", type=int, default=10, help="times each browser flow is timed")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="baseline file to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="save this run as the baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="how much slower than the baseline a median can be, as a fraction (default 0.2)")
+    args = parser.parse_args()
+
+    groups = args.only or sorted(_OFFLINE_GROUPS) + ["flows"]
+    if args.no_browser and "flows" in groups:
+        groups.remove("flows")
+
+    results = []
+    for group in groups:
+        results.extend(_run_flows(args.flow_samples) if group == "flows" else _OFFLINE_GROUPS[group]())
+
+    baseline = load_baseline(args.baseline)
+    print_results(results, baseline)
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print("saved baseline to " + args.baseline)
+        return 0
+    if baseline is None:
+        # a gate with nothing to compare to would pass every run, so a missing baseline fails the run
+        print("ERROR, no baseline at " + args.baseline + ", run with --save-baseline on this machine to make one",
+              file=sys.stderr)
+        return 1
+
+    if baseline.get("machine") != machine_description():
+        print("WARNING, the baseline was saved on another machine or python, regressions may not be real")
+    regressions = find_regressions(results, baseline, args.threshold)
+    for name, expected, actual in regressions:
+        print("REGRESSION " + name + ": median " + format_seconds(actual) + ", baseline " + format_seconds(expected))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
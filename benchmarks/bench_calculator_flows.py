@@ -0,0 +1,103 @@
+"""
+Benchmarks for whole MortgageCalcPage flows in a real (headless) browser, against the local stand in for the calculator
+(see stand_in_server.py) so the timings are of our framework and the browser and not of Zillow's servers
+
+The flows are the ones test_mortgage_calc.py runs, each one loads the calculator and ends with the flow's assertion
+"""
+
+from benchmarks.harness import measure
+from pages.mortage_calculator_page import MortgageCalcPage
+from utilities.loan_programs import LoanPrograms
+from utilities.mortgage_math import calculate_down_payment, calculate_payment
+
+
+def open_calculator(driver, root_url):
+    """
+    Load the calculator, the same way ZillowBasePage.click_mortgage_calculator_link does but from any root url
+    :param driver: webdriver to use
+    :param root_url: root url of the site, ending with a /
+    :return: a new MortgageCalcPage
+    """
+    driver.get(root_url + "mortgage-calculator/")
+    return MortgageCalcPage(driver)
+
+
+def flow_load(driver, root_url):
+    """
+    Load the calculator and wait for it to be ready
+    """
+    open_calculator(driver, root_url)
+
+
+def flow_five_percent_payment(driver, root_url):
+    """
+    Set a 5% rate without taxes and insurance and check the payment, see test_five_percent_interest_rate
+    """
+    open_calculator(driver, root_url) \
+        .set_interest_rate(5) \
+        .check_taxes_insurance(False) \
+        .assert_payment(calculate_payment(300000, calculate_down_payment(300000, 20), 5, LoanPrograms.FIXED_30))
+
+
+def flow_million_dollar_home(driver, root_url):
+    """
+    Change the price, down payment and rate and check the payment, see test_million_dollar_home
+    """
+    down_payment = calculate_down_payment(1000000, 40)
+    open_calculator(driver, root_url) \
+        .set_home_price(1000000) \
+        .set_down_payment_percent(40) \
+        .assert_down_payment_amount(down_payment) \
+        .set_interest_rate(2.44) \
+        .check_taxes_insurance(False) \
+        .assert_payment(calculate_payment(1000000, down_payment, 2.44, LoanPrograms.FIXED_30))
+
+
+def flow_rate_error(driver, root_url):
+    """
+    Enter a rate over 100 and check the error message, see test_greater_than_equal_to_100
+    """
+    open_calculator(driver, root_url) \
+        .set_interest_rate(101) \
+        .assert_interest_rate_error_message("Rate must be less than or equal to 100")
+
+
+def flow_interest_rate_help(driver, root_url):
+    """
+    Open and close the interest rate help modal, see test_interest_rate_help
+    """
+    open_calculator(driver, root_url) \
+        .assert_interest_help_modal_opens_and_closes(False) \
+        .assert_interest_help_modal_opens_and_closes(True)
+
+
+def flow_see_current_rates(driver, root_url):
+    """
+    Follow the current rates link, see test_see_current_rates_link
+    """
+    open_calculator(driver, root_url) \
+        .click_see_current_rates() \
+        .assert_intro_span()
+
+
+# every flow by name, the load generator picks from these too
+FLOWS = {
+    "load": flow_load,
+    "five_percent_payment": flow_five_percent_payment,
+    "million_dollar_home": flow_million_dollar_home,
+    "rate_error": flow_rate_error,
+    "interest_rate_help": flow_interest_rate_help,
+    "see_current_rates": flow_see_current_rates,
+}
+
+
+def run(driver, root_url, samples=10):
+    """
+    Run every flow benchmark
+    :param driver: a webdriver, headless is best
+    :param root_url: root url of the stand in, ending with a /
+    :param samples: how many times each flow is timed
+    :return: list of BenchmarkResults
+    """
+    return [measure("flow." + name, lambda flow=flow: flow(driver, root_url), samples=samples)
+            for name, flow in FLOWS.items()]
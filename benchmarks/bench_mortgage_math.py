@@ -0,0 +1,46 @@
+"""
+Benchmarks for utilities/mortgage_math.py and utilities/payment_format.py, the scalar functions the page objects call
+once per assertion and the batch functions used to generate and check scenarios
+"""
+
+import numpy as np
+
+from benchmarks.harness import measure
+from utilities.loan_programs import LoanPrograms
+from utilities.mortgage_math import calculate_arm_payments, calculate_payment, implied_interest_rates, \
+    max_home_prices, random_index_paths
+from utilities.payment_format import format_currency_like_page, rounding_ambiguous
+
+# size of the batches given to the batch functions
+BATCH_SIZE = 100000
+
+# how many index paths the ARM benchmark simulates
+ARM_PATHS = 1000
+
+
+def run():
+    """
+    Run every mortgage math benchmark
+    :return: list of BenchmarkResults
+    """
+    rng = np.random.default_rng(0)
+    payments = rng.uniform(500, 5000, BATCH_SIZE)
+    rates = rng.uniform(1, 12, BATCH_SIZE)
+    principals = max_home_prices(payments, rates, LoanPrograms.FIXED_30)
+    index_paths = random_index_paths(ARM_PATHS, 25, 4.5, seed=0)
+
+    return [
+        measure("mortgage_math.calculate_payment",
+                lambda: calculate_payment(300000, 60000, 6.5, LoanPrograms.FIXED_30), number=1000),
+        measure("payment_format.format_currency_like_page",
+                lambda: format_currency_like_page(1234.5), number=1000),
+        measure("mortgage_math.max_home_prices[batch]",
+                lambda: max_home_prices(payments, rates, LoanPrograms.FIXED_30, down_payment_percent=20),
+                items=BATCH_SIZE),
+        measure("mortgage_math.implied_interest_rates[batch]",
+                lambda: implied_interest_rates(payments, principals, LoanPrograms.FIXED_30), samples=10,
+                items=BATCH_SIZE),
+        measure("mortgage_math.calculate_arm_payments[batch]",
+                lambda: calculate_arm_payments(240000, 5.5, index_paths, 2.75), samples=10, items=ARM_PATHS),
+        measure("payment_format.rounding_ambiguous[batch]", lambda: rounding_ambiguous(payments), items=BATCH_SIZE),
+    ]
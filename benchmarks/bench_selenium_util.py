@@ -0,0 +1,55 @@
+"""
+Benchmarks for the overhead our own wrappers add on top of selenium, Locator and WebElement construction,
+Page.get_elements and the step tracking around page methods. A fake driver answers instantly, so only our code is timed
+"""
+
+from selenium.webdriver.common.by import By
+
+from benchmarks.harness import measure
+from pages.page import Page
+from pages.zillow_home_page import ZillowHomePage
+from selenium_util.locator import Locator
+from selenium_util.step_tracker import step_tracker
+from selenium_util.web_element import WebElement
+from test_cases.fake_driver import FakeDriver
+
+# how many elements the fake driver finds for Page.get_elements
+ELEMENT_COUNT = 20
+
+
+def run():
+    """
+    Run every selenium_util benchmark
+    :return: list of BenchmarkResults
+    """
+    driver = FakeDriver(matches=ELEMENT_COUNT)
+    page = Page(driver)
+    locator = Locator(By.ID, "rate")
+
+    def forget_calls():
+        # the fake driver records every call, left to grow the later samples would time appending to a long list
+        driver.calls.clear()
+        driver.lookups.clear()
+
+    results = [
+        measure("Locator()", lambda: Locator(By.ID, "rate"), number=1000),
+        measure("Locator(fallbacks)",
+                lambda: Locator(By.XPATH, "//a[text()=\"See current rates\"]",
+                                fallbacks=[Locator(By.XPATH, "//a[contains(., \"See current rates\")]")]),
+                number=1000),
+        measure("WebElement()", lambda: WebElement(driver, locator), number=1000, setup=forget_calls),
+        measure("Page.get_elements[" + str(ELEMENT_COUNT) + "]", lambda: page.get_elements(locator), number=100,
+                items=ELEMENT_COUNT, setup=forget_calls),
+        measure("ZillowHomePage()", lambda: ZillowHomePage(driver), number=1000, setup=forget_calls),
+    ]
+
+    # steps are only tracked while something listens to them, like the test hooks do
+    def ignore_step(record):
+        pass
+    step_tracker.add_listener(ignore_step)
+    try:
+        results.append(measure("ZillowHomePage() with step tracking", lambda: ZillowHomePage(driver), number=1000,
+                               setup=forget_calls))
+    finally:
+        step_tracker.remove_listener(ignore_step)
+    return results
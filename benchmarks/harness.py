@@ -0,0 +1,199 @@
+"""
+Measures benchmarks, keeps their baselines on disk and finds regressions against them
+
+Each benchmark is timed in samples, a sample runs the benchmark `number` times so very fast operations are not lost in
+the timer's resolution. Times are reported per operation, where a batch benchmark's operation is one item of the batch
+(ex: one home price out of 100,000 solved together)
+
+A sample's time per operation is the mean of the operations in it, so the percentiles are percentiles of sample means.
+With one operation per sample they are the percentiles of single operations, with more the tail is averaged away (a
+slow operation among 1000 fast ones barely moves its sample), which is why the table prints how many operations each
+sample has
+"""
+
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+# Default location of the baselines, next to the benchmarks. Baselines only mean something on the machine they were
+# saved on, save them again when the machine changes
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# how much slower than its baseline (as a fraction) a benchmark's median can be before it is a regression
+DEFAULT_THRESHOLD = 0.2
+
+
+class BenchmarkResult(object):
+    """
+    The timings of one benchmark
+
+    ...
+
+    Attributes
+    ----------
+    name : str
+        name of the benchmark, ex: mortgage_math.calculate_payment
+    samples : list
+        seconds per operation of each sample
+    items : int
+        operations per call of the benchmarked function, more than 1 for batch benchmarks
+    ops_per_sample : int
+        operations each sample is the mean of, its calls times items
+
+    Methods
+    -------
+    percentile(self, percent)
+        Seconds per operation at a percentile of the sample means
+    ops_per_second(self)
+        Operations per second at the median
+    to_dict(self)
+        Return the result as the JSON serializable dict kept in the baseline
+    """
+
+    def __init__(self, name, samples, items=1, ops_per_sample=None):
+        """
+        Create a BenchmarkResult
+        :param name: name of the benchmark
+        :param samples: seconds per operation of each sample
+        :param items: operations per call of the benchmarked function
+        :param ops_per_sample: operations each sample is the mean of, defaults to items
+        """
+        self.name = name
+        self.samples = samples
+        self.items = items
+        self.ops_per_sample = ops_per_sample or items
+
+    def percentile(self, percent):
+        """
+        :param percent: percentile to find, ex: 99
+        :return: seconds per operation at that percentile of the sample means, see the module docstring
+        """
+        return float(np.percentile(self.samples, percent))
+
+    def ops_per_second(self):
+        """
+        :return: operations per second at the median
+        """
+        median = self.percentile(50)
+        return 1 / median if median > 0 else float("inf")
+
+    def to_dict(self):
+        """
+        :return: the result as the JSON serializable dict kept in the baseline
+        """
+        return {"p50": self.percentile(50), "p90": self.percentile(90), "p99": self.percentile(99),
+                "ops_per_second": self.ops_per_second(), "items": self.items, "ops_per_sample": self.ops_per_sample,
+                "samples": len(self.samples)}
+
+
+def measure(name, function, samples=30, number=1, items=1, warmup=1, setup=None):
+    """
+    Time a function
+    :param name: name of the benchmark
+    :param function: function to time, takes no arguments
+    :param samples: how many samples to take
+    :param number: how many calls make a sample
+    :param items: operations per call, ex: the size of the batch a batch function works on
+    :param warmup: samples taken and thrown away first, to fill caches and load lazy imports
+    :param setup: function called before each sample and not timed, ex: to reload a page
+    :return: a BenchmarkResult
+    """
+    timings = []
+    for sample in range(warmup + samples):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if sample >= warmup:
+            timings.append(elapsed / (number * items))
+    return BenchmarkResult(name, timings, items, number * items)
+
+
+def machine_description():
+    """
+    :return: dict describing this machine and python, saved with the baseline so a baseline from another machine can be
+    spotted
+    """
+    return {"platform": platform.platform(), "machine": platform.machine(), "processor": platform.processor(),
+            "python": sys.version.split()[0], "numpy": np.__version__}
+
+
+def load_baseline(path=DEFAULT_BASELINE_PATH):
+    """
+    :param path: path of the baseline file
+    :return: the baseline, a dict with "machine" and "benchmarks" (name to BenchmarkResult.to_dict()), None if there is
+    no baseline yet
+    """
+    try:
+        with open(path) as baseline_file:
+            return json.load(baseline_file)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(results, path=DEFAULT_BASELINE_PATH):
+    """
+    Save results as the baseline, benchmarks already in the baseline that did not run this time keep their old values
+    :param results: list of BenchmarkResults
+    :param path: path of the baseline file
+    """
+    baseline = load_baseline(path) or {"benchmarks": {}}
+    baseline["machine"] = machine_description()
+    for result in results:
+        baseline["benchmarks"][result.name] = result.to_dict()
+
+    temp_path = path + "." + str(os.getpid()) + ".tmp"
+    with open(temp_path, "w") as baseline_file:
+        json.dump(baseline, baseline_file, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def find_regressions(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare results to a baseline. Only the median is compared, the tail percentiles of a shared machine are too noisy
+    to fail a run on and are reported for information
+    :param results: list of BenchmarkResults
+    :param baseline: baseline from load_baseline
+    :param threshold: how much slower than its baseline (as a fraction) a median can be
+    :return: list of (name, baseline median, new median) for every benchmark slower than the threshold allows
+    """
+    regressions = []
+    for result in results:
+        expected = baseline["benchmarks"].get(result.name)
+        if expected is not None and result.percentile(50) > expected["p50"] * (1 + threshold):
+            regressions.append((result.name, expected["p50"], result.percentile(50)))
+    return regressions
+
+
+def format_seconds(seconds):
+    """
+    :param seconds: a duration
+    :return: the duration in the most readable unit, ex: 12.3us
+    """
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return "{:.3g}{}".format(seconds / scale, unit)
+    return "{:.3g}ns".format(seconds / 1e-9)
+
+
+def print_results(results, baseline=None):
+    """
+    Print a table of results, with the change from the baseline when there is one
+    :param results: list of BenchmarkResults
+    :param baseline: baseline from load_baseline, or None
+    """
+    # the percentiles are of sample means, ops/sample says how many operations each mean is over
+    print("{:<50} {:>10} {:>10} {:>10} {:>10} {:>14} {:>9}".format("benchmark", "p50", "p90", "p99", "ops/sample",
+                                                                  "ops/s", "vs base"))
+    for result in results:
+        expected = baseline["benchmarks"].get(result.name) if baseline is not None else None
+        change = "" if expected is None else "{:+.1%}".format(result.percentile(50) / expected["p50"] - 1)
+        print("{:<50} {:>10} {:>10} {:>10} {:>10,} {:>14,.0f} {:>9}".format(
+            result.name, format_seconds(result.percentile(50)), format_seconds(result.percentile(90)),
+            format_seconds(result.percentile(99)), result.ops_per_sample, result.ops_per_second(), change))
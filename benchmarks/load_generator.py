@@ -0,0 +1,363 @@
+"""
+Load generator, drives many concurrent headless calculator sessions through the MortgageCalcPage flows (see
+bench_calculator_flows.py) as synthetic traffic, and reports the throughput and latency percentiles of every page action
+while it runs
+
+Sessions are started one by one over the ramp up, each in its own thread with its own browser. With a target rate the
+sessions share a schedule of flow start times (an open loop, flows start on time even if earlier ones were slow, as
+long as a session is free), without one every session runs flows back to back
+
+Run it from the root of the project with:
+    python -m benchmarks.load_generator --sessions 8 --ramp-up 30 --rate 2 --duration 300
+By default the flows run against the local stand in, pass --url to point them at a staging copy of the calculator
+"""
+
+import argparse
+import collections
+import json
+import random
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.bench_calculator_flows import FLOWS
+from benchmarks.harness import format_seconds
+from selenium_util.step_tracker import step_tracker
+
+# most recent durations kept per action for the percentiles, so a long run does not grow without bound
+WINDOW_SIZE = 5000
+
+
+class ActionStats(object):
+    """
+    Running totals and recent durations of one action, a page step (ex: MortgageCalcPage.set_interest_rate) or a whole
+    flow (ex: flow.rate_error)
+
+    ...
+
+    Attributes
+    ----------
+    count : int
+        how many times the action finished
+    failures : int
+        how many of those raised
+    durations : collections.deque
+        seconds each of the most recent WINDOW_SIZE calls took
+    """
+
+    __slots__ = ("count", "failures", "durations")
+
+    def __init__(self):
+        """
+        Create ActionStats with nothing recorded
+        """
+        self.count = 0
+        self.failures = 0
+        self.durations = collections.deque(maxlen=WINDOW_SIZE)
+
+
+class LoadStats(object):
+    """
+    Collects how long every action took across all sessions, safe to use from any thread
+
+    ...
+
+    Methods
+    -------
+    record(self, action, seconds, failed=False)
+        Record one finished action
+    on_step(self, record)
+        Step tracker listener, records every page step
+    snapshot(self)
+        Throughput and latency percentiles of every action so far
+    """
+
+    def __init__(self):
+        """
+        Create LoadStats with nothing recorded
+        """
+        self._actions = collections.defaultdict(ActionStats)
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._last_snapshot = (self._started, {})
+
+    def record(self, action, seconds, failed=False):
+        """
+        Record one finished action
+        :param action: name of the action
+        :param seconds: how long it took
+        :param failed: True if it raised
+        """
+        with self._lock:
+            stats = self._actions[action]
+            stats.count += 1
+            stats.failures += failed
+            stats.durations.append(seconds)
+
+    def on_step(self, record):
+        """
+        Step tracker listener, records every page step
+        :param record: the StepRecord of a finished step
+        """
+        self.record(record.page + "." + record.method, record.duration, record.outcome != "passed")
+
+    def snapshot(self):
+        """
+        Throughput and latency percentiles of every action, throughput both since the last snapshot and over the whole
+        run
+        :return: dict of action name to a dict of count, failures, rate (per second since the last snapshot),
+        mean_rate (per second over the run), p50, p90 and p99 (seconds, over the most recent calls)
+        """
+        now = time.monotonic()
+        with self._lock:
+            current = {action: (stats.count, stats.failures, np.array(stats.durations))
+                       for action, stats in self._actions.items()}
+        last_time, last_counts = self._last_snapshot
+        self._last_snapshot = (now, {action: count for action, (count, _, _) in current.items()})
+
+        report = {}
+        for action, (count, failures, durations) in sorted(current.items()):
+            p50, p90, p99 = np.percentile(durations, [50, 90, 99]) if len(durations) else (0, 0, 0)
+            report[action] = {"count": count, "failures": failures,
+                              "rate": (count - last_counts.get(action, 0)) / max(now - last_time, 1e-9),
+                              "mean_rate": count / max(now - self._started, 1e-9),
+                              "p50": float(p50), "p90": float(p90), "p99": float(p99)}
+        return report
+
+
+class Pacer(object):
+    """
+    Hands out flow start times at a target rate, shared by every session. A session that asks after its slot has
+    passed starts right away, slots are not saved up, so a stalled run does not burst to catch up
+
+    ...
+
+    Methods
+    -------
+    wait(self, stop)
+        Sleep until the next start time
+    """
+
+    def __init__(self, rate):
+        """
+        Create a Pacer
+        :param rate: flows to start per second across all sessions, 0 for no limit
+        """
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self, stop):
+        """
+        Sleep until this session's next start time
+        :param stop: threading.Event, the wait ends early when it is set
+        :return: False if the run was stopped while waiting
+        """
+        if not self.interval:
+            return not stop.is_set()
+        with self._lock:
+            now = time.monotonic()
+            self._next = max(self._next, now)
+            start_at = self._next
+            self._next += self.interval
+        return not stop.wait(max(start_at - now, 0))
+
+
+class LoadGenerator(object):
+    """
+    Runs the load, see the module docstring
+
+    ...
+
+    Attributes
+    ----------
+    root_url : str
+        root url of the calculator to load, ending with a /
+    flows : list
+        names of the flows (from FLOWS) sessions pick from at random
+    sessions : int
+        how many concurrent browser sessions to run
+    ramp_up : float
+        seconds over which the sessions are started
+    rate : float
+        target flows per second across all sessions, 0 runs flows back to back
+    duration : float
+        seconds the whole run lasts, including the ramp up
+    stats : LoadStats
+        what every session recorded
+
+    Methods
+    -------
+    run(self, report_every=5, report=None)
+        Run the load, reporting as it goes
+    """
+
+    def __init__(self, root_url, flows, sessions=4, ramp_up=10, rate=0, duration=60, driver_factory=None):
+        """
+        Create a LoadGenerator
+        :param root_url: root url of the calculator to load, ending with a /
+        :param flows: names of the flows sessions pick from at random
+        :param sessions: how many concurrent browser sessions to run
+        :param ramp_up: seconds over which the sessions are started
+        :param rate: target flows per second across all sessions, 0 runs flows back to back
+        :param duration: seconds the whole run lasts, including the ramp up
+        :param driver_factory: function returning a new webdriver, defaults to a headless chrome
+        """
+        self.root_url = root_url
+        self.flows = list(flows)
+        self.sessions = sessions
+        self.ramp_up = ramp_up
+        self.rate = rate
+        self.duration = duration
+        self.stats = LoadStats()
+        if driver_factory is None:
+            from test_cases.testcase import new_chrome_driver
+            driver_factory = lambda: new_chrome_driver(headless=True)
+        self._driver_factory = driver_factory
+        self._stop = threading.Event()
+        self._pacer = Pacer(rate)
+        self._active = 0
+        self._active_lock = threading.Lock()
+
+    def _session(self, number):
+        """
+        One session, runs flows until the run stops. A failed flow leaves the browser in an unknown state, so the
+        session gets a fresh browser after one. Starting browsers is recorded as the browser.start action
+        :param number: number of the session, used to seed its choice of flows
+        """
+        chooser = random.Random(number)
+        driver = None
+        try:
+            while not self._stop.is_set():
+                if driver is None:
+                    start = time.perf_counter()
+                    try:
+                        driver = self._driver_factory()
+                    except Exception:
+                        # the machine may be out of browsers, back off instead of spinning
+                        self.stats.record("browser.start", time.perf_counter() - start, failed=True)
+                        self._stop.wait(1)
+                        continue
+                    self.stats.record("browser.start", time.perf_counter() - start)
+                    with self._active_lock:
+                        self._active += 1
+                if not self._pacer.wait(self._stop):
+                    break
+
+                name = chooser.choice(self.flows)
+                start = time.perf_counter()
+                try:
+                    FLOWS[name](driver, self.root_url)
+                    self.stats.record("flow." + name, time.perf_counter() - start)
+                except Exception:
+                    self.stats.record("flow." + name, time.perf_counter() - start, failed=True)
+                    driver.quit()
+                    driver = None
+                    with self._active_lock:
+                        self._active -= 1
+        finally:
+            if driver is not None:
+                driver.quit()
+                with self._active_lock:
+                    self._active -= 1
+
+    def run(self, report_every=5, report=None):
+        """
+        Run the load, reporting as it goes
+        :param report_every: seconds between reports
+        :param report: function given (seconds elapsed, active sessions, LoadStats.snapshot()), defaults to
+        print_report
+        :return: the final LoadStats.snapshot()
+        """
+        report = report or print_report
+        step_tracker.add_listener(self.stats.on_step)
+        started = time.monotonic()
+        threads = []
+        try:
+            for number in range(self.sessions):
+                # start the sessions evenly over the ramp up
+                start_at = started + self.ramp_up * number / self.sessions
+                while time.monotonic() < start_at and not self._stop.is_set():
+                    self._stop.wait(min(start_at - time.monotonic(), report_every))
+                thread = threading.Thread(target=self._session, args=(number,), name="load-session-" + str(number),
+                                          daemon=True)
+                thread.start()
+                threads.append(thread)
+
+            next_report = started + report_every
+            while time.monotonic() - started < self.duration:
+                time.sleep(max(min(next_report, started + self.duration) - time.monotonic(), 0))
+                if time.monotonic() >= next_report:
+                    report(time.monotonic() - started, self._active, self.stats.snapshot())
+                    next_report += report_every
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            step_tracker.remove_listener(self.stats.on_step)
+        return self.stats.snapshot()
+
+
+def print_report(elapsed, active_sessions, snapshot):
+    """
+    Print the throughput and latency of every action
+    :param elapsed: seconds since the run started
+    :param active_sessions: how many sessions have a browser open
+    :param snapshot: a LoadStats.snapshot()
+    """
+    print("--- {:.0f}s, {} active sessions".format(elapsed, active_sessions))
+    print("{:<55} {:>7} {:>6} {:>8} {:>8} {:>9} {:>9} {:>9}".format(
+        "action", "count", "fail", "rate/s", "mean/s", "p50", "p90", "p99"))
+    for action, stats in snapshot.items():
+        print("{:<55} {:>7} {:>6} {:>8.2f} {:>8.2f} {:>9} {:>9} {:>9}".format(
+            action, stats["count"], stats["failures"], stats["rate"], stats["mean_rate"],
+            format_seconds(stats["p50"]), format_seconds(stats["p90"]), format_seconds(stats["p99"])))
+
+
+def main():
+    """
+    Run the load generator from the command line
+    """
+    parser = argparse.ArgumentParser(description="Drive concurrent calculator sessions as synthetic traffic")
+    parser.add_argument("--url", help="root url of the calculator to load (ending with a /), defaults to starting the "
+                                      "local stand in")
+    parser.add_argument("--sessions", type=int, default=4, help="concurrent browser sessions")
+    parser.add_argument("--ramp-up", type=float, default=10, help="seconds over which the sessions are started")
+    parser.add_argument("--rate", type=float, default=0,
+                        help="target flows per second across all sessions, 0 (default) runs flows back to back")
+    parser.add_argument("--duration", type=float, default=60, help="seconds the run lasts, including the ramp up")
+    parser.add_argument("--flows", default=",".join(name for name in FLOWS if name != "load"),
+                        help="comma separated flows to pick from, any of: " + ", ".join(FLOWS))
+    parser.add_argument("--report-every", type=float, default=5, help="seconds between reports")
+    parser.add_argument("--output", help="write the final report to this JSON file")
+    args = parser.parse_args()
+
+    flows = args.flows.split(",")
+    unknown = [name for name in flows if name not in FLOWS]
+    if unknown:
+        parser.error("unknown flows: " + ", ".join(unknown))
+
+    from benchmarks.stand_in_server import StandInServer, use_stand_in_wait_history
+    # timings under load are not what the tests should learn their timeouts from
+    use_stand_in_wait_history()
+
+    server = None if args.url else StandInServer().start()
+    try:
+        generator = LoadGenerator(args.url or server.url, flows, args.sessions, args.ramp_up, args.rate, args.duration)
+        final = generator.run(args.report_every)
+    finally:
+        if server is not None:
+            server.stop()
+
+    print("=== final")
+    print_report(args.duration, 0, final)
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({"settings": vars(args), "actions": final}, output, indent=1, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main()
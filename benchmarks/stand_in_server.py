@@ -0,0 +1,107 @@
+"""
+Serves the local stand in for Zillow's calculator and rates pages (benchmarks/stand_in), so flows can be timed without
+Zillow's network, human checks or rate changes getting in the way
+
+The current rates the calculator asks for are answered from test_cases/fixtures/current_rates.json, the same fixture the
+stubbed rates backend uses
+"""
+
+import functools
+import http.server
+import os
+import threading
+
+from selenium_util.request_stubs import FIXTURES_DIR
+from selenium_util.wait_policy import wait_policy
+
+STAND_IN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stand_in")
+
+# wait history of runs against the stand in, kept apart from the tests' history (see use_stand_in_wait_history)
+STAND_IN_WAIT_HISTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test_output",
+                                     "stand_in_wait_history.json")
+
+
+def use_stand_in_wait_history():
+    """
+    Keep the waits of this process out of the tests' wait history. The stand in answers much faster than Zillow, so
+    learning from it would give the real tests timeouts that are too short. Call before the first wait
+    """
+    os.makedirs(os.path.dirname(STAND_IN_WAIT_HISTORY), exist_ok=True)
+    wait_policy.path = STAND_IN_WAIT_HISTORY
+
+
+class _StandInHandler(http.server.SimpleHTTPRequestHandler):
+    """
+    Serves the stand in directory, plus the rates fixture at /rates.json
+    """
+
+    def do_GET(self):
+        if self.path.split("?")[0] == "/rates.json":
+            with open(os.path.join(FIXTURES_DIR, "current_rates.json"), "rb") as fixture:
+                body = fixture.read()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            super().do_GET()
+
+    def log_message(self, format, *args):
+        # one line per request drowns out the benchmark results
+        pass
+
+
+class StandInServer(object):
+    """
+    The stand in pages served on localhost from a background thread, use as a context manager
+
+    ...
+
+    Attributes
+    ----------
+    url : str
+        root url of the stand in, ends with a /. Pages are at the same paths as on Zillow, ex:
+        url + "mortgage-calculator/"
+
+    Methods
+    -------
+    start(self)
+        Start serving
+    stop(self)
+        Stop serving
+    """
+
+    def __init__(self, port=0):
+        """
+        Create a StandInServer
+        :param port: port to listen on, 0 picks a free port
+        """
+        handler = functools.partial(_StandInHandler, directory=STAND_IN_DIR)
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self._server.daemon_threads = True
+        self._thread = None
+        self.url = "http://127.0.0.1:" + str(self._server.server_address[1]) + "/"
+
+    def start(self):
+        """
+        Start serving in a background thread
+        :return: self
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stand-in-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop serving and close the socket
+        """
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
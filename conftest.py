@@ -0,0 +1,256 @@
+"""
+Pytest hooks and command line options shared by every test in the project
+"""
+
+import os
+import sys
+import time
+import uuid
+
+import pytest
+
+from selenium_util.artifact_capture import artifact_capture
+from selenium_util.event_log import event_log
+from selenium_util.step_tracker import step_tracker
+from utilities.impact_analysis import ImpactMap, analyze_changes
+from utilities.results_store import ResultsStore
+
+# ResultsStore of the session, None if results are not being recorded
+_results_store_key = pytest.StashKey[ResultsStore]()
+# ImpactMap of the session, records which page steps and locators each test used
+_impact_map_key = pytest.StashKey[ImpactMap]()
+
+
+def pytest_addoption(parser):
+    """
+    Command line options for our test suite
+    """
+    parser.addoption("--skip-missing-locators", action="store_true", default=False,
+                     help="skip tests that need a locator the page was missing when it loaded, instead of failing them")
+    parser.addoption("--event-log-always", action="store_true", default=False,
+                     help="flush every test's event log to test_output/events, not only the logs of failed tests")
+    parser.addoption("--results-db", default=None, metavar="PATH",
+                     help="record test and step results to this SQLite database, ex: test_output/results.sqlite")
+    parser.addoption("--stub-rates", action="store_true", default=False,
+                     help="answer the current rates requests of every test from test_cases/fixtures/current_rates.json")
+    parser.addoption("--stub-latency-ms", type=int, default=0,
+                     help="how long stubbed responses take to arrive, in milliseconds")
+    parser.addoption("--warm-profile", action="store_true", default=False,
+                     help="start every browser from a clone of a profile snapshot that already has the pages cached")
+    parser.addoption("--warm-profile-max-age", type=float, default=24,
+                     help="hours after which the warm profile snapshot is rebuilt")
+    parser.addoption("--update-visual-baselines", action="store_true", default=False,
+                     help="save every screenshot a visual check takes as its new baseline instead of comparing it")
+    parser.addoption("--sample-profile", action="store_true", default=False,
+                     help="profile every test with the sampling profiler, not only the ones marked sample_profile")
+    parser.addoption("--sample-profile-interval-ms", type=float, default=5,
+                     help="milliseconds between the sampling profiler's samples")
+    parser.addoption("--impact-select", action="store_true", default=False,
+                     help="only run the tests that used a page method or locator changed since --impact-base")
+    parser.addoption("--impact-base", default="HEAD",
+                     help="git revision --impact-select compares against, uncommitted changes are always included")
+    parser.addoption("--impact-changed", default="",
+                     help="comma separated page methods, locators (ex: MortgageCalcPage._PAYMENT_TEXT) or files to "
+                          "treat as changed, on top of what git reports")
+
+
+def pytest_configure(config):
+    """
+    Register our markers and, with --results-db, open the results store for the session, every xdist worker opens its
+    own connection to the same database
+    """
+    config.addinivalue_line("markers", "stub_rates: answer the current rates requests of this test from "
+                                       "test_cases/fixtures/current_rates.json, see request_stubs.py")
+    config.addinivalue_line("markers", "sample_profile: profile this test (setup and teardown included) with the "
+                                       "sampling profiler, see sampling_profiler.py")
+    config.stash[_impact_map_key] = ImpactMap()
+
+    if config.getoption("--update-visual-baselines"):
+        # imported here, numpy is only worth loading when visual checks are being run
+        from utilities.visual_diff import visual_baselines
+        visual_baselines.update = True
+
+    if config.getoption("--results-db") is None:
+        return
+
+    # xdist gives every worker the same run id, a run without xdist makes its own
+    worker_input = getattr(config, "workerinput", {})
+    config.stash[_results_store_key] = ResultsStore(config.getoption("--results-db"))
+    config.results_run_id = worker_input.get("testrunuid", uuid.uuid4().hex)
+    config.results_worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+
+
+@pytest.fixture
+def fake_driver():
+    """
+    Fixture for the FakeDriver class (see test_cases/fake_driver.py), unit tests make one with the page they need, ex:
+    fake_driver(present=[(By.ID, "rate")])
+    """
+    # imported here, it imports selenium and most collections do not need it
+    from test_cases.fake_driver import FakeDriver
+    return FakeDriver
+
+
+@pytest.fixture(autouse=True)
+def _unit_test_wait_history(request, monkeypatch):
+    """
+    Give tests that do not drive a real browser (every test without create_driver) an empty wait history in a temp
+    directory, so the waits they fake are not learned from by the browser tests (see wait_policy.py)
+    """
+    # only if a test module imported it, so tests that need no browser do not import selenium
+    wait_policy_module = sys.modules.get("selenium_util.wait_policy")
+    if "create_driver" not in request.fixturenames and wait_policy_module is not None:
+        wait_policy = wait_policy_module.wait_policy
+        monkeypatch.setattr(wait_policy, "path", str(request.getfixturevalue("tmp_path") / "wait_history.json"))
+        for attribute in ("_history", "_timeouts", "_new_samples", "_new_timeouts"):
+            monkeypatch.setattr(wait_policy, attribute, {})
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _per_test_recording(request):
+    """
+    Give every test an empty event log buffer (see event_log.py) and collect the page steps it runs
+    (see step_tracker.py)
+    """
+    event_log.start(request.node.nodeid)
+    request.node.started_at = time.time()
+    request.node.steps = []
+
+    step_tracker.add_listener(request.node.steps.append)
+    yield
+    step_tracker.remove_listener(request.node.steps.append)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_protocol(item, nextitem):
+    """
+    Run tests marked sample_profile (or every test with --sample-profile) under the sampling profiler, from setup to
+    teardown, and write their profiles to test_output/profiles/<test id>.collapsed (see sampling_profiler.py)
+    """
+    if not item.config.getoption("--sample-profile") and item.get_closest_marker("sample_profile") is None:
+        yield
+        return
+
+    # imported here, most runs never profile
+    from utilities.sampling_profiler import SamplingProfiler
+
+    profiler = SamplingProfiler(item.config.getoption("--sample-profile-interval-ms") / 1000).start()
+    try:
+        yield
+    finally:
+        profiler.stop().write(item.nodeid)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """
+    Turn failures caused by a locator that preflight found missing into skips, if the option was given, and once a
+    test has been torn down flush its event log (if it failed) and record its results
+
+    Each phase's report is kept on the item as rep_setup, rep_call and rep_teardown, so fixtures can check whether the
+    test failed (see did_test_fail)
+    """
+    outcome = yield
+    report = outcome.get_result()
+
+    if call.excinfo is not None and item.config.getoption("--skip-missing-locators") \
+            and call.excinfo.errisinstance(_missing_locator_error()):
+        report.outcome = "skipped"
+        # location is 0 based, pytest's own skip reports count lines from 1
+        report.longrepr = (str(item.path), item.location[1] + 1, "Skipped: " + str(call.excinfo.value.msg))
+
+    setattr(item, "rep_" + report.when, report)
+
+    if report.when == "teardown":
+        if did_test_fail(item) or item.config.getoption("--event-log-always"):
+            event_log.flush()
+        _record_results(item)
+
+
+def pytest_collection_modifyitems(config, items):
+    """
+    With --impact-select, deselect the tests that did not use anything that changed (see impact_analysis.py)
+    """
+    if not config.getoption("--impact-select"):
+        return
+
+    extra_changes = [change.strip() for change in config.getoption("--impact-changed").split(",") if change.strip()]
+    changed_names, changed_test_files, affects_everything = analyze_changes(config.getoption("--impact-base"),
+                                                                            extra_changes)
+    if affects_everything:
+        return
+
+    selected_ids = config.stash[_impact_map_key].select([item.nodeid for item in items], changed_names,
+                                                        changed_test_files)
+    deselected = [item for item in items if item.nodeid not in selected_ids]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = [item for item in items if item.nodeid in selected_ids]
+
+
+def pytest_sessionfinish(session):
+    """
+    Let the background threads finish writing any failure artifacts, and write any results still being buffered,
+    before the process exits
+    """
+    artifact_capture.shutdown()
+    session.config.stash[_impact_map_key].save()
+
+    results_store = session.config.stash.get(_results_store_key, None)
+    if results_store is not None:
+        results_store.close()
+
+
+def _missing_locator_error():
+    """
+    :return: the MissingLocatorError class, imported only once a test has failed so that collecting tests, and running
+    tests that need no browser, does not import selenium
+    """
+    from selenium_util.locator_manifest import MissingLocatorError
+    return MissingLocatorError
+
+
+def did_test_fail(item):
+    """
+    :param item: a pytest test item
+    :return: True if any phase of the test that has run so far failed
+    """
+    return any(getattr(item, "rep_" + when, None) is not None and getattr(item, "rep_" + when).failed
+               for when in ("setup", "call", "teardown"))
+
+
+def _record_results(item):
+    """
+    Queue a finished test's result, and the results of the steps it ran, in the results store, and remember what a
+    passing test used in the impact map
+    :param item: a pytest test item that has been torn down
+    """
+    if hasattr(item, "steps"):
+        impact_map = item.config.stash[_impact_map_key]
+        if did_test_fail(item):
+            impact_map.forget(item.nodeid)
+        elif getattr(item, "rep_call", None) is not None and item.rep_call.passed:
+            impact_map.record(item.nodeid, item.steps)
+
+    results_store = item.config.stash.get(_results_store_key, None)
+    if results_store is None or not hasattr(item, "started_at"):
+        return
+
+    if did_test_fail(item):
+        test_outcome = "failed"
+    elif any(getattr(item, "rep_" + when, None) is not None and getattr(item, "rep_" + when).skipped
+             for when in ("setup", "call")):
+        test_outcome = "skipped"
+    else:
+        test_outcome = "passed"
+
+    # the create_driver fixture adds the browser it started to the test's user properties
+    browser = dict(item.user_properties).get("browser")
+    run_id = item.config.results_run_id
+    worker = item.config.results_worker
+
+    results_store.add_test_result(run_id, worker, item.nodeid, test_outcome, time.time() - item.started_at, browser,
+                                  item.started_at)
+    for step in item.steps:
+        results_store.add_step_result(run_id, worker, item.nodeid, step, browser)
@@ -1,35 +1,13 @@
-from enum import Enum
-
 from selenium_util.locator import Locator
 from selenium.webdriver.common.by import By
 
-from pages.mortgage_rates_page import MortgageRatesPage
+from pages.registry import new_page
 from pages.zillow_base_page import ZillowBasePage
+from selenium_util.event_log import event_log
+# LoanPrograms used to be declared here, it is re-exported so existing imports keep working
+from utilities.loan_programs import LoanPrograms
 from utilities.mortgage_math import calculate_payment
-
-
-class LoanPrograms(Enum):
-    """
-    A class to represent the loan programs that are available in the web select element
-
-    Note to developer, if you change the structure of this enum, make sure you fix all references to it, there are some
-    references to the 0th and 1st indexes of the tuple values
-    """
-    FIXED_30 = ("Fixed30Year", 30)
-    FIXED_15 = ("Fixed15Year", 15)
-    ARM_5 = ("ARM5", 5)
-
-    @staticmethod
-    def lookup(html_value):
-        """
-        If you have an html value and you need the corresponding enum, use this static helper method
-        :param html_value: the html "value" attribute on a <option> that you would like the enum for
-        :return: The enum that represents that value
-        """
-        for program in LoanPrograms:
-            if program.value[0] == html_value:
-                return program
-        assert False, "Failed to find [" + html_value + "] in LoanPrograms enum, please add a new enum value"
+from utilities.payment_format import acceptable_displays, format_number_like_page
 
 
 class MortgageCalcPage(ZillowBasePage):
@@ -65,22 +43,34 @@ class MortgageCalcPage(ZillowBasePage):
     _RATE_HELP_BUTTON = Locator(By.XPATH, "//span[text()=\"More info on Interest rate\"]/ancestor::button")
     # TODO ask dev for an ID on this element, this is the best way to locate the element currently and it is decently
     #  fragile to future changes
-    _SEE_CURRENT_RATES_LINK = Locator(By.XPATH, "//a[text()=\"See current rates\"]")
-    _RATE_ERROR_MESSAGE = Locator(By.CSS_SELECTOR, "[class*=StyledFormHelp]")
+    _SEE_CURRENT_RATES_LINK = Locator(By.XPATH, "//a[text()=\"See current rates\"]",
+                                      fallbacks=[Locator(By.XPATH, "//a[contains(normalize-space(.), "
+                                                                   "\"See current rates\")]")])
+    # only on the page while the rate input has an error
+    _RATE_ERROR_MESSAGE = Locator(By.CSS_SELECTOR, "[class*=StyledFormHelp]", preflight=False)
 
     # TODO ask dev for an ID on this element, this is the best way to locate the element currently and it is very
     #  fragile to future changes
-    _ADVANCED_BUTTON = Locator(By.XPATH, "//button[text() = \"Advanced\"]")
+    _ADVANCED_BUTTON = Locator(By.XPATH, "//button[text() = \"Advanced\"]",
+                               fallbacks=[Locator(By.XPATH, "//button[normalize-space(.) = \"Advanced\"]")],
+                               preflight=False)
 
-    _PMI_CHECKBOX = Locator(By.ID, "form-1_includePMI")
-    _TAXES_INSURANCE_CHECKBOX = Locator(By.ID, "form-1_includeTaxesInsurance")
+    # only on the page once the advanced options are open
+    _PMI_CHECKBOX = Locator(By.ID, "form-1_includePMI", preflight=False)
+    _TAXES_INSURANCE_CHECKBOX = Locator(By.ID, "form-1_includeTaxesInsurance", preflight=False)
 
     _TAXES_INPUT = Locator(By.ID, "form-1_propertyTaxRateAnnualAmount")
     _INSURANCE_INPUT = Locator(By.ID, "annualHomeownersInsurance")
 
     # TODO ask dev for an ID on this element, this is the best way to locate the element currently and it is very
-    #  fragile to future changes
-    _PAYMENT_TEXT = Locator(By.CSS_SELECTOR, "[y=\"20\"]")
+    #  fragile to future changes. The fallback looks for the dollar amount in the chart's svg text instead of its
+    #  position
+    _PAYMENT_TEXT = Locator(By.CSS_SELECTOR, "[y=\"20\"]",
+                            fallbacks=[Locator(By.XPATH, "//*[local-name()=\"svg\"]//*[local-name()=\"text\"]"
+                                                         "[starts-with(normalize-space(.), \"$\")]")])
+
+    # TODO ask dev for an ID on this element, the chart is the svg the payment text is drawn in
+    _PAYMENT_CHART = Locator(By.XPATH, "//*[@y=\"20\"]/ancestor::*[local-name()=\"svg\"][1]")
 
     '''
     ***** END LOCATORS *****
@@ -89,12 +79,14 @@ class MortgageCalcPage(ZillowBasePage):
     def __init__(self, driver):
         """
         Create a new MortgageCalcPage
-        Assumes you have already navigated to this page, and will wait for the mortgage rate input element to be
-        clickable before returning your new page object to you
+        Assumes you have already navigated to this page, and will wait for the page's requests (including the current
+        rates that fill in the rate input) to finish and the mortgage rate input element to be clickable, and check the
+        page's locators before returning your new page object to you
         :param driver: webdriver that this page will use to interact with the web page
         """
         super().__init__(driver)
-        self.wait_for_element_to_exist(self._RATE_INPUT).wait_for_element_to_be_clickable()
+        self.wait_for_network_idle(self._RATE_INPUT).wait_for_element_to_be_clickable()
+        self.preflight()
 
     def set_interest_rate(self, rate):
         """
@@ -139,20 +131,59 @@ class MortgageCalcPage(ZillowBasePage):
         :return: self, this page object after any changes
         """
 
-        # add a $ and strip off an decimal places in the expected
-        expected_payment = "${:,.0f}".format(expected_payment)
+        # format the way the page does, a $ and rounded to whole dollars. A payment within a fraction of a cent of
+        # $.50 can round either way on the page, both displays are accepted for it
+        expected_displays = acceptable_displays(expected_payment)
 
-        payment_element = self.get_element(self._PAYMENT_TEXT)
-        # We might have just changed an input,
-        # give the payment element a chance to update if it hasn't yet (race condition)
-        payment_element.wait_for_element_to_have_text(expected_payment)
-        actual_value = payment_element.get_text()
+        actual_value = self.get_payment(expected_payment)
 
-        print("Asserting payment is [" + expected_payment + "]")
+        event_log.record("assert_payment", expected=expected_displays, actual=actual_value)
 
         # note we are comparing strings here
-        assert actual_value == expected_payment, \
-            "Expected payment to be [" + expected_payment + "] but it was [" + actual_value + "]"
+        assert actual_value in expected_displays, \
+            "Expected payment to be [" + " or ".join(expected_displays) + "] but it was [" + actual_value + "]"
+        return self
+
+    def get_payment(self, expected_payment=None):
+        """
+        Read the calculated payment off the page
+        :param expected_payment: numeric value the payment should change to, if given the payment is given a chance to
+        show it first (like assert_payment does) but is returned whatever it is
+        :return: the payment as the page displays it, ex: $1,235
+        """
+        payment_element = self.get_element(self._PAYMENT_TEXT)
+        if expected_payment is not None:
+            # We might have just changed an input,
+            # give the payment element a chance to update if it hasn't yet (race condition)
+            payment_element.wait_for_element_to_have_text(acceptable_displays(expected_payment))
+        return payment_element.get_text()
+
+    def assert_payment_chart_looks_like(self, baseline_name):
+        """
+        Assert the payment chart looks like its baseline image, see visual_diff.py. A baseline name with no image fails,
+        run with --update-visual-baselines to make the chart the baseline
+        Call it after asserting the payment, so the chart has been redrawn for your inputs
+        :param baseline_name: name of the baseline image in test_cases/visual_baselines, ex: payment_chart_default
+        :return: self, this page object after any changes
+        """
+        # imported here, so pages that never run a visual check do not load it (and Pillow)
+        from utilities.visual_diff import visual_baselines
+
+        chart_element = self.get_element(self._PAYMENT_CHART)
+
+        # the chart animates when it is redrawn, wait for two screenshots in a row to match before comparing
+        png = chart_element.get_screenshot_as_png()
+        for _ in range(5):
+            next_png = chart_element.get_screenshot_as_png()
+            if next_png == png:
+                break
+            png = next_png
+
+        result = visual_baselines.check(baseline_name, png)
+        event_log.record("visual_check", name=baseline_name, passed=result.passed, hash_distance=result.hash_distance,
+                         changed_fraction=round(result.changed_fraction, 5), regions=result.regions[:5])
+
+        assert result.passed, "Expected the payment chart to look like its baseline but " + result.describe()
         return self
 
     def assert_payment_given_input_values(self):
@@ -235,14 +266,14 @@ class MortgageCalcPage(ZillowBasePage):
         :return: self, this page object after any changes
         """
 
-        # Add in commas to your expected amount and remove any decimal places
-        expected_amount = "{:,.0f}".format(expected_amount)
+        # Add in commas to your expected amount and round off any decimal places the way the page does
+        expected_amounts = acceptable_displays(expected_amount, format_number_like_page)
 
         actual_value = self.get_element(self._DOWN_PAYMENT_AMOUNT_INPUT).get_value()
 
         # note comparing strings here
-        assert actual_value == expected_amount, \
-            "Expected down payment to be [" + str(expected_amount) + "] but it was [" + str(actual_value) + "]"
+        assert actual_value in expected_amounts, \
+            "Expected down payment to be [" + " or ".join(expected_amounts) + "] but it was [" + str(actual_value) + "]"
         return self
 
     def select_loan_program(self, loan_program: LoanPrograms):
@@ -343,7 +374,7 @@ class MortgageCalcPage(ZillowBasePage):
         self.driver.close()
         # switch to the new tab we opened
         self.driver.switch_to.window(self.driver.window_handles[0])
-        return MortgageRatesPage(self.driver)
+        return new_page("MortgageRatesPage", self.driver)
 
     def assert_interest_rate_error_message(self, expected_message):
         """
@@ -37,12 +37,13 @@ class MortgageRatesPage(ZillowBasePage):
     def __init__(self, driver):
         """
         Create a new MortgageRatesPage
-        Assumes you have already navigated to this page, and will wait for the intro span element to be
-        clickable before returning your new page object to you
+        Assumes you have already navigated to this page, and will wait for the page's requests to finish and the intro
+        span element to be clickable, and check the page's locators before returning your new page object to you
         :param driver: webdriver that this page will use to interact with the web page
         """
         super().__init__(driver)
-        self.wait_for_element_to_exist(self._INTRO_SPAN).wait_for_element_to_be_clickable()
+        self.wait_for_network_idle(self._INTRO_SPAN).wait_for_element_to_be_clickable()
+        self.preflight()
 
     def assert_intro_span(self):
         """
@@ -1,5 +1,15 @@
-from selenium.webdriver.support.wait import WebDriverWait
-
+import functools
+import inspect
+
+from selenium.common.exceptions import TimeoutException
+
+from selenium_util.event_log import event_log
+from selenium_util.locator import Locator
+from selenium_util.locator_manifest import MissingLocatorError
+from selenium_util.network_idle import network_tracker
+from selenium_util.pending_elements import PendingElements
+from selenium_util.step_tracker import step_tracker
+from selenium_util.wait_policy import wait_key, wait_policy
 from selenium_util.web_checkbox import WebCheckbox
 from selenium_util.web_element import WebElement
 from selenium_util.web_select import WebSelect
@@ -10,21 +20,31 @@ class Page(object):
     Class that represents ALL pages. Methods defined in this class will be common to every child, and thus should
     be written very generically. This class should not be instantiated directly
 
+    The public methods (and __init__) of every child page are wrapped so each call is reported to the step tracker as a
+    step of the test, see step_tracker.py
+
     ...
 
     Attributes
     ----------
     driver : webdriver
         webdriver that this page will use to interact with the web page
+    locator_manifest : LocatorManifest
+        which locators were present, missing or ambiguous when the page loaded, None if the page was not checked
+    pending_elements : PendingElements
+        the handles from get_element (and friends) that have not found their element yet, they are all found together
+        the first time one of them is used
 
     Methods
     -------
+    get_declared_locators
     get_element
     get_elements
     get_element_if_exists
     get_select_element
     get_checkbox_element
     wait_for_element_to_exist
+    wait_for_network_idle
     """
 
     def __init__(self, driver):
@@ -33,14 +53,38 @@ class Page(object):
         :param driver: the web driver to use to interact with the web page
         """
         self.driver = driver
+        self.locator_manifest = None
+        self.pending_elements = PendingElements(driver)
+
+    def __init_subclass__(cls, **kwargs):
+        """
+        Called by python for every child page class, wraps the methods it defines so they are reported as steps
+        """
+        super().__init_subclass__(**kwargs)
+        for attribute_name, value in list(vars(cls).items()):
+            if inspect.isfunction(value) and (attribute_name == "__init__" or not attribute_name.startswith("_")):
+                setattr(cls, attribute_name, _as_step(cls.__name__, attribute_name, value))
+
+    @classmethod
+    def get_declared_locators(cls):
+        """
+        Find every Locator declared as a class attribute on this page, including the ones inherited from parent pages
+        :return: a dict of attribute name to Locator, a child's locator wins over a parent's with the same name
+        """
+        locators = {}
+        for klass in reversed(cls.__mro__):
+            for attribute_name, value in vars(klass).items():
+                if isinstance(value, Locator):
+                    locators[attribute_name] = value
+        return locators
 
     def get_element(self, locator):
         """
-        Get our custom web element object given a locator
+        Get our custom web element object given a locator, the element is found the first time it is used
         :param locator: how to find the element in the DOM
         :return: a new WebElement object
         """
-        return WebElement(self.driver, locator)
+        return WebElement(self.driver, locator, pending=self.pending_elements)
 
     def get_element_if_exists(self, locator):
         """
@@ -61,10 +105,13 @@ class Page(object):
         :param locator: how to find the element(s) in the DOM
         :return: a list of WebElements that were found
         """
+        # the step used the locator even if it matched nothing (ex: asserting an error message is not shown), the
+        # WebElements below only report it when something was found
+        step_tracker.touch(locator)
 
         # For every element found with driver.find_elements, use map to convert them to web_element objects,
         # and then return as a list
-        return list(map(lambda e: WebElement(self.driver, locator, e), self.driver.find_elements(*locator.as_args())))
+        return list(map(lambda e: WebElement(self.driver, locator, e), locator.find_elements(self.driver)))
 
     def get_select_element(self, locator):
         """
@@ -72,7 +119,7 @@ class Page(object):
         :param locator: how to find the element in the DOM
         :return: a new WebSelect object
         """
-        return WebSelect(self.driver, locator)
+        return WebSelect(self.driver, locator, pending=self.pending_elements)
 
     def get_checkbox_element(self, locator):
         """
@@ -80,21 +127,65 @@ class Page(object):
         :param locator: how to find the element in the DOM
         :return: a new WebCheckbox object
         """
-        return WebCheckbox(self.driver, locator)
+        return WebCheckbox(self.driver, locator, pending=self.pending_elements)
 
-    def wait_for_element_to_exist(self, locator, timeout_in_seconds=10):
+    def _fail_if_missing(self, locator):
+        """
+        If the locator was already missing when the page loaded, waiting for it is only going to waste the timeout
+        :param locator: the Locator about to be waited on
+        """
+        if self.locator_manifest is not None and self.locator_manifest.is_missing(locator):
+            raise MissingLocatorError("Locator [" + str(locator) + "] was missing when the page loaded, not waiting "
+                                      "for it")
+
+    def wait_for_element_to_exist(self, locator, timeout_in_seconds=None):
         """
         Have an element that might not exist in the DOM right when you search for it? Use this method. It is tolerant
         and will wait up until the specified timeout before throwing an exception indicating it failed to find the
         element
         :param locator: how to find the element in the DOM
-        :param timeout_in_seconds: how many seconds to search for the element
+        :param timeout_in_seconds: how many seconds to search for the element, defaults to the timeout learned by the
+        wait policy (see wait_policy.py)
         :return: a new WebElement object if we find the element, otherwise this will throw a timeout exception
         """
-        return WebElement(self,
+        self._fail_if_missing(locator)
+        return WebElement(self.driver,
                           locator,
-                          WebDriverWait(self.driver, timeout_in_seconds).until(
-                              lambda the_driver: the_driver.find_element(locator.by, locator.find_with)))
+                          wait_policy.wait(self.driver, wait_key(locator, "exists"),
+                                           lambda the_driver: locator.find_element(the_driver), timeout_in_seconds))
 
+    def wait_for_network_idle(self, locator, idle_ms=500, timeout_in_seconds=None):
+        """
+        Wait for the page to have had no network request in flight for idle_ms, and then for an element to exist. Use
+        this to know a page is ready, it does not return before data the page is still loading has arrived, and does
+        not wait any longer than that. Browsers without DevTools network events only wait for the element, and a
+        network that never goes quiet (ex: polling) is logged and then only the element is waited for
+        :param locator: how to find the element in the DOM
+        :param idle_ms: how long the network has to be quiet, in milliseconds
+        :param timeout_in_seconds: how many seconds to wait for the network, and then for the element, defaults to the
+        timeouts learned by the wait policy (see wait_policy.py)
+        :return: a new WebElement object for the element
+        """
+        self._fail_if_missing(locator)
+        tracker = network_tracker(self.driver)
+        try:
+            wait_policy.wait(self.driver, wait_key(locator, "network_idle"),
+                             lambda the_driver: tracker.is_idle(idle_ms), timeout_in_seconds, poll_frequency=0.05)
+        except TimeoutException as e:
+            event_log.record("network_idle_timeout", locator=locator, in_flight=tracker.in_flight(), reason=e.msg)
+        return self.wait_for_element_to_exist(locator, timeout_in_seconds)
 
 
+def _as_step(page_name, method_name, method):
+    """
+    Wrap a page method so every call is reported to the step tracker
+    :param page_name: name of the page class the method is defined on
+    :param method_name: name of the method
+    :param method: the function to wrap
+    :return: the wrapped function
+    """
+    @functools.wraps(method)
+    def step(*args, **kwargs):
+        with step_tracker.step(page_name, method_name):
+            return method(*args, **kwargs)
+    return step
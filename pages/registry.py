@@ -0,0 +1,39 @@
+"""
+Registry of the page objects, by class name. A page's module is only imported the first time the page is asked for, so
+pages can navigate to each other without importing each other (and without circular imports), and nothing that only
+needs a page's name pulls in selenium and the whole page chain
+
+Add every new page class to PAGE_MODULES
+"""
+
+import functools
+import importlib
+
+# page class name to the module it is declared in
+PAGE_MODULES = {
+    "ZillowHomePage": "pages.zillow_home_page",
+    "MortgageCalcPage": "pages.mortage_calculator_page",
+    "MortgageRatesPage": "pages.mortgage_rates_page",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def page_class(name):
+    """
+    Get a page class, importing its module the first time
+    :param name: name of the page class, ex: MortgageCalcPage
+    :return: the page class
+    """
+    if name not in PAGE_MODULES:
+        raise KeyError("No page named [" + name + "] in the page registry, add it to PAGE_MODULES in registry.py")
+    return getattr(importlib.import_module(PAGE_MODULES[name]), name)
+
+
+def new_page(name, driver):
+    """
+    Create a page object, for when navigation lands on a new page
+    :param name: name of the page class, ex: MortgageCalcPage
+    :param driver: webdriver that the page will use to interact with the web page
+    :return: a new page object, constructed the same way as calling the class (it waits for the page to be ready)
+    """
+    return page_class(name)(driver)
@@ -1,11 +1,17 @@
+import os
+
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.action_chains import ActionChains
 
 from pages.page import Page
+from pages.registry import new_page
+from selenium_util.event_log import event_log
 from selenium_util.locator import Locator
+from selenium_util.locator_manifest import LocatorManifest
 
-# ROOT url of zillow, used to open driver to page
-ROOT_ZILLOW_URL = "https://www.zillow.com/"
+# ROOT url of zillow, used to open driver to page. Set ZILLOW_ROOT_URL to point the tests at a stand in (ex: the
+# benchmark's local copy of the calculator, or a staging server)
+ROOT_ZILLOW_URL = os.environ.get("ZILLOW_ROOT_URL", "https://www.zillow.com/")
 
 
 class ZillowBasePage(Page):
@@ -27,6 +33,8 @@ class ZillowBasePage(Page):
     -------
     click_mortgage_calculator_link(self)
         Click the mortgage calculator link
+    preflight(self)
+        Check every declared locator against the loaded page in one call, and remember what was missing
     """
 
     '''
@@ -47,6 +55,22 @@ class ZillowBasePage(Page):
         """
         super().__init__(driver)
 
+    def preflight(self):
+        """
+        Check every locator declared on this page against the loaded page with a single execute_script call. Child pages
+        should call this once their page has loaded. Tests that later wait on a locator that was missing (with the
+        page's waits, or the waits of the handles the page built) fail right away instead of waiting out the timeout
+        :return: the LocatorManifest that was recorded for this page
+        """
+        locators = {locator.name: locator for locator in self.get_declared_locators().values() if locator.preflight}
+        self.locator_manifest = LocatorManifest(self.driver, locators)
+        # the page's element handles fail fast on missing locators too, see WebElement.fail_if_missing
+        self.pending_elements.manifest = self.locator_manifest
+
+        event_log.record("preflight", page=type(self).__name__, missing=self.locator_manifest.missing,
+                         ambiguous=self.locator_manifest.ambiguous)
+        return self.locator_manifest
+
     def click_mortgage_calculator_link(self):
         """
         Open the anchor for home loans and click the mortgage calculator
@@ -64,7 +88,5 @@ class ZillowBasePage(Page):
         # work around because the main page has human detection
         self.driver.get(ROOT_ZILLOW_URL + "mortgage-calculator/")
 
-        # import here because if we import at the top of the class we have a circular dependency. Let the two python
-        # files be interpreted first, then when this method is called we are safe to do this import at run time
-        from pages.mortage_calculator_page import MortgageCalcPage
-        return MortgageCalcPage(self.driver)
+        # by name through the registry, MortgageCalcPage extends this class so importing it here would be circular
+        return new_page("MortgageCalcPage", self.driver)
@@ -0,0 +1,4 @@
+"""
+Long running calculator scenario sweeps, with checkpoints so an interrupted sweep can be resumed, see README.md and
+scenarios/__main__.py
+"""
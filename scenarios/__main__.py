@@ -0,0 +1,65 @@
+"""
+Run a scenario sweep through the calculator, checkpointing as it goes
+
+Run it from the root of the project with:
+    python -m scenarios --checkpoint sweep.jsonl                      # the default sweep, see scenario.py
+    python -m scenarios --scenarios my_scenarios.csv --checkpoint my_run.jsonl
+    python -m scenarios --checkpoint sweep.jsonl --resume             # continue a run that was interrupted
+"""
+
+import argparse
+import signal
+import sys
+
+from scenarios.checkpoint import ScenarioCheckpoint
+from scenarios.scenario import fingerprint, load_scenarios, sweep
+
+
+def main():
+    """
+    Run scenarios from the command line
+    """
+    parser = argparse.ArgumentParser(description="Run calculator scenarios with checkpoints, resumable")
+    parser.add_argument("--scenarios", help="JSON lines or .csv file of scenarios, defaults to the default sweep")
+    parser.add_argument("--checkpoint", required=True, help="file results are committed to")
+    parser.add_argument("--resume", action="store_true", default=False,
+                        help="continue the run in --checkpoint, skipping the scenarios it has results for")
+    parser.add_argument("--commit-every", type=int, default=100, help="most results between commits")
+    parser.add_argument("--commit-seconds", type=float, default=10, help="most seconds between commits")
+    parser.add_argument("--max-attempts", type=int, default=3,
+                        help="tries a scenario gets (after browser errors) before it is recorded as an error")
+    parser.add_argument("--report-every", type=int, default=500, help="scenarios between progress reports")
+    parser.add_argument("--url", help="root url of the calculator (ending with a /), defaults to ZILLOW_ROOT_URL")
+    parser.add_argument("--headed", action="store_true", default=False, help="show the browser")
+    args = parser.parse_args()
+
+    scenarios = load_scenarios(args.scenarios) if args.scenarios else sweep()
+    checkpoint = ScenarioCheckpoint(args.checkpoint, fingerprint(scenarios), args.commit_every, args.commit_seconds)
+    try:
+        checkpoint.open(args.resume)
+    except (FileExistsError, ValueError) as e:
+        parser.error(str(e))
+
+    # a preempted runner is sent SIGTERM, exit through the finally blocks so the buffered results are committed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+    # imported here, so a bad command line does not wait on selenium
+    from pages.zillow_base_page import ROOT_ZILLOW_URL
+    from scenarios.runner import ScenarioRunner, print_progress
+    from test_cases.testcase import new_chrome_driver
+
+    runner = ScenarioRunner(args.url or ROOT_ZILLOW_URL, lambda: new_chrome_driver(headless=not args.headed),
+                            args.max_attempts)
+    with checkpoint:
+        try:
+            counts = runner.run(scenarios, checkpoint, args.report_every)
+        except KeyboardInterrupt:
+            print("Interrupted, run again with --resume to continue")
+            sys.exit(130)
+    print_progress(len(checkpoint.completed), len(scenarios), counts)
+    if counts.get("failed") or counts.get("error"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Durable progress of a scenario run, so a run that dies (a browser crash, the runner being preempted) can be resumed
+where it stopped instead of starting over
+
+The checkpoint is a JSON lines file, a header line naming the scenarios it is for and then one line per finished
+scenario. Results are buffered and committed (written and fsync'd) in batches, a crash loses at most the results of
+one batch, which are run again on resume
+"""
+
+import json
+import os
+import time
+
+
+class ScenarioCheckpoint(object):
+    """
+    Append only file of scenario results, committed every commit_every results or commit_seconds seconds, whichever
+    comes first
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        path of the checkpoint file
+    run_key : str
+        fingerprint of the scenarios, resuming with different scenarios is refused
+    commit_every : int
+        most results buffered before they are committed
+    commit_seconds : float
+        most seconds a result stays buffered before it is committed
+    completed : set
+        ids of the scenarios the checkpoint has a result for, committed or not. Errors read from a resumed checkpoint
+        are left out, so a resumed run tries those scenarios again
+    counts : dict
+        how many results the checkpoint has of each status
+
+    Methods
+    -------
+    open(self, resume=False)
+        Start a new checkpoint file, or resume an existing one
+    record(self, result)
+        Add the result of a scenario
+    commit(self)
+        Write and fsync the buffered results
+    close(self)
+        Commit and close the file
+    """
+
+    def __init__(self, path, run_key, commit_every=100, commit_seconds=10.0):
+        """
+        Create a ScenarioCheckpoint, nothing is read or written until it is opened
+        :param path: path of the checkpoint file
+        :param run_key: fingerprint of the scenarios, see scenario.fingerprint
+        :param commit_every: most results buffered before they are committed
+        :param commit_seconds: most seconds a result stays buffered before it is committed
+        """
+        self.path = path
+        self.run_key = run_key
+        self.commit_every = commit_every
+        self.commit_seconds = commit_seconds
+        self.completed = set()
+        self.counts = {}
+        self._buffer = []
+        self._last_commit = time.monotonic()
+        self._file = None
+
+    def open(self, resume=False):
+        """
+        Start a new checkpoint file, or resume an existing one. A checkpoint is never overwritten, a run that already
+        has one has to be resumed (or the file removed by hand)
+        :param resume: True to continue the checkpoint at path, a missing file starts a new one
+        :return: self
+        """
+        if os.path.exists(self.path):
+            if not resume:
+                raise FileExistsError("Checkpoint [" + self.path + "] already exists, resume it or remove it")
+            self._load()
+            self._file = open(self.path, "a")
+        else:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, "w")
+            self._file.write(json.dumps({"run_key": self.run_key, "started_at": time.time()}) + "\n")
+            self._sync()
+            # the new file's name is only durable once its directory is
+            _fsync_directory(directory)
+        self._last_commit = time.monotonic()
+        return self
+
+    def _load(self):
+        """
+        Read the results of the checkpoint file. A last line cut off by a crash in the middle of a commit is dropped
+        (and truncated away, so the next commit starts on a line of its own)
+        """
+        with open(self.path, "rb") as checkpoint_file:
+            lines = checkpoint_file.read().split(b"\n")
+
+        good_bytes = 0
+        results = []
+        for index, line in enumerate(lines):
+            # the last entry is whatever followed the last newline, empty unless a write was cut off
+            if index == len(lines) - 1:
+                break
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                break
+            if index == 0:
+                if entry.get("run_key") != self.run_key:
+                    raise ValueError("Checkpoint [" + self.path + "] is for a different set of scenarios, it cannot "
+                                     "be resumed with these")
+            else:
+                results.append(entry)
+            good_bytes += len(line) + 1
+
+        if good_bytes == 0:
+            raise ValueError("Checkpoint [" + self.path + "] has no header, it is not a checkpoint")
+        if good_bytes < os.path.getsize(self.path):
+            with open(self.path, "r+b") as checkpoint_file:
+                checkpoint_file.truncate(good_bytes)
+                os.fsync(checkpoint_file.fileno())
+
+        for result in results:
+            # an error is the browser failing and not the scenario, give the scenario another go on resume
+            if result["status"] != "error":
+                self._count(result)
+
+    def _count(self, result):
+        """
+        :param result: a result dict, to add to completed and counts
+        """
+        self.completed.add(result["id"])
+        self.counts[result["status"]] = self.counts.get(result["status"], 0) + 1
+
+    def record(self, result):
+        """
+        Add the result of a scenario, committing if enough results are buffered or the oldest has waited long enough
+        :param result: JSON friendly dict with at least the scenario's id and a status
+        """
+        self._count(result)
+        self._buffer.append(json.dumps(result, sort_keys=True))
+        if len(self._buffer) >= self.commit_every or time.monotonic() - self._last_commit >= self.commit_seconds:
+            self.commit()
+
+    def commit(self):
+        """
+        Write the buffered results and fsync them, once this returns they survive a crash
+        """
+        if self._buffer:
+            self._file.write("\n".join(self._buffer) + "\n")
+            self._buffer = []
+            self._sync()
+        self._last_commit = time.monotonic()
+
+    def _sync(self):
+        """
+        Push everything written so far to the disk
+        """
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        """
+        Commit and close the file
+        """
+        if self._file is not None:
+            self.commit()
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _fsync_directory(directory):
+    """
+    fsync a directory so the files created in it survive a crash, not possible (or needed) on Windows
+    :param directory: path of the directory
+    """
+    try:
+        descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+def read_results(path):
+    """
+    :param path: path of a checkpoint file
+    :return: list of the result dicts it has, the last one of each scenario (a resumed run records the scenarios that
+    had errors again). A last line cut off by a crash is left out
+    """
+    with open(path) as checkpoint_file:
+        lines = checkpoint_file.read().split("\n")[1:-1]
+    results = {}
+    for line in lines:
+        try:
+            result = json.loads(line)
+        except ValueError:
+            break
+        # a dict keeps the order a scenario was first recorded in
+        results[result["id"]] = result
+    return list(results.values())
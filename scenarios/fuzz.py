@@ -0,0 +1,341 @@
+"""
+Differential fuzzing of the calculator against calculate_payment
+
+Random and boundary scenarios are pushed through one loaded calculator page and the payment it shows is compared to
+ours. Scenarios whose payment is within a fraction of a cent of a half dollar (see rounding_ambiguous) are dropped
+before they reach the browser, the page can display them either way so they can never prove a mismatch
+
+A mismatch is shrunk to the simplest scenario that still reproduces it. Browser round trips are the expensive part,
+so shrinking is mostly offline: the mismatch is matched against a set of hypotheses of what the page does differently
+(ex: rounds the rate to 2 decimals), and a simpler candidate is only tried in the browser if a hypothesis that explains
+everything seen so far predicts it still mismatches. Every browser answer rules out the hypotheses it contradicts. If
+no hypothesis explains a mismatch, candidates are tried in order of simplicity, up to a budget
+
+Run it from the root of the project with:
+    python -m scenarios.fuzz --count 2000 --seed 1 --output test_output/fuzz_findings.jsonl
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+
+import numpy as np
+
+from scenarios.scenario import Scenario
+from utilities.loan_programs import LoanPrograms
+from utilities.mortgage_math import amortized_payments, calculate_payment
+from utilities.payment_format import acceptable_displays, rounding_ambiguous
+
+# inputs on the edges of what the calculator takes, mixed into every run
+PRICE_BOUNDARIES = (10000, 99999, 100000, 300000, 999999, 1000000, 9999999)
+DOWN_PAYMENT_PERCENT_BOUNDARIES = (0, 3, 19.99, 20, 20.01, 99.99, 100)
+RATE_BOUNDARIES = (0, 0.001, 0.125, 1, 9.999, 10, 99.999, 100)
+
+# fraction of the generated scenarios that are boundary combinations
+_BOUNDARY_SHARE = 0.25
+
+# the page's default inputs, the simplest scenario there is
+_DEFAULT_PRICE = 300000
+_DEFAULT_RATE = 5
+
+
+def _inputs(transform):
+    """
+    Turn a function of the scenario's inputs into a function of the scenario, for the hypotheses below
+    :param transform: function given (price, down payment, rate, loan program) returning the same with changes
+    :return: function given a Scenario returning the payment the page would show if the hypothesis were true
+    """
+    return lambda scenario: calculate_payment(*transform(scenario.home_price, scenario.down_payment, scenario.rate,
+                                                         scenario.loan_program))
+
+
+# What the page might be doing differently from calculate_payment, each is the payment the page would show if it did
+PAGE_HYPOTHESES = {
+    "rate rounded to 2 decimals": _inputs(lambda price, down, rate, program: (price, down, round(rate, 2), program)),
+    "rate truncated to 2 decimals": _inputs(
+        lambda price, down, rate, program: (price, down, math.floor(rate * 100) / 100, program)),
+    "rate rounded to 1 decimal": _inputs(lambda price, down, rate, program: (price, down, round(rate, 1), program)),
+    "down payment from a percent rounded to 2 decimals": _inputs(
+        lambda price, down, rate, program: (price, price * round(down / price * 100, 2) / 100, rate, program)),
+    "down payment from a whole percent": _inputs(
+        lambda price, down, rate, program: (price, price * round(down / price * 100) / 100, rate, program)),
+    "down payment ignored": _inputs(lambda price, down, rate, program: (price, 0, rate, program)),
+    "30 year term for every program": _inputs(
+        lambda price, down, rate, program: (price, down, rate, LoanPrograms.FIXED_30)),
+}
+
+
+def generate(count, seed=None):
+    """
+    Random and boundary scenarios, prices and down payments in whole dollars and rates with up to 3 decimals like a
+    person would type them. Scenarios the page could display either way are dropped, so fewer than count may come back
+    :param count: how many scenarios to generate
+    :param seed: seed for a repeatable run
+    :return: list of Scenarios
+    """
+    generator = np.random.default_rng(seed)
+    programs = list(LoanPrograms)
+    boundary_count = int(count * _BOUNDARY_SHARE)
+    random_count = count - boundary_count
+
+    prices = np.concatenate([generator.choice(PRICE_BOUNDARIES, boundary_count),
+                             np.round(10 ** generator.uniform(4, 7, random_count))])
+    percents = np.concatenate([generator.choice(DOWN_PAYMENT_PERCENT_BOUNDARIES, boundary_count),
+                               generator.uniform(0, 100, random_count)])
+    # most real rates are under 15%, a few are anywhere the calculator allows
+    rates = np.where(generator.random(random_count) < 0.95, generator.uniform(0, 15, random_count),
+                     generator.uniform(0, 100, random_count))
+    rates = np.concatenate([generator.choice(RATE_BOUNDARIES, boundary_count), np.round(rates, 3)])
+    program_indexes = generator.integers(0, len(programs), count)
+
+    down_payments = np.round(prices * percents / 100)
+    terms = np.array([program.value[1] for program in programs])[program_indexes]
+    keep = ~rounding_ambiguous(amortized_payments(prices - down_payments, rates, terms * 12))
+
+    return [Scenario("fuzz-{}-{}".format(seed, index), float(prices[index]), float(down_payments[index]),
+                     float(rates[index]), programs[program_indexes[index]]) for index in np.nonzero(keep)[0]]
+
+
+def _key(scenario):
+    """
+    :param scenario: a Scenario
+    :return: its inputs, to cache browser answers by
+    """
+    return scenario.home_price, scenario.down_payment, scenario.rate, scenario.loan_program
+
+
+def _significant(value):
+    """
+    :param value: an input value
+    :return: its significant digits, ex: 1000000 -> "1", 2.44 -> "244", 0 -> ""
+    """
+    return ("%.6f" % value).replace(".", "").strip("0")
+
+
+def complexity(scenario):
+    """
+    How complicated a scenario is to read, shrinking only moves to less complicated scenarios
+    :param scenario: a Scenario
+    :return: count of significant digits in its inputs, plus the loan program's distance from the default
+    """
+    return len(_significant(scenario.home_price)) + len(_significant(scenario.down_payment)) + \
+        len(_significant(scenario.rate)) + list(LoanPrograms).index(scenario.loan_program)
+
+
+def _rounded(value, digits):
+    """
+    :param value: a whole number
+    :param digits: significant digits to keep
+    :return: value rounded to that many significant digits
+    """
+    if value == 0:
+        return 0.0
+    return float(round(value, digits - 1 - int(math.floor(math.log10(abs(value))))))
+
+
+def simpler_candidates(scenario):
+    """
+    Scenarios that change one input of a scenario (or the price and the down payment with it) to something simpler
+    :param scenario: a Scenario
+    :return: list of valid Scenarios less complicated than the given one, simplest first
+    """
+    price, down, rate, program = _key(scenario)
+    prices = {_DEFAULT_PRICE} | {_rounded(price, digits) for digits in range(1, 7)}
+    downs = {0.0, price, round(price * 0.2)} | {_rounded(down, digits) for digits in range(1, 7)}
+    rates = {0.0, _DEFAULT_RATE, float(round(rate))} | {round(rate, digits) for digits in range(1, 3)}
+
+    candidates = []
+    for new_price in prices:
+        candidates.append((new_price, down, rate, program))
+        # the same down payment percent, rounded to whole dollars
+        candidates.append((new_price, round(down / price * new_price) if price else down, rate, program))
+    candidates += [(price, new_down, rate, program) for new_down in downs]
+    candidates += [(price, down, new_rate, program) for new_rate in rates]
+    candidates += [(price, down, rate, new_program) for new_program in LoanPrograms]
+
+    current = complexity(scenario)
+    simpler = {}
+    for index, (new_price, new_down, new_rate, new_program) in enumerate(candidates):
+        candidate = Scenario(scenario.id if scenario.id.endswith("-shrunk") else scenario.id + "-shrunk",
+                             float(new_price), float(new_down), float(new_rate), new_program)
+        if 0 < candidate.home_price and 0 <= candidate.down_payment <= candidate.home_price \
+                and complexity(candidate) < current:
+            simpler.setdefault(_key(candidate), candidate)
+    return sorted(simpler.values(), key=complexity)
+
+
+def _explains(hypothesis, scenario, display):
+    """
+    :return: True if the page showing display for scenario is what the hypothesis predicts
+    """
+    return display in acceptable_displays(hypothesis(scenario))
+
+
+def shrink(scenario, display, check, max_checks=40):
+    """
+    Shrink a mismatch to the simplest scenario that still mismatches, see the module docstring
+    :param scenario: a Scenario the page showed the wrong payment for
+    :param display: the payment the page showed for it
+    :param check: function given a Scenario, returning the payment the page shows for it (a browser round trip)
+    :param max_checks: most times check is called
+    :return: dict with the shrunk scenario, the payment the page showed and we expected for it, the hypotheses that
+    explain everything seen and how many checks were made
+    """
+    hypotheses = {name: hypothesis for name, hypothesis in PAGE_HYPOTHESES.items()
+                  if _explains(hypothesis, scenario, display)}
+    checks = 0
+    improved = True
+    while improved and checks < max_checks:
+        improved = False
+        for candidate in simpler_candidates(scenario):
+            expected = acceptable_displays(candidate.expected_payment())
+            if len(expected) > 1:
+                # either display would be right, it cannot reproduce anything
+                continue
+            if hypotheses and not any(acceptable_displays(hypothesis(candidate))[0] not in expected
+                                      for hypothesis in hypotheses.values()):
+                # nothing that explains the mismatch predicts this one mismatches too, no need to ask the browser
+                continue
+            if checks >= max_checks:
+                break
+            candidate_display = check(candidate)
+            checks += 1
+            hypotheses = {name: hypothesis for name, hypothesis in hypotheses.items()
+                          if _explains(hypothesis, candidate, candidate_display)}
+            if candidate_display not in expected:
+                scenario, display = candidate, candidate_display
+                improved = True
+                break
+
+    return {"scenario": scenario.to_dict(), "actual": display,
+            "expected": acceptable_displays(scenario.expected_payment()), "hypotheses": sorted(hypotheses),
+            "shrink_checks": checks}
+
+
+class DifferentialFuzzer(object):
+    """
+    Runs fuzz scenarios through one loaded calculator page, and shrinks the mismatches it finds
+
+    ...
+
+    Attributes
+    ----------
+    page : MortgageCalcPage
+        the loaded calculator, see runner.open_calculator
+    max_shrink_checks : int
+        most browser round trips spent shrinking each mismatch
+    checks : int
+        browser round trips made so far
+
+    Methods
+    -------
+    check(self, scenario)
+        The payment the page shows for a scenario
+    run(self, scenarios, report_every=100, report=None)
+        Run scenarios, returning the shrunk mismatches
+    """
+
+    def __init__(self, page, max_shrink_checks=40):
+        """
+        Create a DifferentialFuzzer
+        :param page: the loaded calculator, see runner.open_calculator
+        :param max_shrink_checks: most browser round trips spent shrinking each mismatch
+        """
+        self.page = page
+        self.max_shrink_checks = max_shrink_checks
+        self.checks = 0
+        self._answers = {}
+
+    def check(self, scenario):
+        """
+        The payment the page shows for a scenario, each scenario is only entered once
+        :param scenario: a Scenario
+        :return: the payment as the page displays it
+        """
+        # imported here, shrinking and generating scenarios do not need selenium
+        from scenarios.runner import enter_scenario
+
+        key = _key(scenario)
+        if key not in self._answers:
+            self._answers[key] = enter_scenario(self.page, scenario).get_payment(scenario.expected_payment())
+            self.checks += 1
+        return self._answers[key]
+
+    def run(self, scenarios, report_every=100, report=None):
+        """
+        Run scenarios, shrinking each mismatch. A mismatch that shrinks to one already found is only reported once
+        :param scenarios: list of Scenarios, see generate
+        :param report_every: scenarios between reports
+        :param report: function given (scenarios run, total, findings so far, browser round trips), defaults to
+        print_progress
+        :return: list of findings, see shrink
+        """
+        report = report or print_progress
+        findings = {}
+        for number, scenario in enumerate(scenarios, 1):
+            display = self.check(scenario)
+            if display not in acceptable_displays(scenario.expected_payment()):
+                finding = shrink(scenario, display, self.check, self.max_shrink_checks)
+                finding["found_by"] = scenario.to_dict()
+                findings.setdefault(_key(Scenario.from_dict(finding["scenario"])), finding)
+            if number % report_every == 0:
+                report(number, len(scenarios), len(findings), self.checks)
+        return list(findings.values())
+
+
+def print_progress(done, total, findings, checks):
+    """
+    Print how far along a fuzz run is
+    :param done: scenarios run
+    :param total: scenarios in the run
+    :param findings: mismatches found so far
+    :param checks: browser round trips so far
+    """
+    print("{}/{} scenarios, {} mismatch(es), {} browser round trips".format(done, total, findings, checks), flush=True)
+
+
+def main():
+    """
+    Run the fuzzer from the command line
+    """
+    parser = argparse.ArgumentParser(description="Differential fuzzing of the calculator against calculate_payment")
+    parser.add_argument("--count", type=int, default=1000, help="scenarios to generate")
+    parser.add_argument("--seed", type=int, default=int(time.time()), help="seed, to repeat a run")
+    parser.add_argument("--max-shrink-checks", type=int, default=40,
+                        help="most browser round trips spent shrinking each mismatch")
+    parser.add_argument("--output", help="write the findings to this JSON lines file")
+    parser.add_argument("--url", help="root url of the calculator (ending with a /), defaults to ZILLOW_ROOT_URL")
+    parser.add_argument("--headed", action="store_true", default=False, help="show the browser")
+    args = parser.parse_args()
+
+    # imported here, so a bad command line does not wait on selenium
+    from pages.zillow_base_page import ROOT_ZILLOW_URL
+    from scenarios.runner import open_calculator
+    from test_cases.testcase import new_chrome_driver
+
+    scenarios = generate(args.count, args.seed)
+    print("seed {}, {} scenarios ({} dropped as ambiguous)".format(args.seed, len(scenarios),
+                                                                  args.count - len(scenarios)))
+    driver = new_chrome_driver(headless=not args.headed)
+    try:
+        fuzzer = DifferentialFuzzer(open_calculator(driver, args.url or ROOT_ZILLOW_URL), args.max_shrink_checks)
+        findings = fuzzer.run(scenarios)
+    finally:
+        driver.quit()
+
+    for finding in findings:
+        print("MISMATCH {} shows {} expected {}, explained by: {}".format(
+            finding["scenario"], finding["actual"], " or ".join(finding["expected"]),
+            ", ".join(finding["hypotheses"]) or "nothing we know of"))
+    if args.output:
+        with open(args.output, "a") as output:
+            for finding in findings:
+                output.write(json.dumps(dict(finding, seed=args.seed), sort_keys=True) + "\n")
+    if findings:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Runs scenarios through one loaded calculator page, recording every result to a ScenarioCheckpoint
+
+The page is loaded once and every scenario just changes its inputs, so the expensive browser work (starting chrome,
+loading the calculator) is only repeated when something goes wrong. A scenario whose payment does not match is a
+result like any other, a browser that crashes or stops answering is not: the browser is replaced and the scenario
+retried. Any other WebDriver error (ex: an element that went stale while the page redrew) is retried on the same page,
+starting a new chrome would not help it
+"""
+
+import time
+
+from urllib3.exceptions import HTTPError
+
+from pages.mortage_calculator_page import MortgageCalcPage
+from selenium_util.event_log import event_log
+from utilities.payment_format import acceptable_displays
+
+# what chromedriver answers when the browser behind a session crashed or went away
+_BROWSER_GONE_MESSAGES = ("chrome not reachable", "tab crashed", "session deleted", "disconnected")
+
+
+def open_calculator(driver, root_url):
+    """
+    Load the calculator ready for scenarios, with taxes and insurance left out of the payment like calculate_payment
+    leaves them out
+    :param driver: webdriver to use
+    :param root_url: root url of the site, ending with a /
+    :return: a new MortgageCalcPage
+    """
+    driver.get(root_url + "mortgage-calculator/")
+    return MortgageCalcPage(driver).check_taxes_insurance(False)
+
+
+def enter_scenario(page, scenario):
+    """
+    Enter a scenario's inputs on the calculator
+    :param page: a MortgageCalcPage from open_calculator
+    :param scenario: the Scenario to enter
+    :return: the page, after any changes
+    """
+    page.set_home_price(scenario.home_price) \
+        .set_down_payment_amount(scenario.down_payment) \
+        .select_loan_program(scenario.loan_program) \
+        .set_interest_rate(scenario.rate)
+    # PMI is only offered with less than 20% down, calculate_payment never includes it
+    if scenario.down_payment < scenario.home_price * 0.2:
+        page.check_pmi(False)
+    return page
+
+
+def run_scenario(page, scenario):
+    """
+    Enter a scenario and check the payment the page shows
+    :param page: a MortgageCalcPage from open_calculator
+    :param scenario: the Scenario to run
+    :return: result dict, with a status of passed or failed
+    """
+    start = time.perf_counter()
+    payment = scenario.expected_payment()
+    expected = acceptable_displays(payment)
+    actual = enter_scenario(page, scenario).get_payment(payment)
+    return {"id": scenario.id, "status": "passed" if actual in expected else "failed", "expected": expected,
+            "actual": actual, "seconds": round(time.perf_counter() - start, 3)}
+
+
+class ScenarioRunner(object):
+    """
+    Runs scenarios on one browser at a time, see the module docstring
+
+    ...
+
+    Attributes
+    ----------
+    root_url : str
+        root url of the calculator to load, ending with a /
+    max_attempts : int
+        how many tries a scenario gets before it is recorded as an error
+
+    Methods
+    -------
+    run(self, scenarios, checkpoint, report_every=500, report=None)
+        Run every scenario the checkpoint does not have a result for yet
+    """
+
+    def __init__(self, root_url, driver_factory, max_attempts=3):
+        """
+        Create a ScenarioRunner
+        :param root_url: root url of the calculator to load, ending with a /
+        :param driver_factory: function returning a new webdriver
+        :param max_attempts: how many tries a scenario gets before it is recorded as an error
+        """
+        self.root_url = root_url
+        self.max_attempts = max_attempts
+        self._driver_factory = driver_factory
+        self._driver = None
+        self._page = None
+
+    def _ready_page(self):
+        """
+        :return: the loaded calculator, starting a browser and loading it if needed
+        """
+        if self._page is None:
+            if self._driver is None:
+                self._driver = self._driver_factory()
+            self._page = open_calculator(self._driver, self.root_url)
+        return self._page
+
+    def _discard_browser(self):
+        """
+        Quit the browser, whatever state it is in
+        """
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            except Exception:
+                # a crashed browser cannot be asked to quit, its chromedriver goes away with its service
+                pass
+        self._driver = None
+        self._page = None
+
+    def run(self, scenarios, checkpoint, report_every=500, report=None):
+        """
+        Run every scenario the checkpoint does not have a result for yet, recording each result to it. The checkpoint
+        is committed however the run ends (including being interrupted), the browser is always quit
+        :param scenarios: list of Scenarios
+        :param checkpoint: an open ScenarioCheckpoint
+        :param report_every: scenarios between reports
+        :param report: function given (scenarios done, total, checkpoint.counts), defaults to print_progress
+        :return: checkpoint.counts
+        """
+        from selenium.common.exceptions import InvalidSessionIdException, WebDriverException
+
+        report = report or print_progress
+        remaining = [scenario for scenario in scenarios if scenario.id not in checkpoint.completed]
+        event_log.record("scenarios_resumed", total=len(scenarios), remaining=len(remaining))
+        try:
+            for number, scenario in enumerate(remaining, 1):
+                for attempt in range(1, self.max_attempts + 1):
+                    try:
+                        result = run_scenario(self._ready_page(), scenario)
+                        break
+                    except (WebDriverException, HTTPError, ConnectionError) as e:
+                        reason = getattr(e, "msg", None) or str(e)
+                        if isinstance(e, (InvalidSessionIdException, HTTPError, ConnectionError)) or \
+                                any(message in reason for message in _BROWSER_GONE_MESSAGES):
+                            # the browser crashed or chromedriver stopped answering, start over in a new one
+                            event_log.record("scenario_browser_restart", id=scenario.id, attempt=attempt, reason=reason)
+                            self._discard_browser()
+                        else:
+                            # the browser is fine, entering the scenario again on the same page will do
+                            event_log.record("scenario_retry", id=scenario.id, attempt=attempt, reason=reason)
+                        result = {"id": scenario.id, "status": "error", "error": reason, "attempts": attempt}
+                if result["status"] == "failed":
+                    # a mismatch may have left the page in a state that breaks the next scenario, reload it
+                    self._page = None
+                checkpoint.record(result)
+                if number % report_every == 0:
+                    report(len(scenarios) - len(remaining) + number, len(scenarios), checkpoint.counts)
+        finally:
+            checkpoint.commit()
+            self._discard_browser()
+        return checkpoint.counts
+
+
+def print_progress(done, total, counts):
+    """
+    Print how far along a run is
+    :param done: scenarios with a result
+    :param total: scenarios in the run
+    :param counts: results per status
+    """
+    print("{}/{} scenarios ({:.1%}) {}".format(done, total, done / total if total else 1,
+                                               ", ".join(status + " " + str(count)
+                                                         for status, count in sorted(counts.items()))), flush=True)
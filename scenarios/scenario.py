@@ -0,0 +1,131 @@
+"""
+Calculator scenarios, one set of inputs for the mortgage calculator and the payment it should show
+
+Scenarios are read from JSON lines or CSV files with the columns id, home_price, down_payment, rate and loan_program
+(a LoanPrograms name, ex: FIXED_30), or generated as a sweep over a grid of inputs
+"""
+
+import csv
+import hashlib
+import itertools
+import json
+
+from utilities.loan_programs import LoanPrograms
+from utilities.mortgage_math import calculate_down_payment, calculate_payment
+
+# Inputs of the default sweep, 50,400 scenarios
+DEFAULT_SWEEP_PRICES = range(50000, 2050000, 25000)
+DEFAULT_SWEEP_DOWN_PAYMENT_PERCENTS = (3, 5, 10, 15, 20, 25, 30, 40, 50, 60)
+DEFAULT_SWEEP_RATES = tuple(round(rate * 0.25, 2) for rate in range(4, 25))
+
+
+class Scenario(object):
+    """
+    One set of calculator inputs
+
+    ...
+
+    Attributes
+    ----------
+    id : str
+        unique name of the scenario, used to tell which scenarios a checkpoint has results for
+    home_price : float
+        home price to enter
+    down_payment : float
+        down payment amount to enter
+    rate : float
+        interest rate to enter, in percent
+    loan_program : LoanPrograms
+        loan program to select
+
+    Methods
+    -------
+    expected_payment(self)
+        The payment the page should show for these inputs
+    to_dict(self)
+        The scenario as a JSON friendly dict
+    from_dict(values)
+        Create a Scenario from a dict, ex: a line of a scenario file
+    """
+
+    __slots__ = ("id", "home_price", "down_payment", "rate", "loan_program")
+
+    def __init__(self, scenario_id, home_price, down_payment, rate, loan_program):
+        """
+        Create a Scenario, see the class attributes
+        """
+        self.id = str(scenario_id)
+        self.home_price = home_price
+        self.down_payment = down_payment
+        self.rate = rate
+        self.loan_program = loan_program
+
+    def expected_payment(self):
+        """
+        :return: the payment the page should show for these inputs, see calculate_payment
+        """
+        return calculate_payment(self.home_price, self.down_payment, self.rate, self.loan_program)
+
+    def to_dict(self):
+        """
+        :return: the scenario as a JSON friendly dict, the same shape a scenario file line has
+        """
+        return {"id": self.id, "home_price": self.home_price, "down_payment": self.down_payment, "rate": self.rate,
+                "loan_program": self.loan_program.name}
+
+    @staticmethod
+    def from_dict(values):
+        """
+        Create a Scenario from a dict, ex: a line of a scenario file. Numbers may be strings, as they are in a CSV
+        :param values: dict with id, home_price, down_payment, rate and loan_program
+        :return: a new Scenario
+        """
+        return Scenario(values["id"], float(values["home_price"]), float(values["down_payment"]),
+                        float(values["rate"]), LoanPrograms[values["loan_program"]])
+
+
+def load_scenarios(path):
+    """
+    Read a scenario file
+    :param path: a .csv file, anything else is read as JSON lines
+    :return: list of Scenarios, in the order of the file
+    """
+    with open(path, newline="") as scenario_file:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(scenario_file))
+        else:
+            rows = [json.loads(line) for line in scenario_file if line.strip()]
+    scenarios = [Scenario.from_dict(row) for row in rows]
+
+    ids = set()
+    for scenario in scenarios:
+        if scenario.id in ids:
+            raise ValueError("Scenario id [" + scenario.id + "] is used more than once in " + path)
+        ids.add(scenario.id)
+    return scenarios
+
+
+def sweep(prices=DEFAULT_SWEEP_PRICES, down_payment_percents=DEFAULT_SWEEP_DOWN_PAYMENT_PERCENTS,
+          rates=DEFAULT_SWEEP_RATES, loan_programs=tuple(LoanPrograms)):
+    """
+    Every combination of the given inputs. Ids are made from the inputs, so the same sweep always has the same ids
+    :param prices: home prices
+    :param down_payment_percents: down payments, as a percent of the price
+    :param rates: interest rates, in percent
+    :param loan_programs: LoanPrograms
+    :return: list of Scenarios
+    """
+    return [Scenario("{}-{}-{}-{}".format(price, percent, rate, program.name), price,
+                     calculate_down_payment(price, percent), rate, program)
+            for price, percent, rate, program in itertools.product(prices, down_payment_percents, rates, loan_programs)]
+
+
+def fingerprint(scenarios):
+    """
+    :param scenarios: list of Scenarios
+    :return: a hash of every scenario's id and inputs, a checkpoint only resumes the scenarios it was started with
+    """
+    digest = hashlib.sha1()
+    for scenario in scenarios:
+        digest.update(json.dumps(scenario.to_dict(), sort_keys=True).encode())
+    return digest.hexdigest()
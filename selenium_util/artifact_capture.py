@@ -0,0 +1,175 @@
+import gzip
+import io
+import json
+import os
+import queue
+import re
+import threading
+
+from selenium_util.event_log import event_log
+
+# Pillow and zstandard are optional, without them screenshots are written as the PNG the browser gave us
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Default directory artifacts are written to, at the root of the project
+DEFAULT_ARTIFACT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test_output", "artifacts")
+
+# put on the queue to tell a worker thread to stop
+_STOP = object()
+
+
+class ArtifactCapture(object):
+    """
+    Captures failure artifacts (screenshot, DOM and browser console log) without holding up the test process.
+
+    Only the raw capture happens on the calling thread, which is a couple of WebDriver calls. Compressing and writing
+    the files is handed to a small pool of background threads through a bounded queue, so the next test can start
+    right away. If the queue is full (many failures in a row) the caller waits up to put_timeout for room, and then
+    drops the artifacts rather than stall the run
+
+    Events about a capture are recorded on the calling thread where they can be, a write that fails in the background
+    is only known once another test may be running, so its event is tagged with the id of the test that was captured
+
+    ...
+
+    Attributes
+    ----------
+    output_dir : str
+        directory a folder of artifacts is written to for each capture
+    workers : int
+        how many background threads compress and write artifacts
+    queue_size : int
+        how many captures can wait to be written before capture has to wait
+    put_timeout : float
+        seconds capture waits for room on a full queue before dropping the artifacts
+
+    Methods
+    -------
+    capture(self, driver, name)
+        Grab the artifacts from the browser and queue them to be written
+    shutdown(self)
+        Wait for every queued capture to be written and stop the background threads
+    """
+
+    def __init__(self, output_dir=DEFAULT_ARTIFACT_DIR, workers=2, queue_size=16, put_timeout=5):
+        """
+        Create an ArtifactCapture, the background threads are started on the first capture
+        :param output_dir: directory a folder of artifacts is written to for each capture
+        :param workers: how many background threads compress and write artifacts
+        :param queue_size: how many captures can wait to be written before capture has to wait
+        :param put_timeout: seconds capture waits for room on a full queue before dropping the artifacts
+        """
+        self.output_dir = output_dir
+        self.workers = workers
+        self.queue_size = queue_size
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def _start(self):
+        """
+        Start the background threads if they are not running
+        """
+        with self._lock:
+            if not self._threads:
+                for index in range(self.workers):
+                    thread = threading.Thread(target=self._work, name="artifact-writer-" + str(index), daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+
+    def capture(self, driver, name):
+        """
+        Grab the screenshot, DOM and console log from the browser and queue them to be compressed and written
+        :param driver: webdriver to capture from
+        :param name: name of the folder to write the artifacts to, ex: the test's id
+        :return: the folder the artifacts will be written to, or None if nothing could be captured
+        """
+        folder = os.path.join(self.output_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", name))
+        try:
+            screenshot = driver.get_screenshot_as_png()
+            dom = driver.page_source
+        except Exception as e:
+            # the browser may be the reason the test failed, a capture should never add a second error
+            event_log.record("artifact_capture_failed", name=name, error=e)
+            return None
+
+        try:
+            console = driver.get_log("browser")
+        except Exception:
+            # only some browsers support the log endpoint
+            console = []
+
+        self._start()
+        try:
+            self._queue.put((folder, screenshot, dom, console, event_log.test_id), timeout=self.put_timeout)
+        except queue.Full:
+            event_log.record("artifact_dropped", name=name)
+            return None
+        return folder
+
+    def _work(self):
+        """
+        Background thread loop, compresses and writes captures until told to stop
+        """
+        while True:
+            job = self._queue.get()
+            try:
+                if job is _STOP:
+                    return
+                folder, screenshot, dom, console, test_id = job
+                self._write(folder, screenshot, dom, console)
+            except Exception as e:
+                event_log.record("artifact_write_failed", folder=folder, test=test_id, error=e)
+            finally:
+                self._queue.task_done()
+
+    @staticmethod
+    def _write(folder, screenshot, dom, console):
+        """
+        Compress and write one capture
+        :param folder: folder to write to
+        :param screenshot: PNG bytes
+        :param dom: page source
+        :param console: list of browser console log entries
+        """
+        os.makedirs(folder, exist_ok=True)
+
+        if Image is not None:
+            with Image.open(io.BytesIO(screenshot)) as image:
+                image.save(os.path.join(folder, "screenshot.webp"), "WEBP", quality=80)
+        elif zstandard is not None:
+            with open(os.path.join(folder, "screenshot.png.zst"), "wb") as screenshot_file:
+                screenshot_file.write(zstandard.ZstdCompressor().compress(screenshot))
+        else:
+            with open(os.path.join(folder, "screenshot.png"), "wb") as screenshot_file:
+                screenshot_file.write(screenshot)
+
+        with gzip.open(os.path.join(folder, "dom.html.gz"), "wt", encoding="utf-8", compresslevel=6) as dom_file:
+            dom_file.write(dom)
+
+        with open(os.path.join(folder, "console.json"), "w") as console_file:
+            json.dump(console, console_file, indent=1)
+
+    def shutdown(self):
+        """
+        Wait for every queued capture to be written and stop the background threads
+        """
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(_STOP)
+        for thread in threads:
+            thread.join()
+
+
+# The capture used by the create_driver fixture, shut down at the end of the test session
+artifact_capture = ArtifactCapture()
@@ -0,0 +1,224 @@
+import errno
+import json
+import os
+import shutil
+import time
+import uuid
+
+from selenium_util.event_log import event_log
+
+# fcntl is POSIX only, without it (ex: Windows) clones are always plain copies
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Default directory snapshots and session clones are kept in, at the root of the project. Kept between runs, that is
+# the point of a snapshot
+DEFAULT_PROFILE_DIR = os.environ.get(
+    "BROWSER_PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".browser_profiles"))
+
+# ioctl that asks a Linux copy on write filesystem (btrfs, xfs, overlayfs on those...) to share a file's blocks
+_FICLONE = 0x40049409
+
+# files a browser keeps while it has the profile open (or only needs for one session), never copied into a clone.
+# A copied Singleton lock would make chrome think the clone is already in use
+_SKIPPED_FILES = {"SingletonLock", "SingletonSocket", "SingletonCookie", "lockfile", "Crashpad", "BrowserMetrics",
+                  "Sessions", "Session Storage"}
+
+# name of the file describing a snapshot, written last so a snapshot without it is incomplete
+_MANIFEST = "snapshot.json"
+
+# how many old snapshots are kept after a new one is built
+_KEEP_SNAPSHOTS = 2
+
+# session clones older than this are left over from a crashed run, and are removed. A session can run for hours
+_ABANDONED_CLONE_SECONDS = 6 * 60 * 60
+
+# unfinished snapshot builds older than this were abandoned by a crashed build, building takes a minute or two
+_ABANDONED_BUILD_SECONDS = 30 * 60
+
+
+class ProfileSnapshot(object):
+    """
+    A browser user data dir that has already loaded our pages, so its disk cache holds their javascript bundles, fonts
+    and css. The snapshot is built once (and again once it is older than max_age_hours, or the pages to warm change)
+    and then never used directly. Each session gets its own clone to run in and throw away, so sessions start with a
+    hot cache but never share cookies, storage or a profile lock
+
+    Clones are reflinked (the copy shares the snapshot's blocks until either side writes) on filesystems that support
+    it, which makes them nearly free. Anywhere else they are plain copies, which still beats downloading everything
+    again. Snapshots are built in a directory of their own and published by renaming it into place, so parallel test
+    processes can build at the same time without a lock, the newest published snapshot is the one used
+
+    ...
+
+    Attributes
+    ----------
+    root_dir : str
+        directory snapshots and clones are kept in
+    warm_urls : list
+        urls loaded into the snapshot
+    max_age_hours : float
+        hours after which the snapshot is rebuilt, caches go stale as the site deploys new bundles
+
+    Methods
+    -------
+    current(self)
+        Path of the newest usable snapshot, None if there is none
+    ensure(self, driver_factory)
+        Path of a usable snapshot, building one if needed
+    build(self, driver_factory)
+        Build and publish a new snapshot
+    clone(self, driver_factory)
+        Make a private copy of the snapshot for one session
+    release(clone_dir)
+        Throw a session's clone away
+    """
+
+    def __init__(self, warm_urls, root_dir=DEFAULT_PROFILE_DIR, max_age_hours=24):
+        """
+        Create a ProfileSnapshot, nothing is built until a snapshot is needed
+        :param warm_urls: urls to load into the snapshot
+        :param root_dir: directory snapshots and clones are kept in
+        :param max_age_hours: hours after which the snapshot is rebuilt
+        """
+        self.warm_urls = list(warm_urls)
+        self.root_dir = root_dir
+        self.max_age_hours = max_age_hours
+        self._snapshots_dir = os.path.join(root_dir, "snapshots")
+        self._clones_dir = os.path.join(root_dir, "sessions")
+        self._reflink_supported = fcntl is not None
+
+    def current(self):
+        """
+        :return: path of the newest complete snapshot that warmed the same urls and is not too old, None if there is
+        none
+        """
+        try:
+            names = sorted(os.listdir(self._snapshots_dir), reverse=True)
+        except FileNotFoundError:
+            return None
+        for name in names:
+            path = os.path.join(self._snapshots_dir, name)
+            try:
+                with open(os.path.join(path, _MANIFEST)) as manifest_file:
+                    manifest = json.load(manifest_file)
+            except (OSError, ValueError):
+                continue
+            if manifest["warm_urls"] == self.warm_urls and \
+                    time.time() - manifest["built_at"] < self.max_age_hours * 60 * 60:
+                return os.path.join(path, "profile")
+        return None
+
+    def ensure(self, driver_factory):
+        """
+        :param driver_factory: function given a user data dir, returning a new webdriver that uses it
+        :return: path of a usable snapshot, built first if there is none
+        """
+        return self.current() or self.build(driver_factory)
+
+    def build(self, driver_factory):
+        """
+        Load the warm urls in a fresh profile, and publish the profile as the newest snapshot
+        :param driver_factory: function given a user data dir, returning a new webdriver that uses it
+        :return: path of the new snapshot
+        """
+        # sortable by age, and unique between processes building at the same time
+        name = time.strftime("%Y%m%d%H%M%S") + "-" + uuid.uuid4().hex[:8]
+        building = os.path.join(self._snapshots_dir, "." + name + ".building")
+        profile_dir = os.path.join(building, "profile")
+        os.makedirs(profile_dir)
+
+        start = time.monotonic()
+        driver = driver_factory(profile_dir)
+        try:
+            # imported here, building is the only part of this module that talks to a browser
+            from selenium.common.exceptions import TimeoutException
+            from selenium.webdriver.support.wait import WebDriverWait
+            from selenium_util.network_idle import network_tracker
+
+            tracker = network_tracker(driver)
+            for url in self.warm_urls:
+                driver.get(url)
+                try:
+                    WebDriverWait(driver, 30, 0.1).until(lambda the_driver: tracker.is_idle(1000))
+                except TimeoutException:
+                    # whatever made it into the cache is still worth having
+                    event_log.record("profile_warm_timeout", url=url)
+        finally:
+            # quit cleanly so the cache index is written out
+            driver.quit()
+
+        with open(os.path.join(building, _MANIFEST), "w") as manifest_file:
+            json.dump({"warm_urls": self.warm_urls, "built_at": time.time()}, manifest_file)
+        published = os.path.join(self._snapshots_dir, name)
+        os.rename(building, published)
+        event_log.record("profile_snapshot_built", path=published, seconds=round(time.monotonic() - start, 3))
+
+        self._prune()
+        return os.path.join(published, "profile")
+
+    def clone(self, driver_factory):
+        """
+        Make a private copy of the snapshot for one session, building the snapshot first if needed
+        :param driver_factory: function given a user data dir, returning a new webdriver that uses it
+        :return: path of the clone, pass it to the browser as its user data dir and to release when done
+        """
+        snapshot = self.ensure(driver_factory)
+        clone_dir = os.path.join(self._clones_dir, uuid.uuid4().hex)
+        start = time.monotonic()
+        shutil.copytree(snapshot, clone_dir, copy_function=self._copy_file,
+                        ignore=lambda directory, names: [name for name in names if name in _SKIPPED_FILES])
+        event_log.record("profile_cloned", reflink=self._reflink_supported,
+                         seconds=round(time.monotonic() - start, 3))
+        return clone_dir
+
+    @staticmethod
+    def release(clone_dir):
+        """
+        Throw a session's clone away, once its browser has quit
+        :param clone_dir: path returned by clone
+        """
+        shutil.rmtree(clone_dir, ignore_errors=True)
+
+    def _copy_file(self, source, destination):
+        """
+        Copy one file, reflinked if the filesystem supports it. Once a reflink fails because the filesystem cannot do
+        them, the rest of the files are copied without trying
+        :param source: file to copy
+        :param destination: where to copy it to
+        :return: destination, like shutil.copy2
+        """
+        if self._reflink_supported:
+            with open(source, "rb") as source_file, open(destination, "wb") as destination_file:
+                try:
+                    fcntl.ioctl(destination_file.fileno(), _FICLONE, source_file.fileno())
+                    shutil.copystat(source, destination)
+                    return destination
+                except OSError as e:
+                    if e.errno not in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS):
+                        raise
+                    self._reflink_supported = False
+        return shutil.copy2(source, destination)
+
+    def _prune(self):
+        """
+        Remove all but the newest snapshots, unfinished builds that were abandoned, and clones left behind by crashed
+        runs. Something still cloning from an old snapshot may fail, so a couple of old snapshots are kept
+        """
+        now = time.time()
+        names = sorted(os.listdir(self._snapshots_dir), reverse=True)
+        complete = [name for name in names if not name.startswith(".")]
+        for name in complete[_KEEP_SNAPSHOTS:]:
+            shutil.rmtree(os.path.join(self._snapshots_dir, name), ignore_errors=True)
+        for name in names:
+            path = os.path.join(self._snapshots_dir, name)
+            if name.startswith(".") and now - os.path.getmtime(path) > _ABANDONED_BUILD_SECONDS:
+                shutil.rmtree(path, ignore_errors=True)
+
+        if os.path.isdir(self._clones_dir):
+            for name in os.listdir(self._clones_dir):
+                path = os.path.join(self._clones_dir, name)
+                if now - os.path.getmtime(path) > _ABANDONED_CLONE_SECONDS:
+                    shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,98 @@
+import collections
+import json
+import os
+import re
+import threading
+import time
+
+# Default directory event logs are flushed to, at the root of the project
+DEFAULT_EVENT_LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test_output", "events")
+
+
+class EventLog(object):
+    """
+    Structured diagnostics for a test, kept in a bounded in-memory ring buffer instead of being printed. Recording an
+    event is only a deque append, no formatting and no I/O happen until the log is flushed, which the test hooks do
+    when a test fails (or when asked to with --event-log-always). Once the buffer is full the oldest events are dropped
+
+    Flushed logs are one compact JSON object per line: {"t": epoch seconds, "e": event name, ...fields}
+
+    ...
+
+    Attributes
+    ----------
+    capacity : int
+        how many of the most recent events are kept
+    test_id : str
+        id of the test the buffer currently belongs to, None outside of a test
+
+    Methods
+    -------
+    start(self, test_id)
+        Clear the buffer and start recording for a new test
+    record(self, event, **fields)
+        Record an event
+    events(self)
+        The buffered events, oldest first
+    flush(self, path=None)
+        Write the buffered events to disk as line delimited JSON
+    """
+
+    def __init__(self, capacity=2000):
+        """
+        Create an EventLog
+        :param capacity: how many of the most recent events are kept
+        """
+        self.capacity = capacity
+        self.test_id = None
+        self._buffer = collections.deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def start(self, test_id):
+        """
+        Clear the buffer and start recording for a new test
+        :param test_id: id of the test, used to name the file the log is flushed to
+        """
+        self._buffer.clear()
+        self.test_id = test_id
+
+    def record(self, event, **fields):
+        """
+        Record an event, cheap enough to call on every element action
+        :param event: short name of what happened, ex: wait_timeout
+        :param fields: anything else worth knowing, values that are not JSON types are written with str()
+        """
+        self._buffer.append((time.time(), event, fields))
+
+    def events(self):
+        """
+        :return: the buffered events as a list of (epoch seconds, event, fields) tuples, oldest first
+        """
+        return list(self._buffer)
+
+    def flush(self, path=None):
+        """
+        Write the buffered events to disk as line delimited JSON, the buffer is left as is
+        :param path: file to write to, defaults to a file named after the current test in test_output/events
+        :return: the path that was written
+        """
+        if path is None:
+            file_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", self.test_id or "no_test") + ".jsonl"
+            path = os.path.join(DEFAULT_EVENT_LOG_DIR, file_name)
+
+        lines = []
+        for timestamp, event, fields in self.events():
+            entry = {"t": round(timestamp, 4), "e": event}
+            entry.update(fields)
+            lines.append(json.dumps(entry, separators=(",", ":"), default=str))
+
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "w") as log_file:
+                log_file.write("".join(line + "\n" for line in lines))
+        return path
+
+
+# The log every page and element records to. Each test process (ex: an xdist worker) runs one test at a time, so one
+# buffer per process is one buffer per test
+event_log = EventLog()
@@ -1,11 +1,18 @@
+from selenium.common.exceptions import NoSuchElementException
 from selenium.webdriver.common.by import By
 
+from selenium_util.locator_cache import locator_cache
+
 
 class Locator(object):
     """
     Helper class for developers to quickly define ways to locate elements, and then having a common object allows
     methods to use locators in a common way
 
+    A locator can be given an ordered chain of fallback locators to try when its own strategy finds nothing (ex: after
+    a markup change on the page). When a fallback finds the element it is remembered in the locator cache, and later
+    lookups (and later runs) try it first
+
     ...
 
     Attributes
@@ -14,21 +21,59 @@ class Locator(object):
         Selenium By locator object, the method to use to find an element
     find_with : str
         A string defining what to run with the provided By
+    fallbacks : list
+        Locator objects to try, in order, when this locator's own strategy does not find anything
+    preflight : bool
+        False for elements that are only on the page after some interaction (ex: error messages), these are skipped
+        when a page checks its locators right after it loads
+    name : str
+        Qualified name of the class attribute this locator was declared as (ex: MortgageCalcPage._RATE_INPUT), None
+        for locators created inline in a method
 
     Methods
     -------
     as_args(self)
         Selenium methods use by, string parameters, so you can use this method with * for shorthand
+    strategies(self)
+        Every (by, find_with) this locator can try, in the order they should be tried
+    find_element(self, driver)
+        Find the first element using the strategy chain, raises NoSuchElementException if nothing is found
+    find_elements(self, driver)
+        Find all elements with the first strategy in the chain that finds any
+    remember_working_strategy(self, strategy)
+        Remember the strategy that found this locator's element, so it is tried first next time
     """
 
-    def __init__(self, by: By, find_with: str):
+    def __init__(self, by: By, find_with: str, fallbacks=None, preflight=True, cache=locator_cache):
         """
         Create a Locator
         :param by: Selenium By locator object, the method to use to find an element
         :param find_with: A string defining what to run with the provided By
+        :param fallbacks: optional list of Locators to try in order when this locator finds nothing
+        :param preflight: pass False if the element is not on the page until some interaction happens
+        :param cache: LocatorCache to remember working fallbacks in
         """
         self.by = by
         self.find_with = find_with
+        self.fallbacks = list(fallbacks) if fallbacks else []
+        self.preflight = preflight
+        self.name = None
+        self._cache = cache
+
+    def __set_name__(self, owner, name):
+        """
+        Called by python when a locator is declared as a class attribute, remember where it was declared so tools and
+        reports can refer to it by name
+        :param owner: the class the locator was declared on
+        :param name: the attribute name of the locator
+        """
+        self.name = owner.__name__ + "." + name
+
+    def __repr__(self):
+        return "Locator(" + str(self.by) + ", " + repr(self.find_with) + ")"
+
+    def __str__(self):
+        return self.name or repr(self)
 
     def as_args(self):
         """
@@ -36,3 +81,60 @@ class Locator(object):
         :return: by and find with attributes
         """
         return self.by, self.find_with
+
+    def strategies(self):
+        """
+        Every (by, find_with) this locator can try, the strategy that last worked first, and then in declared order
+        :return: a list of (by, find_with) tuples
+        """
+        declared = [self.as_args()] + [fallback.as_args() for fallback in self.fallbacks]
+        if not self.fallbacks:
+            return declared
+
+        preferred = self._cache.preferred_strategy(self)
+        if preferred is not None and preferred in declared:
+            declared.remove(preferred)
+            declared.insert(0, preferred)
+        return declared
+
+    def find_element(self, driver):
+        """
+        Find the first element using the strategy chain
+        :param driver: the driver (or element) to search with
+        :return: the selenium element that was found
+        """
+        # no chain, let selenium do the work (and raise its own exception)
+        if not self.fallbacks:
+            return driver.find_element(self.by, self.find_with)
+
+        elements = self.find_elements(driver)
+        if not elements:
+            raise NoSuchElementException("No strategy of locator [" + str(self) + "] found an element, "
+                                         "tried " + str(self.strategies()))
+        return elements[0]
+
+    def find_elements(self, driver):
+        """
+        Find all elements with the first strategy in the chain that finds any, remembering the strategy that worked
+        :param driver: the driver (or element) to search with
+        :return: a list of selenium elements, empty if no strategy found anything
+        """
+        if not self.fallbacks:
+            return driver.find_elements(self.by, self.find_with)
+
+        # find_elements returns right away when nothing matches, so a broken strategy costs one round trip instead of
+        # a timeout
+        for strategy in self.strategies():
+            elements = driver.find_elements(*strategy)
+            if elements:
+                self.remember_working_strategy(strategy)
+                return elements
+        return []
+
+    def remember_working_strategy(self, strategy):
+        """
+        Remember the strategy that found this locator's element, so it is tried first next time (and in later runs)
+        :param strategy: the (by, find_with) tuple that worked
+        """
+        if self.fallbacks:
+            self._cache.remember(self, strategy)
@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+
+# Default location of the cache file, at the root of the project. Can be moved with the LOCATOR_CACHE_PATH environment
+# variable (ex: to keep one cache per CI agent)
+DEFAULT_CACHE_PATH = os.environ.get(
+    "LOCATOR_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".locator_cache.json"))
+
+
+class LocatorCache(object):
+    """
+    Persistent memory of which strategy last worked for a Locator that has fallbacks. When the primary strategy of a
+    locator breaks and a fallback finds the element, the fallback is remembered here so later runs try it first instead
+    of failing through the broken strategy every time
+
+    The file is small and only written when a locator's winning strategy changes, so it is rewritten in full each time
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        path of the JSON file the cache is persisted to
+
+    Methods
+    -------
+    preferred_strategy(self, locator)
+        The strategy that last worked for this locator, or None if we have no memory of it
+    remember(self, locator, strategy)
+        Remember the strategy that just worked for this locator
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        """
+        Create a LocatorCache, the file is read the first time it is needed
+        :param path: path of the JSON file the cache is persisted to
+        """
+        self.path = path
+        self._entries = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(locator):
+        """
+        :param locator: a Locator
+        :return: the key the locator is stored under, its declared name if it has one
+        """
+        return locator.name or locator.by + ":" + locator.find_with
+
+    def _load(self):
+        """
+        Read the cache file if we have not yet, a missing or corrupt file is treated as an empty cache
+        """
+        if self._entries is None:
+            try:
+                with open(self.path) as cache_file:
+                    self._entries = json.load(cache_file)
+            except (OSError, ValueError):
+                self._entries = {}
+
+    def preferred_strategy(self, locator):
+        """
+        The strategy that last worked for this locator
+        :param locator: a Locator
+        :return: a (by, find_with) tuple, or None if the primary strategy is working (or we have never seen it)
+        """
+        with self._lock:
+            self._load()
+            entry = self._entries.get(self._key(locator))
+        return tuple(entry) if entry is not None else None
+
+    def remember(self, locator, strategy):
+        """
+        Remember the strategy that just worked for this locator, does nothing if it is already remembered
+        :param locator: a Locator
+        :param strategy: the (by, find_with) tuple that found the element
+        """
+        key = self._key(locator)
+        # the primary strategy working is the normal case, there is no need to keep an entry around for it
+        entry = None if tuple(strategy) == locator.as_args() else list(strategy)
+
+        with self._lock:
+            self._load()
+            if self._entries.get(key) == entry:
+                return
+            if entry is None:
+                del self._entries[key]
+            else:
+                self._entries[key] = entry
+
+            # write to a temp file and swap it in, so a crash (or another test process) never sees half a file
+            temp_path = self.path + "." + str(os.getpid()) + ".tmp"
+            with open(temp_path, "w") as cache_file:
+                json.dump(self._entries, cache_file, indent=2, sort_keys=True)
+            os.replace(temp_path, self.path)
+
+
+# The cache shared by every Locator, unless one is given its own
+locator_cache = LocatorCache()
@@ -0,0 +1,41 @@
+"""
+Javascript snippets that find elements inside the browser the same way selenium's By strategies do.
+
+Running a lookup inside the browser lets us resolve or time many locators in a single execute_script call, instead of
+paying a WebDriver round trip for every one of them
+"""
+
+# Defines findAll(by, value) which returns an array of the elements matching a selenium By strategy and value.
+# Prepend this to any script that needs it
+FIND_ALL_JS = """
+function findAll(by, value) {
+    var root = document;
+    switch (by) {
+        case "id":
+            return Array.prototype.slice.call(root.querySelectorAll("[id=\\"" + CSS.escape(value) + "\\"]"));
+        case "name":
+            return Array.prototype.slice.call(root.querySelectorAll("[name=\\"" + CSS.escape(value) + "\\"]"));
+        case "class name":
+            return Array.prototype.slice.call(root.getElementsByClassName(value));
+        case "tag name":
+            return Array.prototype.slice.call(root.getElementsByTagName(value));
+        case "css selector":
+            return Array.prototype.slice.call(root.querySelectorAll(value));
+        case "link text":
+        case "partial link text":
+            return Array.prototype.filter.call(root.getElementsByTagName("a"), function (a) {
+                var text = (a.innerText || "").trim();
+                return by === "link text" ? text === value : text.indexOf(value) !== -1;
+            });
+        case "xpath":
+            var snapshot = root.evaluate(value, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            var found = [];
+            for (var i = 0; i < snapshot.snapshotLength; i++) {
+                found.push(snapshot.snapshotItem(i));
+            }
+            return found;
+        default:
+            throw new Error("Unsupported locator strategy [" + by + "]");
+    }
+}
+"""
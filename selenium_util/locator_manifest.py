@@ -0,0 +1,92 @@
+from selenium.common.exceptions import NoSuchElementException
+
+from selenium_util.locator_js import FIND_ALL_JS
+
+# arguments[0] is a list with an entry per locator, each entry is that locator's list of [by, find_with] strategies.
+# Returns [match count, index of the strategy that matched] for each locator, the count is 0 if nothing matched
+_MANIFEST_JS = FIND_ALL_JS + """
+return arguments[0].map(function (strategies) {
+    for (var i = 0; i < strategies.length; i++) {
+        var count;
+        try {
+            count = findAll(strategies[i][0], strategies[i][1]).length;
+        } catch (e) {
+            count = 0;
+        }
+        if (count > 0) {
+            return [count, i];
+        }
+    }
+    return [0, -1];
+});
+"""
+
+
+class MissingLocatorError(NoSuchElementException):
+    """
+    Raised instead of waiting out a timeout, when a locator that preflight found missing from the page is needed
+    """
+
+
+class LocatorManifest(object):
+    """
+    A snapshot of which locators of a page were present, missing or ambiguous (matched more than one element) right
+    after the page loaded. All locators are checked with a single execute_script call, so building a manifest costs one
+    round trip no matter how many locators a page declares
+
+    ...
+
+    Attributes
+    ----------
+    present : list
+        names of the locators that matched exactly one element
+    missing : list
+        names of the locators that matched nothing with any of their strategies
+    ambiguous : list
+        names of the locators that matched more than one element
+    counts : dict
+        locator name to the number of elements it matched
+
+    Methods
+    -------
+    is_missing(self, locator)
+        True if this locator was checked and found missing
+    """
+
+    def __init__(self, driver, locators):
+        """
+        Check all of the given locators against the page the driver has loaded
+        :param driver: webdriver that has the page loaded
+        :param locators: dict of name to Locator to check
+        """
+        self.present = []
+        self.missing = []
+        self.ambiguous = []
+        self.counts = {}
+
+        names = sorted(locators)
+        results = driver.execute_script(_MANIFEST_JS, [[list(strategy) for strategy in locators[name].strategies()]
+                                                       for name in names])
+
+        for name, (count, strategy_index) in zip(names, results):
+            locator = locators[name]
+            self.counts[name] = count
+            if count == 0:
+                self.missing.append(name)
+                continue
+
+            # remember which strategy worked, so the first real lookup does not have to fail through broken ones
+            locator.remember_working_strategy(locator.strategies()[strategy_index])
+            if count == 1:
+                self.present.append(name)
+            else:
+                self.ambiguous.append(name)
+
+        self._missing_locators = [locators[name] for name in self.missing]
+
+    def is_missing(self, locator):
+        """
+        :param locator: a Locator
+        :return: True if this locator was checked and found missing
+        """
+        return any(locator is missing for missing in self._missing_locators)
@@ -0,0 +1,134 @@
+import json
+import re
+import threading
+import time
+import weakref
+
+from selenium.common.exceptions import WebDriverException
+
+from selenium_util.event_log import event_log
+
+# requests that never finish on their own (analytics beacons, long polling), they would keep the page from ever being
+# idle
+DEFAULT_IGNORED_URLS = re.compile(r"google-analytics|googletagmanager|doubleclick|/collect\b|/beacon|hotjar|"
+                                  r"segment\.io")
+
+# trackers already made, one per driver so events read from the driver's log are never lost between waits
+_trackers = weakref.WeakKeyDictionary()
+_trackers_lock = threading.Lock()
+
+
+def enable_network_events(options):
+    """
+    Turn on the Chrome performance log on a driver's options, the log is how DevTools Network.* events reach us
+    :param options: ChromeOptions the driver will be created with
+    :return: the same options
+    """
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+def network_tracker(driver):
+    """
+    :param driver: a webdriver
+    :return: the NetworkTracker of this driver, created the first time it is asked for
+    """
+    with _trackers_lock:
+        tracker = _trackers.get(driver)
+        if tracker is None:
+            tracker = _trackers[driver] = NetworkTracker(driver)
+        return tracker
+
+
+class NetworkTracker(object):
+    """
+    Follows the requests a page has in flight, using the DevTools Network.* events Chrome writes to its performance
+    log (see enable_network_events). A page is network idle once it has had no request in flight for a while, which is
+    a better sign that a page is ready than one element being clickable (ex: the rate input exists before the rates
+    request fills it in)
+
+    If the driver has no performance log (another browser, or the log was not enabled) supported becomes False and
+    waiting for idle returns right away, so callers fall back to whatever element wait they do afterwards
+
+    ...
+
+    Attributes
+    ----------
+    driver : webdriver
+        the driver whose requests are followed
+    ignored_urls : re.Pattern
+        requests with a matching url are not followed
+    stale_after : float
+        seconds after which a request that has not finished is no longer counted as in flight
+    supported : bool
+        False once we know the driver has no performance log
+
+    Methods
+    -------
+    poll(self)
+        Read the new events from the performance log
+    in_flight(self)
+        The urls of the requests currently in flight
+    is_idle(self, idle_ms=500)
+        True if no request has been in flight for idle_ms
+    """
+
+    def __init__(self, driver, ignored_urls=DEFAULT_IGNORED_URLS, stale_after=15):
+        """
+        Create a NetworkTracker, use network_tracker(driver) to share one tracker per driver
+        :param driver: the driver whose requests are followed
+        :param ignored_urls: requests with a matching url are not followed
+        :param stale_after: seconds after which an unfinished request no longer counts as in flight
+        """
+        self.driver = driver
+        self.ignored_urls = ignored_urls
+        self.stale_after = stale_after
+        self.supported = True
+        self._requests = {}
+        self._last_activity = time.monotonic()
+
+    def poll(self):
+        """
+        Read the new events from the performance log and update the requests in flight
+        """
+        if not self.supported:
+            return
+        try:
+            entries = self.driver.get_log("performance")
+        except WebDriverException:
+            self.supported = False
+            event_log.record("network_idle_unsupported")
+            return
+
+        for entry in entries:
+            message = json.loads(entry["message"])["message"]
+            method = message.get("method", "")
+            params = message.get("params", {})
+
+            if method == "Network.requestWillBeSent":
+                url = params.get("request", {}).get("url", "")
+                if url.startswith("data:") or self.ignored_urls.search(url):
+                    continue
+                self._requests[params["requestId"]] = (url, time.monotonic())
+                self._last_activity = time.monotonic()
+            elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+                if self._requests.pop(params.get("requestId"), None) is not None:
+                    self._last_activity = time.monotonic()
+
+    def in_flight(self):
+        """
+        :return: the urls of the requests in flight, not counting stale ones
+        """
+        now = time.monotonic()
+        return [url for url, started in self._requests.values() if now - started < self.stale_after]
+
+    def is_idle(self, idle_ms=500):
+        """
+        Read the new events and check if the network is idle, an unsupported driver is always idle
+        :param idle_ms: how long the network has to have been quiet, in milliseconds
+        :return: True if no request has been in flight for idle_ms
+        """
+        self.poll()
+        if not self.supported:
+            return True
+        return not self.in_flight() and (time.monotonic() - self._last_activity) * 1000 >= idle_ms
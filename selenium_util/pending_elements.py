@@ -0,0 +1,88 @@
+from selenium_util.event_log import event_log
+from selenium_util.locator_js import FIND_ALL_JS
+
+# arguments[0] is a list with an entry per handle, each entry is that handle's list of [by, find_with] strategies.
+# Returns [first element found, index of the strategy that found it] for each handle, [null, -1] if nothing matched
+_RESOLVE_JS = FIND_ALL_JS + """
+return arguments[0].map(function (strategies) {
+    for (var i = 0; i < strategies.length; i++) {
+        var found;
+        try {
+            found = findAll(strategies[i][0], strategies[i][1]);
+        } catch (e) {
+            found = [];
+        }
+        if (found.length > 0) {
+            return [found[0], i];
+        }
+    }
+    return [null, -1];
+});
+"""
+
+
+class PendingElements(object):
+    """
+    The element handles (WebElements) of a page that have not been resolved yet. The first handle that needs its
+    selenium element resolves every pending handle of the page with a single execute_script call, so a page method
+    that builds several handles pays one round trip instead of one per handle
+
+    Handles are resolved no earlier than the first one is used, which is never earlier than they used to be found when
+    every WebElement found its element as soon as it was built. Like its page and driver, it is only used from one
+    thread
+
+    ...
+
+    Attributes
+    ----------
+    driver : webdriver
+        webdriver of the page the handles belong to
+    manifest : LocatorManifest
+        the page's preflight manifest (see locator_manifest.py), so its handles can fail fast on a locator that was
+        missing when the page loaded. None until the page runs preflight
+
+    Methods
+    -------
+    add(self, handle)
+        Add a handle to be resolved with the next batch
+    resolve(self)
+        Resolve every pending handle with one execute_script call
+    """
+
+    def __init__(self, driver):
+        """
+        Create an empty PendingElements
+        :param driver: webdriver of the page the handles belong to
+        """
+        self.driver = driver
+        self.manifest = None
+        self._handles = []
+
+    def add(self, handle):
+        """
+        Add a handle to be resolved with the next batch
+        :param handle: an unresolved WebElement
+        """
+        self._handles.append(handle)
+
+    def resolve(self):
+        """
+        Resolve every pending handle with one execute_script call. Handles nothing was found for stay unresolved, and
+        find their element on their own (raising selenium's NoSuchElementException) when they are used
+        """
+        handles = [handle for handle in self._handles if not handle.is_resolved()]
+        self._handles = []
+        # a lone handle finds its own element, with selenium's find_element, for the same single round trip
+        if len(handles) < 2:
+            return
+
+        strategies = [handle.locator.strategies() for handle in handles]
+        results = self.driver.execute_script(_RESOLVE_JS, [[list(strategy) for strategy in handle_strategies]
+                                                           for handle_strategies in strategies])
+        found = 0
+        for handle, handle_strategies, (element, strategy_index) in zip(handles, strategies, results):
+            if element is not None:
+                handle.locator.remember_working_strategy(handle_strategies[strategy_index])
+                handle.set_element(element)
+                found += 1
+        event_log.record("resolve_batch", handles=len(handles), found=found)
@@ -0,0 +1,239 @@
+import http
+import json
+import os
+
+# Patches fetch and XMLHttpRequest in the page so requests matching a stub are answered locally. %s is replaced with
+# the JSON list of stubs. Hits are counted per stub pattern in window.__requestStubHits
+_STUB_JS = """
+(function (stubs) {
+    window.__requestStubHits = {};
+
+    function findStub(url, method) {
+        var absolute = new URL(url, location.href).href;
+        for (var i = 0; i < stubs.length; i++) {
+            var stub = stubs[i];
+            if ((!stub.method || stub.method === method.toUpperCase()) && new RegExp(stub.pattern).test(absolute)) {
+                window.__requestStubHits[stub.pattern] = (window.__requestStubHits[stub.pattern] || 0) + 1;
+                return stub;
+            }
+        }
+        return null;
+    }
+
+    var originalFetch = window.fetch;
+    window.fetch = function (input, init) {
+        var url = typeof input === "string" ? input : (input && input.url) || String(input);
+        var method = (init && init.method) || (input && input.method) || "GET";
+        var stub = findStub(url, method);
+        if (!stub) {
+            return originalFetch.apply(this, arguments);
+        }
+        return new Promise(function (resolve) {
+            setTimeout(function () {
+                resolve(new Response(stub.body, {status: stub.status, statusText: stub.status_text,
+                                                 headers: stub.headers}));
+            }, stub.latency_ms);
+        });
+    };
+
+    // properties a stubbed response sets on the xhr itself, over the ones XMLHttpRequest.prototype has. They are
+    // configurable so a reused xhr can be answered again, and are removed when it is opened again
+    var responseProperties = ["readyState", "status", "statusText", "responseURL", "responseText", "response"];
+
+    var originalOpen = XMLHttpRequest.prototype.open;
+    var originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.open = function (method, url) {
+        var xhr = this;
+        responseProperties.forEach(function (name) {
+            delete xhr[name];
+        });
+        this.__stubRequest = {method: method, url: url};
+        return originalOpen.apply(this, arguments);
+    };
+    XMLHttpRequest.prototype.send = function () {
+        var request = this.__stubRequest;
+        var stub = request ? findStub(request.url, request.method) : null;
+        if (!stub) {
+            return originalSend.apply(this, arguments);
+        }
+        var xhr = this;
+        var headerText = Object.keys(stub.headers).map(function (name) {
+            return name + ": " + stub.headers[name];
+        }).join("\\r\\n");
+        setTimeout(function () {
+            var values = [4, stub.status, stub.status_text, new URL(request.url, location.href).href, stub.body,
+                          xhr.responseType === "json" ? JSON.parse(stub.body) : stub.body];
+            responseProperties.forEach(function (name, index) {
+                Object.defineProperty(xhr, name, {value: values[index], configurable: true});
+            });
+            xhr.getResponseHeader = function (name) {
+                var found = Object.keys(stub.headers).filter(function (header) {
+                    return header.toLowerCase() === name.toLowerCase();
+                });
+                return found.length ? stub.headers[found[0]] : null;
+            };
+            xhr.getAllResponseHeaders = function () {
+                return headerText;
+            };
+            ["readystatechange", "load", "loadend"].forEach(function (type) {
+                xhr.dispatchEvent(new ProgressEvent(type));
+            });
+        }, stub.latency_ms);
+    };
+})(%s);
+"""
+
+
+class RequestStub(object):
+    """
+    A canned response for the requests whose url matches a pattern
+
+    ...
+
+    Attributes
+    ----------
+    url_pattern : str
+        regular expression (javascript flavour) searched for in the absolute url of each request
+    body : str
+        body of the response
+    status : int
+        HTTP status of the response
+    status_text : str
+        HTTP reason phrase of the response, ex: Not Found
+    headers : dict
+        headers of the response
+    latency_ms : int
+        how long the response takes to arrive, to simulate a slow backend
+    method : str
+        only stub requests with this HTTP method, None for any method
+
+    Methods
+    -------
+    from_fixture(url_pattern, fixture_path, **kwargs)
+        Create a stub answering with the contents of a fixture file
+    to_dict(self)
+        Return the stub as the JSON serializable dict the page script uses
+    """
+
+    def __init__(self, url_pattern, body, status=200, headers=None, latency_ms=0, method=None, status_text=None):
+        """
+        Create a RequestStub
+        :param url_pattern: regular expression searched for in the absolute url of each request
+        :param body: body of the response, dicts and lists are sent as JSON
+        :param status: HTTP status of the response
+        :param headers: headers of the response, defaults to a JSON content type
+        :param latency_ms: how long the response takes to arrive
+        :param method: only stub requests with this HTTP method, None for any method
+        :param status_text: HTTP reason phrase of the response, defaults to the standard one for the status
+        """
+        self.url_pattern = url_pattern
+        self.body = body if isinstance(body, str) else json.dumps(body)
+        self.status = status
+        self.headers = headers if headers is not None else {"Content-Type": "application/json"}
+        self.latency_ms = latency_ms
+        self.method = method.upper() if method else None
+        if status_text is None:
+            try:
+                status_text = http.HTTPStatus(status).phrase
+            except ValueError:
+                # not a status python knows, ex: a made up 599
+                status_text = ""
+        self.status_text = status_text
+
+    @classmethod
+    def from_fixture(cls, url_pattern, fixture_path, **kwargs):
+        """
+        Create a stub answering with the contents of a fixture file
+        :param url_pattern: regular expression searched for in the absolute url of each request
+        :param fixture_path: path of the file to use as the response body
+        :param kwargs: any other RequestStub parameter
+        :return: a new RequestStub
+        """
+        with open(fixture_path) as fixture:
+            return cls(url_pattern, fixture.read(), **kwargs)
+
+    def to_dict(self):
+        """
+        :return: the stub as the JSON serializable dict the page script uses
+        """
+        return {"pattern": self.url_pattern, "body": self.body, "status": self.status, "status_text": self.status_text,
+                "headers": self.headers, "latency_ms": self.latency_ms, "method": self.method}
+
+
+class StubbedBackend(object):
+    """
+    Answers a page's requests from local RequestStubs instead of the real backend.
+
+    The stubs are installed with the DevTools Page.addScriptToEvaluateOnNewDocument command, which runs a script that
+    patches fetch and XMLHttpRequest before any of the page's own scripts. Stubbed requests never leave the browser, so
+    they also do not count towards network idle (see network_idle.py). Only Chromium based drivers support this, and
+    stubs must be installed before navigating to the page
+
+    ...
+
+    Attributes
+    ----------
+    stubs : list
+        the RequestStubs to answer with, the first matching stub wins
+
+    Methods
+    -------
+    install(self, driver)
+        Install the stubs for every page the driver loads from now on
+    uninstall(self, driver)
+        Stop installing the stubs on new pages
+    hits(driver)
+        How many requests each stub pattern answered on the current page
+    """
+
+    def __init__(self, stubs):
+        """
+        Create a StubbedBackend
+        :param stubs: the RequestStubs to answer with, the first matching stub wins
+        """
+        self.stubs = list(stubs)
+        self._script_ids = {}
+
+    def install(self, driver):
+        """
+        Install the stubs for every page the driver loads from now on
+        :param driver: a Chromium based webdriver
+        """
+        source = _STUB_JS % json.dumps([stub.to_dict() for stub in self.stubs])
+        result = driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": source})
+        self._script_ids[id(driver)] = result["identifier"]
+
+    def uninstall(self, driver):
+        """
+        Stop installing the stubs on new pages, pages already loaded keep them
+        :param driver: a webdriver the stubs were installed on
+        """
+        script_id = self._script_ids.pop(id(driver), None)
+        if script_id is not None:
+            driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": script_id})
+
+    @staticmethod
+    def hits(driver):
+        """
+        :param driver: a webdriver with a stubbed page loaded
+        :return: dict of stub pattern to how many requests it answered on the current page
+        """
+        return driver.execute_script("return window.__requestStubHits || {};")
+
+
+# Fixture responses, kept next to the tests
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test_cases", "fixtures")
+
+# The current rate the stubbed rates backend answers with, see test_cases/fixtures/current_rates.json
+STUBBED_RATE = "6.5"
+
+
+def rates_backend(latency_ms=0):
+    """
+    A StubbedBackend answering the calculator's current rates requests with a fixed rate (STUBBED_RATE)
+    :param latency_ms: how long each rates response takes to arrive
+    :return: a new StubbedBackend
+    """
+    return StubbedBackend([RequestStub.from_fixture(r"mortgageapi\.zillow\.com/.*[Rr]ates",
+                                                    os.path.join(FIXTURES_DIR, "current_rates.json"),
+                                                    latency_ms=latency_ms)])
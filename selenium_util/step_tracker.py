@@ -0,0 +1,138 @@
+import contextlib
+import threading
+import time
+
+
+class StepRecord(object):
+    """
+    One call of a page object method (a "step" of a test), and the locators it used
+
+    ...
+
+    Attributes
+    ----------
+    page : str
+        name of the page class, ex: MortgageCalcPage
+    method : str
+        name of the page method that was called
+    locators : list
+        names of the locators used while the step ran, including the ones used by steps it called
+    started : float
+        epoch seconds the step started at
+    duration : float
+        how many seconds the step took
+    outcome : str
+        passed, or failed if the step raised
+    depth : int
+        0 for a step called by a test, 1 for a step called by that step, and so on
+    """
+
+    __slots__ = ("page", "method", "locators", "started", "duration", "outcome", "depth")
+
+    def __init__(self, page, method, depth):
+        """
+        Create a StepRecord for a step that is starting now
+        :param page: name of the page class
+        :param method: name of the page method
+        :param depth: how many steps deep this step is
+        """
+        self.page = page
+        self.method = method
+        self.locators = []
+        self.started = time.time()
+        self.duration = None
+        self.outcome = None
+        self.depth = depth
+
+
+class StepTracker(object):
+    """
+    Keeps track of which page method is running on each thread, and tells listeners about every finished step.
+    Page wraps the methods of its subclasses with step(), and WebElement reports the locators it uses with touch()
+
+    With no listeners registered a step costs a couple of attribute lookups
+
+    ...
+
+    Methods
+    -------
+    add_listener(self, listener)
+        Call listener(StepRecord) every time a step finishes
+    remove_listener(self, listener)
+        Stop calling a listener
+    step(self, page, method)
+        Context manager that records a step while its block runs
+    touch(self, locator)
+        Record that the running step used a locator
+    """
+
+    def __init__(self):
+        """
+        Create a StepTracker
+        """
+        self._listeners = []
+        self._local = threading.local()
+
+    def add_listener(self, listener):
+        """
+        :param listener: callable given a StepRecord every time a step finishes, on the thread that ran the step
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """
+        :param listener: a listener that was added with add_listener
+        """
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _stack(self):
+        """
+        :return: the steps that are running on this thread, innermost last
+        """
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextlib.contextmanager
+    def step(self, page, method):
+        """
+        Record a step while the with block runs
+        :param page: name of the page class
+        :param method: name of the page method
+        """
+        if not self._listeners:
+            yield
+            return
+
+        stack = self._stack()
+        record = StepRecord(page, method, len(stack))
+        stack.append(record)
+        start = time.perf_counter()
+        record.outcome = "failed"
+        try:
+            yield
+            record.outcome = "passed"
+        finally:
+            record.duration = time.perf_counter() - start
+            stack.pop()
+            if stack:
+                stack[-1].locators.extend(name for name in record.locators if name not in stack[-1].locators)
+            for listener in list(self._listeners):
+                listener(record)
+
+    def touch(self, locator):
+        """
+        Record that the running step (if there is one) used a locator
+        :param locator: the Locator that was used
+        """
+        stack = getattr(self._local, "stack", None)
+        if stack:
+            name = str(locator)
+            if name not in stack[-1].locators:
+                stack[-1].locators.append(name)
+
+
+# The tracker Page and WebElement report to
+step_tracker = StepTracker()
@@ -0,0 +1,248 @@
+import atexit
+import json
+import math
+import os
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.wait import WebDriverWait
+
+from selenium_util.event_log import event_log
+
+# Default location of the wait history, at the root of the project. Can be moved with the WAIT_HISTORY_PATH environment
+# variable
+DEFAULT_HISTORY_PATH = os.environ.get(
+    "WAIT_HISTORY_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".wait_history.json"))
+
+
+def wait_key(locator, condition):
+    """
+    Build the key a wait is recorded under
+    :param locator: the Locator being waited on, its declared name includes the page it belongs to
+    :param condition: short name of what is being waited for, ex: clickable
+    :return: a string key
+    """
+    if locator is None:
+        locator_name = "unknown"
+    elif locator.name is not None:
+        locator_name = locator.name
+    else:
+        locator_name = "inline:" + locator.by + ":" + locator.find_with
+    return locator_name + "|" + condition
+
+
+class WaitPolicy(object):
+    """
+    Decides how long each wait is allowed to take, based on how long that same wait took in previous runs.
+
+    Every wait is recorded under a (page, locator, condition) key. Once a key has enough history its timeout becomes
+    a high percentile of that history times a safety margin, so a wait that normally takes half a second fails after a
+    couple of seconds instead of the default timeout. Timeouts are never longer than the default
+
+    A wait that times out is not a sample, how long it would have taken is not known. Timeouts are counted on their own
+    instead, and a key that timed out reset_after times in a row goes back to the default timeout until it succeeds
+    again, so a wait that was cut off too early is not cut off at the same learned timeout run after run
+
+    History is kept in memory and merged into the history file when the process exits
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        path of the JSON file the history is persisted to
+    default_timeout : float
+        timeout used when there is not enough history, and the upper bound of every timeout
+    percentile : float
+        which percentile of the history to base the timeout on, 0-100
+    margin : float
+        multiplier applied to the percentile
+    floor : float
+        the shortest timeout that will ever be used, in seconds
+    min_samples : int
+        how many samples a key needs before its timeout is adapted
+    max_history : int
+        how many of the most recent samples are kept per key
+    reset_after : int
+        how many timeouts in a row send a key back to the default timeout
+    enabled : bool
+        False to always use the default timeout (history is still recorded)
+
+    Methods
+    -------
+    timeout_for(self, key)
+        The timeout to use for a wait
+    record(self, key, seconds)
+        Record how long a wait took
+    record_timeout(self, key)
+        Record that a wait timed out
+    wait(self, driver, key, condition, timeout_in_seconds=None, poll_frequency=0.5)
+        Wait for a condition with the adaptive timeout, and record how long it took
+    save(self)
+        Merge the history recorded by this process into the history file
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH, default_timeout=10, percentile=99, margin=1.5, floor=2,
+                 min_samples=5, max_history=200, reset_after=1, enabled=True):
+        """
+        Create a WaitPolicy, history is read the first time it is needed
+        :param path: path of the JSON file the history is persisted to
+        :param default_timeout: timeout used without enough history, and the upper bound of every timeout
+        :param percentile: which percentile of the history to base the timeout on, 0-100
+        :param margin: multiplier applied to the percentile
+        :param floor: the shortest timeout that will ever be used, in seconds
+        :param min_samples: how many samples a key needs before its timeout is adapted
+        :param max_history: how many of the most recent samples are kept per key
+        :param reset_after: how many timeouts in a row send a key back to the default timeout
+        :param enabled: False to always use the default timeout
+        """
+        self.path = path
+        self.default_timeout = default_timeout
+        self.percentile = percentile
+        self.margin = margin
+        self.floor = floor
+        self.min_samples = min_samples
+        self.max_history = max_history
+        self.reset_after = reset_after
+        self.enabled = enabled
+        self._history = None
+        self._timeouts = None
+        self._new_samples = {}
+        # key to the timeouts in a row this process recorded, and whether a success came before them
+        self._new_timeouts = {}
+        self._lock = threading.Lock()
+        self._save_registered = False
+
+    def _load(self):
+        """
+        Read the history file if we have not yet, a missing or corrupt file is treated as no history
+        """
+        if self._history is None:
+            self._history, self._timeouts = self._read_file()
+
+    def _read_file(self):
+        """
+        :return: (the samples stored in the history file, a dict of key to a list of seconds, and a dict of key to the
+        timeouts in a row it has had)
+        """
+        try:
+            with open(self.path) as history_file:
+                stored = json.load(history_file)
+        except (OSError, ValueError):
+            return {}, {}
+        # history files written before timeouts were counted are just the samples
+        if "samples" not in stored:
+            return stored, {}
+        return stored["samples"], stored.get("timeouts", {})
+
+    def timeout_for(self, key):
+        """
+        The timeout to use for a wait
+        :param key: key of the wait, see wait_key
+        :return: timeout in seconds
+        """
+        if not self.enabled:
+            return self.default_timeout
+
+        with self._lock:
+            self._load()
+            samples = sorted(self._history.get(key, []))
+            timeouts = self._timeouts.get(key, 0)
+
+        if len(samples) < self.min_samples or timeouts >= self.reset_after:
+            return self.default_timeout
+
+        # nearest rank percentile
+        rank = max(int(math.ceil(self.percentile / 100 * len(samples))) - 1, 0)
+        return min(self.default_timeout, max(self.floor, samples[rank] * self.margin))
+
+    def record(self, key, seconds):
+        """
+        Record how long a wait took
+        :param key: key of the wait, see wait_key
+        :param seconds: how long the wait took before its condition was met
+        """
+        with self._lock:
+            self._load()
+            self._history.setdefault(key, []).append(seconds)
+            self._history[key] = self._history[key][-self.max_history:]
+            self._new_samples.setdefault(key, []).append(seconds)
+            # a success ends a run of timeouts
+            self._timeouts.pop(key, None)
+            self._new_timeouts[key] = (0, True)
+            self._register_save()
+
+    def record_timeout(self, key):
+        """
+        Record that a wait timed out
+        :param key: key of the wait, see wait_key
+        """
+        with self._lock:
+            self._load()
+            self._timeouts[key] = self._timeouts.get(key, 0) + 1
+            count, succeeded = self._new_timeouts.get(key, (0, False))
+            self._new_timeouts[key] = (count + 1, succeeded)
+            self._register_save()
+
+    def _register_save(self):
+        """
+        Save the history when the process exits, once something has been recorded. Called with the lock held
+        """
+        if not self._save_registered:
+            atexit.register(self.save)
+            self._save_registered = True
+
+    def wait(self, driver, key, condition, timeout_in_seconds=None, poll_frequency=0.5):
+        """
+        Wait for a condition using the adaptive timeout (unless one is given), and record how long it took
+        :param driver: webdriver to wait with
+        :param key: key of the wait, see wait_key
+        :param condition: callable given the driver, the wait ends when it returns something truthy
+        :param timeout_in_seconds: pass a value to override the adaptive timeout
+        :param poll_frequency: seconds between checks of the condition
+        :return: whatever the condition returned
+        """
+        timeout = self.timeout_for(key) if timeout_in_seconds is None else timeout_in_seconds
+        start = time.monotonic()
+        try:
+            result = WebDriverWait(driver, timeout, poll_frequency).until(condition)
+        except TimeoutException:
+            self.record_timeout(key)
+            event_log.record("wait_timeout", key=key, timeout=timeout)
+            raise TimeoutException("Waited " + "{:.1f}".format(timeout) + " seconds for [" + key + "]")
+        elapsed = time.monotonic() - start
+        self.record(key, elapsed)
+        event_log.record("wait", key=key, seconds=round(elapsed, 3), timeout=timeout)
+        return result
+
+    def save(self):
+        """
+        Merge the history recorded by this process into the history file. The file is re-read first so that other
+        test processes writing to the same file are not overwritten (a sample can be lost if two processes save at the
+        exact same time, which only makes the history a little shorter)
+        """
+        with self._lock:
+            if not self._new_samples and not self._new_timeouts:
+                return
+            merged, timeouts = self._read_file()
+            for key, samples in self._new_samples.items():
+                merged[key] = (merged.get(key, []) + samples)[-self.max_history:]
+            for key, (count, succeeded) in self._new_timeouts.items():
+                # after a success here only the timeouts since then are in a row, without one they add to the file's
+                count = count if succeeded else timeouts.get(key, 0) + count
+                if count:
+                    timeouts[key] = count
+                else:
+                    timeouts.pop(key, None)
+            self._new_samples = {}
+            self._new_timeouts = {}
+
+            temp_path = self.path + "." + str(os.getpid()) + ".tmp"
+            with open(temp_path, "w") as history_file:
+                json.dump({"samples": merged, "timeouts": timeouts}, history_file, sort_keys=True)
+            os.replace(temp_path, self.path)
+
+
+# The policy used by every wait in WebElement and Page
+wait_policy = WaitPolicy()
@@ -14,7 +14,7 @@ class WebCheckbox(WebElement):
     locator : Locator
         Locator object that defines how to find this element
     element : element
-        Selenium element object for the element that was found
+        Selenium element object for the element, found the first time it is needed
 
     Methods
     -------
@@ -22,15 +22,18 @@ class WebCheckbox(WebElement):
         Check or uncheck this checkbox
     """
 
-    def __init__(self, driver, locator, element=None):
+    __slots__ = ()
+
+    def __init__(self, driver, locator, element=None, pending=None):
         """
         Create a web checkbox
         :param driver: web driver that will be used to interact with this element
         :param locator: how to find this element in the DOM
         :param element: If you have already found a selenium element object for this web element, specify it to prevent
         searching for it again
+        :param pending: the PendingElements of the page this handle belongs to, see WebElement
         """
-        super().__init__(driver, locator, element)
+        super().__init__(driver, locator, element, pending)
 
     def check(self, check):
         """
@@ -1,8 +1,12 @@
 from selenium.webdriver import Keys
-from selenium.webdriver.support.wait import WebDriverWait
 from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.support import expected_conditions
 
+from selenium_util.event_log import event_log
+from selenium_util.locator_manifest import MissingLocatorError
+from selenium_util.step_tracker import step_tracker
+from selenium_util.wait_policy import wait_key, wait_policy
+
 
 class WebElement(object):
     """
@@ -18,10 +22,16 @@ class WebElement(object):
     locator : Locator
         Locator object that defines how to find this element
     element : element
-        Selenium element object for the element that was found
+        Selenium element object for the element, found the first time it is needed
 
     Methods
     -------
+    fail_if_missing
+        Raise MissingLocatorError if preflight found this handle's locator missing from its page
+    is_resolved
+        True once the selenium element has been found
+    set_element
+        Give this handle the selenium element it stands for
     get_underling_web_element_obj
         Return the selenium element for direct use
     click
@@ -32,6 +42,8 @@ class WebElement(object):
         Clear the text from this element and then enter new text
     get_value
         Get the value attribute from this element
+    get_screenshot_as_png
+        Take a screenshot of just this element
     wait_for_element_to_have_text
         Wait for an element's text value to exactly match your desired value, useful to prevent race conditions
         around asserting too quickly
@@ -42,22 +54,74 @@ class WebElement(object):
         Wait for the element to be clickable (uses Selenium's expected conditions)
     wait_for_element_to_be_stale
         Wait for the element to be stale, aka no longer in to DOM (uses Selenium's expected conditions)
+
+    Every wait defaults to the timeout the wait policy has learned for it (see wait_policy.py), pass timeout_in_seconds
+    to override it
+
+    A WebElement is a lazy handle, the element is not looked for until the first action or read needs it. Handles
+    created with pending (see pending_elements.py) are resolved together with every other pending handle of their page
+    in one round trip. A missing element raises selenium's NoSuchElementException on that first use. Pages can expose
+    hundreds of handles, so they use __slots__ to stay small
     """
 
-    def __init__(self, driver, locator, element=None):
+    __slots__ = ("driver", "locator", "_element", "_pending")
+
+    def __init__(self, driver, locator, element=None, pending=None):
         """
         Create a WebElement object
         :param driver: the driver to use to find, and interact with this element
         :param locator: Locator object detailing how to find this element in the DOM
         :param element: If you have already found this element with a driver, pass it in to wrap it with this class. If
         you have already located it, be sure to use this parameter to not waste resources re-locating it
+        :param pending: the PendingElements of the page this handle belongs to, to be resolved in a batch with the
+        page's other handles. Without it the handle finds its element on its own
         """
         self.driver = driver
+        self.locator = locator
+        self._element = element
+        self._pending = None
+        step_tracker.touch(locator)
+
+        if element is None and pending is not None:
+            self._pending = pending
+            pending.add(self)
+
+    @property
+    def element(self):
+        """
+        :return: the selenium element, found the first time it is needed
+        """
+        if self._element is None:
+            if self._pending is not None:
+                # once this handle has been in a batch this costs nothing, it is no longer pending
+                self._pending.resolve()
+            if self._element is None:
+                self._element = self.locator.find_element(self.driver)
+        return self._element
+
+    def fail_if_missing(self):
+        """
+        Raise MissingLocatorError if this handle has not found its element and its page's preflight found its locator
+        missing, so waiting on it does not waste the whole timeout. Handles built without a page, and locators that
+        were not checked by preflight, are never failed fast
+        """
+        manifest = self._pending.manifest if self._pending is not None else None
+        if self._element is None and manifest is not None and manifest.is_missing(self.locator):
+            raise MissingLocatorError("Locator [" + str(self.locator) + "] was missing when the page loaded, not "
+                                      "waiting for it")
+
+    def is_resolved(self):
+        """
+        :return: True once the selenium element has been found
+        """
+        return self._element is not None
 
-        if element is None:
-            self.element = self.driver.find_element(locator.by, locator.find_with)
-        else:
-            self.element = element
+    def set_element(self, element):
+        """
+        Give this handle the selenium element it stands for, used when handles are resolved in a batch
+        :param element: the selenium element
+        """
+        self._element = element
 
     def get_underling_web_element_obj(self):
         """
@@ -70,6 +134,7 @@ class WebElement(object):
         """
         Click on this element
         """
+        event_log.record("click", locator=self.locator)
         self.element.click()
 
     def get_text(self) -> str:
@@ -86,6 +151,8 @@ class WebElement(object):
         :param press_enter: after we are done entering text, do you want this method to press enter? This can trigger
         events on the web page, similar to clicking on something else (but pressing enter is more efficient)
         """
+        event_log.record("set_text", locator=self.locator, text=text, press_enter=press_enter)
+
         # Selenium's element.clear() was not working on some of the elements on Zillows page, this is a common
         # problem that is solved by doing ctrl a delete yourself
         self.element.send_keys(Keys.CONTROL + "a")
@@ -102,46 +169,75 @@ class WebElement(object):
         """
         return self.element.get_attribute("value")
 
-    def wait_for_element_to_have_text(self, desired_text: str, timeout_in_seconds=10):
+    def get_screenshot_as_png(self) -> bytes:
+        """
+        Take a screenshot of just this element, scrolled into view
+        :return: the screenshot as PNG bytes
+        """
+        return self.element.screenshot_as_png
+
+    def wait_for_element_to_have_text(self, desired_text, timeout_in_seconds=None):
         """
         Wait for an element's text value to exactly match your desired value, useful to prevent
         race conditions around asserting too quickly
-        :param desired_text: string that you want this elements text to be
-        :param timeout_in_seconds: how long you are willing to wait for this element to have your desired text
+        :param desired_text: string that you want this elements text to be, or a list of strings any of which will do
+        :param timeout_in_seconds: how long you are willing to wait for this element to have your desired text,
+        defaults to the timeout learned by the wait policy
         """
+        self.fail_if_missing()
+        desired_texts = [desired_text] if isinstance(desired_text, str) else list(desired_text)
+        # the last text the wait saw, so a failed wait can be logged without asking the browser again
+        seen = {}
+
+        def has_text(the_driver):
+            seen["actual"] = self.get_text()
+            return seen["actual"] in desired_texts
+
         try:
-            WebDriverWait(self.driver, timeout_in_seconds).until(lambda the_driver: self.get_text() == desired_text)
-        except TimeoutException:
-            print("ELEMENT FAILED TO HAVE TEXT VALUE [" + str(desired_text) + "] within 10 seconds")
+            wait_policy.wait(self.driver, wait_key(self.locator, "text"), has_text, timeout_in_seconds)
+        except TimeoutException as e:
+            event_log.record("wait_failed", locator=self.locator, condition="text", desired=desired_text,
+                             actual=seen.get("actual"), reason=e.msg)
 
-    def wait_for_element_to_have_value(self, desired_value, compare_as_floats=False, timeout_in_seconds=10):
+    def wait_for_element_to_have_value(self, desired_value, compare_as_floats=False, timeout_in_seconds=None):
         """
         Wait for an element's value attribute to exactly match your desired value, useful to prevent
         race conditions around asserting too quickly
         :param compare_as_floats: Pass True to compare equality AFTER casting both actual and expected to floats
         :param desired_value: string that you want this elements value attribute to be
-        :param timeout_in_seconds: how long you are willing to wait for this element to have your desired value
+        :param timeout_in_seconds: how long you are willing to wait for this element to have your desired value,
+        defaults to the timeout learned by the wait policy
         """
-        try:
+        self.fail_if_missing()
+        # the last value the wait saw, so a failed wait can be logged without asking the browser again
+        seen = {}
+
+        def has_value(the_driver):
+            seen["actual"] = self.get_value()
             if compare_as_floats:
-                WebDriverWait(self.driver, timeout_in_seconds).until(
-                    lambda the_driver: float(self.get_value()) == float(desired_value))
-            else:
-                WebDriverWait(self.driver, timeout_in_seconds).until(
-                    lambda the_driver: self.get_value() == desired_value)
-        except TimeoutException:
-            print("ELEMENT FAILED TO HAVE VALUE [" + str(desired_value) + "] within 10 seconds")
+                return float(seen["actual"]) == float(desired_value)
+            return seen["actual"] == desired_value
+
+        try:
+            wait_policy.wait(self.driver, wait_key(self.locator, "value"), has_value, timeout_in_seconds)
+        except TimeoutException as e:
+            event_log.record("wait_failed", locator=self.locator, condition="value", desired=desired_value,
+                             actual=seen.get("actual"), reason=e.msg)
 
-    def wait_for_element_to_be_clickable(self, timeout_in_seconds=10):
+    def wait_for_element_to_be_clickable(self, timeout_in_seconds=None):
         """
         Wait for the element to be clickable (uses Selenium's expected conditions)
-        :param timeout_in_seconds: how long you are willing to wait
+        :param timeout_in_seconds: how long you are willing to wait, defaults to the timeout learned by the wait policy
         """
-        WebDriverWait(self.driver, timeout_in_seconds).until(expected_conditions.element_to_be_clickable(self.element))
+        self.fail_if_missing()
+        wait_policy.wait(self.driver, wait_key(self.locator, "clickable"),
+                         expected_conditions.element_to_be_clickable(self.element), timeout_in_seconds)
 
-    def wait_for_element_to_be_stale(self, timeout_in_seconds=10):
+    def wait_for_element_to_be_stale(self, timeout_in_seconds=None):
         """
         Wait for the element to be stale, aka no longer in to DOM (uses Selenium's expected conditions)
-        :param timeout_in_seconds: how long you are willing to wait
+        :param timeout_in_seconds: how long you are willing to wait, defaults to the timeout learned by the wait policy
         """
-        WebDriverWait(self.driver, timeout_in_seconds).until(expected_conditions.staleness_of(self.element))
+        self.fail_if_missing()
+        wait_policy.wait(self.driver, wait_key(self.locator, "stale"),
+                         expected_conditions.staleness_of(self.element), timeout_in_seconds)
@@ -16,9 +16,10 @@ class WebSelect(WebElement):
     locator : Locator
         Locator object that defines how to find this element
     element : element
-        Selenium element object for the element that was found
+        Selenium element object for the element, found the first time it is needed
     select : Select
-        Selenium Select object for this web element, giving us extended functionality
+        Selenium Select object for this web element, giving us extended functionality, created the first time it is
+        needed
 
     Methods
     -------
@@ -28,16 +29,29 @@ class WebSelect(WebElement):
         Return the selected <option>'s value attribute
     """
 
-    def __init__(self, driver, locator, element=None):
+    __slots__ = ("_select",)
+
+    def __init__(self, driver, locator, element=None, pending=None):
         """
         Create a web select
         :param driver: web driver that will be used to interact with this element
         :param locator: how to find this element in the DOM
         :param element: If you have already found a selenium element object for this web element, specify it to prevent
         searching for it again
+        :param pending: the PendingElements of the page this handle belongs to, see WebElement
+        """
+        super().__init__(driver, locator, element, pending)
+        self._select = None
+
+    @property
+    def select(self):
+        """
+        :return: the selenium Select for this element, Select checks the element's tag so it costs a round trip and is
+        only made when needed
         """
-        super().__init__(driver, locator, element)
-        self.select = Select(self.element)
+        if self._select is None:
+            self._select = Select(self.element)
+        return self._select
 
     def select_by_value(self, value: str):
         """
@@ -0,0 +1,159 @@
+"""
+Stand in for a webdriver, for unit tests and benchmarks that need no browser. The fake_driver fixture in conftest.py
+hands it to tests
+"""
+
+import json
+import os
+
+from selenium.common.exceptions import NoSuchElementException, WebDriverException
+
+from selenium_util.locator_manifest import _MANIFEST_JS
+from selenium_util.pending_elements import _RESOLVE_JS
+
+
+class FakeElement(object):
+    """
+    Stand in for a selenium element
+
+    ...
+
+    Attributes
+    ----------
+    find_with : str
+        the selector that found this element
+    text : str
+        text of the element
+    attributes : dict
+        html attributes of the element, ex: value
+    """
+
+    def __init__(self, find_with, text="", **attributes):
+        """
+        Create a FakeElement, see the class attributes
+        """
+        self.find_with = find_with
+        self.text = text
+        self.attributes = attributes
+
+    def get_attribute(self, name):
+        """
+        :param name: name of an html attribute
+        :return: its value, None if the element does not have it
+        """
+        return self.attributes.get(name)
+
+    def __repr__(self):
+        return "FakeElement(" + self.find_with + ")"
+
+
+class FakeDriver(object):
+    """
+    Stand in for a webdriver. Knows which (by, find_with) pairs exist on the "page" and records every call made to it.
+    execute_script answers the batch scripts of pending_elements.py and locator_manifest.py from the page, any other
+    script is answered by a function given in scripts
+
+    ...
+
+    Attributes
+    ----------
+    present : list
+        (by, find_with) pairs that exist on the page, None if every locator finds something
+    matches : int
+        how many elements a locator that exists finds
+    elements : dict
+        find_with to the FakeElements found with it, made the first time they are found
+    calls : list
+        names of the methods called, in order
+    lookups : list
+        (by, find_with) pairs looked up with find_element and find_elements, in order
+    scripts : dict
+        script to the function (given the script's arguments) that answers it
+    logs : dict
+        log type to the list of entries get_log returns (once) for it, a log type that is not here is not supported
+    visited : list
+        urls loaded with get
+    profile_dir : str
+        user data dir of the "browser", every url it loads is cached in it like chrome would. None for no profile
+    """
+
+    def __init__(self, present=None, matches=1, profile_dir=None):
+        """
+        Create a FakeDriver, see the class attributes
+        """
+        self.present = present
+        self.matches = matches
+        self.profile_dir = profile_dir
+        self.elements = {}
+        self.calls = []
+        self.lookups = []
+        self.scripts = {}
+        self.logs = {}
+        self.visited = []
+        if profile_dir is not None:
+            open(os.path.join(profile_dir, "SingletonLock"), "w").close()
+
+    def _found(self, by, find_with):
+        """
+        :return: the elements the pair finds, empty if it is not on the page
+        """
+        if self.present is not None and (by, find_with) not in self.present:
+            return []
+        if find_with not in self.elements:
+            self.elements[find_with] = [FakeElement(find_with) for _ in range(self.matches)]
+        return self.elements[find_with]
+
+    def find_element(self, by, find_with):
+        self.calls.append("find_element")
+        self.lookups.append((by, find_with))
+        found = self._found(by, find_with)
+        if not found:
+            raise NoSuchElementException("no element for [" + by + "] [" + find_with + "]")
+        return found[0]
+
+    def find_elements(self, by, find_with):
+        self.calls.append("find_elements")
+        self.lookups.append((by, find_with))
+        return list(self._found(by, find_with))
+
+    def execute_script(self, script, *args):
+        self.calls.append("execute_script")
+        if script in (_RESOLVE_JS, _MANIFEST_JS):
+            results = []
+            for strategies in args[0]:
+                index = next((index for index, (by, find_with) in enumerate(strategies)
+                              if self._found(by, find_with)), -1)
+                if index < 0:
+                    results.append([None if script == _RESOLVE_JS else 0, -1])
+                    continue
+                found = self._found(*strategies[index])
+                results.append([found[0] if script == _RESOLVE_JS else len(found), index])
+            return results
+        return self.scripts[script](*args)
+
+    def get(self, url):
+        self.calls.append("get")
+        self.visited.append(url)
+        if self.profile_dir is not None:
+            os.makedirs(os.path.join(self.profile_dir, "Default", "Cache"), exist_ok=True)
+            with open(os.path.join(self.profile_dir, "Default", "Cache", str(len(url))), "w") as cached:
+                cached.write(url)
+
+    def get_log(self, log_type):
+        self.calls.append("get_log")
+        if log_type not in self.logs:
+            raise WebDriverException("no " + log_type + " log")
+        entries, self.logs[log_type] = self.logs[log_type], []
+        return entries
+
+    def add_network_event(self, method, **params):
+        """
+        Add a DevTools Network.* event to the performance log, the way chrome writes it
+        :param method: event name, ex: Network.requestWillBeSent
+        :param params: the event's params
+        """
+        message = {"message": {"method": method, "params": params}}
+        self.logs.setdefault("performance", []).append({"message": json.dumps(message)})
+
+    def quit(self):
+        self.calls.append("quit")
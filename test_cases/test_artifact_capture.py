@@ -0,0 +1,106 @@
+"""
+Unit tests for capturing failure artifacts in the background, these do not need a browser
+"""
+
+import gzip
+import json
+import os
+import threading
+import time
+import types
+
+import pytest
+
+import selenium_util.artifact_capture
+from selenium_util.artifact_capture import ArtifactCapture
+from selenium_util.event_log import event_log
+
+
+class ScreenshotDriver(object):
+    """
+    Stand in for a webdriver with a page to capture
+    """
+    page_source = "<html><body>Payment</body></html>"
+
+    def get_screenshot_as_png(self):
+        return b"\x89PNG fake"
+
+    def get_log(self, log_type):
+        return [{"level": "SEVERE", "message": "rates failed to load"}]
+
+
+@pytest.fixture
+def blocked_capture(tmp_path, monkeypatch):
+    """
+    Fixture for a capture with one background thread and room for one queued capture, whose writes wait until the
+    test sets the returned event. Screenshots are written as is, they are not real PNGs
+    """
+    monkeypatch.setattr(selenium_util.artifact_capture, "Image", None)
+    monkeypatch.setattr(selenium_util.artifact_capture, "zstandard", None)
+    capture = ArtifactCapture(str(tmp_path), workers=1, queue_size=1, put_timeout=0.05)
+    release = threading.Event()
+    write = capture._write
+
+    def blocked_write(*args):
+        release.wait()
+        write(*args)
+    monkeypatch.setattr(capture, "_write", blocked_write)
+    yield capture, release
+    release.set()
+    capture.shutdown()
+
+
+def test_full_queue_drops_artifacts(blocked_capture):
+    """
+    Test that once the writer is busy and the queue is full a capture is dropped (and logged) instead of waiting
+    """
+    capture, release = blocked_capture
+    event_log.start("test_full_queue")
+    first = capture.capture(ScreenshotDriver(), "first")
+    # let the writer take the first capture off the queue
+    while capture._queue.qsize():
+        time.sleep(0.001)
+    second = capture.capture(ScreenshotDriver(), "second")
+    assert capture.capture(ScreenshotDriver(), "third") is None
+    assert event_log.events()[-1][1:] == ("artifact_dropped", {"name": "third"})
+
+    release.set()
+    capture.shutdown()
+    assert sorted(os.listdir(os.path.dirname(first))) == ["first", "second"]
+    with gzip.open(os.path.join(second, "dom.html.gz"), "rt") as dom_file:
+        assert dom_file.read() == ScreenshotDriver.page_source
+
+
+def test_failed_write_is_tagged_with_its_test(blocked_capture, monkeypatch):
+    """
+    Test that a write failing after the next test started is logged with the id of the test that was captured
+    """
+    capture, release = blocked_capture
+    monkeypatch.setattr(selenium_util.artifact_capture.gzip, "open", None)
+    event_log.start("test_that_failed")
+    capture.capture(ScreenshotDriver(), "test_that_failed")
+    event_log.start("test_after_it")
+    release.set()
+    capture.shutdown()
+
+    _, event, fields = event_log.events()[-1]
+    assert (event, fields["test"]) == ("artifact_write_failed", "test_that_failed")
+
+
+def test_screenshot_format_falls_back(tmp_path, monkeypatch):
+    """
+    Test that without Pillow the screenshot is compressed with zstandard, and without either it is the browser's PNG
+    """
+    monkeypatch.setattr(selenium_util.artifact_capture, "Image", None)
+    compressor = types.SimpleNamespace(compress=lambda data: b"zst:" + data)
+    monkeypatch.setattr(selenium_util.artifact_capture, "zstandard",
+                        types.SimpleNamespace(ZstdCompressor=lambda: compressor))
+    ArtifactCapture._write(str(tmp_path / "zst"), b"png", "<html/>", [])
+    with open(str(tmp_path / "zst" / "screenshot.png.zst"), "rb") as screenshot_file:
+        assert screenshot_file.read() == b"zst:png"
+
+    monkeypatch.setattr(selenium_util.artifact_capture, "zstandard", None)
+    ArtifactCapture._write(str(tmp_path / "png"), b"png", "<html/>", [{"message": "hi"}])
+    assert sorted(os.listdir(str(tmp_path / "png"))) == ["console.json", "dom.html.gz", "screenshot.png"]
+    with open(str(tmp_path / "png" / "console.json")) as console_file:
+        assert json.load(console_file) == [{"message": "hi"}]
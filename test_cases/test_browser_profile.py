@@ -0,0 +1,57 @@
+"""
+Unit tests for the warm profile snapshot, these do not need a browser
+"""
+
+import os
+import time
+
+from selenium_util.browser_profile import ProfileSnapshot
+
+
+def test_snapshot_is_built_once_and_cloned_per_session(tmp_path, fake_driver):
+    """
+    Test that the snapshot is only built once, that each clone has the cached pages in its own directory, and that the
+    profile lock is not copied
+    """
+    builds = []
+
+    def driver_factory(profile_dir):
+        builds.append(profile_dir)
+        # no performance log, so the network counts as idle right away
+        return fake_driver(profile_dir=profile_dir)
+
+    snapshot = ProfileSnapshot(["http://stand-in/mortgage-calculator/"], root_dir=str(tmp_path))
+    first = snapshot.clone(driver_factory)
+    second = snapshot.clone(driver_factory)
+
+    assert len(builds) == 1
+    assert first != second
+    for clone in (first, second):
+        with open(os.path.join(clone, "Default", "Cache", str(len("http://stand-in/mortgage-calculator/")))) as cached:
+            assert cached.read() == "http://stand-in/mortgage-calculator/"
+        assert not os.path.exists(os.path.join(clone, "SingletonLock"))
+
+    ProfileSnapshot.release(first)
+    assert not os.path.exists(first) and os.path.exists(second)
+
+    # different pages to warm need a different snapshot
+    ProfileSnapshot(["http://stand-in/mortgage-rates/"], root_dir=str(tmp_path)).clone(driver_factory)
+    assert len(builds) == 2
+
+
+def test_prune_removes_abandoned_builds_before_clones(tmp_path, fake_driver):
+    """
+    Test that a half built snapshot is removed long before a session clone of the same age, sessions run for hours
+    """
+    snapshot = ProfileSnapshot(["http://stand-in/mortgage-calculator/"], root_dir=str(tmp_path))
+    abandoned_build = os.path.join(str(tmp_path), "snapshots", ".20200101000000-dead.building")
+    running_clone = os.path.join(str(tmp_path), "sessions", "running")
+    an_hour_ago = time.time() - 60 * 60
+    for path in (abandoned_build, running_clone):
+        os.makedirs(path)
+        os.utime(path, (an_hour_ago, an_hour_ago))
+
+    snapshot.build(lambda profile_dir: fake_driver(profile_dir=profile_dir))
+
+    assert not os.path.exists(abandoned_build)
+    assert os.path.exists(running_clone)
@@ -0,0 +1,93 @@
+"""
+Unit tests for the per test event log, these do not need a browser
+"""
+
+import json
+import os
+import types
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+
+import conftest
+import selenium_util.event_log
+from selenium_util.event_log import EventLog, event_log
+from selenium_util.locator import Locator
+from selenium_util.wait_policy import wait_policy
+from selenium_util.web_element import WebElement
+from test_cases.fake_driver import FakeElement
+
+
+def test_buffer_keeps_only_the_newest_events(tmp_path):
+    """
+    Test that a full buffer drops the oldest events, that starting a test clears it, and what a flushed line looks like
+    """
+    log = EventLog(capacity=3)
+    log.start("test_a")
+    for number in range(5):
+        log.record("click", number=number, locator=Locator(By.ID, "price"))
+    assert [fields["number"] for _, _, fields in log.events()] == [2, 3, 4]
+
+    path = log.flush(os.path.join(str(tmp_path), "a.jsonl"))
+    with open(path) as log_file:
+        lines = [json.loads(line) for line in log_file]
+    assert [line["number"] for line in lines] == [2, 3, 4]
+    assert lines[0]["e"] == "click" and lines[0]["locator"] == "Locator(id, 'price')"
+
+    log.start("test_b")
+    assert log.events() == []
+
+
+def test_log_is_flushed_only_when_the_test_failed(tmp_path, monkeypatch):
+    """
+    Test that tearing down a failed test writes its event log, named after the test, and a passed test writes nothing
+    """
+    monkeypatch.setattr(selenium_util.event_log, "DEFAULT_EVENT_LOG_DIR", str(tmp_path))
+
+    def tear_down(test_id, call_outcome):
+        event_log.start(test_id)
+        event_log.record("wait_timeout", key="MortgageCalcPage._PAYMENT|text")
+        item = types.SimpleNamespace(nodeid=test_id, config=types.SimpleNamespace(getoption=lambda name: False,
+                                                                                  stash={}),
+                                     rep_call=types.SimpleNamespace(failed=call_outcome == "failed"))
+        hook = conftest.pytest_runtest_makereport(item, types.SimpleNamespace(excinfo=None))
+        next(hook)
+        report = types.SimpleNamespace(when="teardown", failed=False)
+        try:
+            hook.send(types.SimpleNamespace(get_result=lambda: report))
+        except StopIteration:
+            pass
+
+    tear_down("test_cases/test_x.py::test_passes", "passed")
+    tear_down("test_cases/test_x.py::test_fails", "failed")
+    assert os.listdir(str(tmp_path)) == ["test_cases_test_x.py_test_fails.jsonl"]
+
+
+def test_failed_wait_logs_the_last_text_it_saw(fake_driver, monkeypatch):
+    """
+    Test that a text wait that times out logs the text it last saw, without reading the element again
+    """
+    def wait_once(driver, key, condition, timeout_in_seconds=None, poll_frequency=0.5):
+        condition(driver)
+        raise TimeoutException("Waited 0.0 seconds for [" + key + "]")
+    monkeypatch.setattr(wait_policy, "wait", wait_once)
+
+    class CountingElement(FakeElement):
+        reads = 0
+
+        @property
+        def text(self):
+            CountingElement.reads += 1
+            return "$1,000"
+
+        @text.setter
+        def text(self, value):
+            pass
+
+    element = WebElement(fake_driver(), Locator(By.ID, "payment"), CountingElement("payment"))
+    event_log.start("test_failed_wait")
+    element.wait_for_element_to_have_text("$1,500")
+
+    _, event, fields = event_log.events()[-1]
+    assert (event, fields["actual"]) == ("wait_failed", "$1,000")
+    assert CountingElement.reads == 1
@@ -0,0 +1,41 @@
+"""
+Unit tests for the differential fuzzer, these do not need a browser
+"""
+
+from scenarios.fuzz import complexity, generate, shrink
+from scenarios.scenario import Scenario
+from utilities.loan_programs import LoanPrograms
+from utilities.mortgage_math import calculate_payment
+from utilities.payment_format import acceptable_displays
+
+
+def test_generate_is_repeatable_and_unambiguous():
+    """
+    Test that a seed always generates the same scenarios, and none the page could display either way
+    """
+    scenarios = generate(500, seed=7)
+    assert [scenario.to_dict() for scenario in scenarios] == [scenario.to_dict() for scenario in generate(500, seed=7)]
+    assert all(len(acceptable_displays(scenario.expected_payment())) == 1 for scenario in scenarios)
+    assert all(0 <= scenario.down_payment <= scenario.home_price for scenario in scenarios)
+
+
+def test_shrink_with_few_round_trips():
+    """
+    Test shrinking a mismatch against a page that rounds the rate to 2 decimals, it should end up simpler, still
+    mismatching, blamed on the right hypothesis and with only a few round trips
+    """
+    checked = []
+
+    def page_payment(scenario):
+        checked.append(scenario)
+        return acceptable_displays(calculate_payment(scenario.home_price, scenario.down_payment,
+                                                     round(scenario.rate, 2), scenario.loan_program))[0]
+
+    scenario = Scenario("bug", 487213, 61877, 6.237, LoanPrograms.ARM_5)
+    finding = shrink(scenario, page_payment(scenario), page_payment)
+
+    shrunk = Scenario.from_dict(finding["scenario"])
+    assert complexity(shrunk) < complexity(scenario)
+    assert finding["actual"] not in finding["expected"]
+    assert "rate rounded to 2 decimals" in finding["hypotheses"]
+    assert finding["shrink_checks"] == len(checked) - 1 <= 10
@@ -0,0 +1,120 @@
+"""
+Unit tests for test impact analysis, these do not need a browser
+"""
+
+import os
+
+import pytest
+from selenium.webdriver.common.by import By
+
+from pages.page import Page
+from selenium_util.locator import Locator
+from selenium_util.step_tracker import step_tracker
+from utilities import impact_analysis
+from utilities.impact_analysis import ImpactMap, changed_lines, names_for_lines, parse_diff
+
+_DIFF = """diff --git a/pages/mortage_calculator_page.py b/pages/mortage_calculator_page.py
+index 1111111..2222222 100644
+--- a/pages/mortage_calculator_page.py
++++ b/pages/mortage_calculator_page.py
+@@ -12 +12 @@ class MortgageCalcPage(ZillowBasePage):
+-    _RATE_INPUT = Locator(By.ID, "rate")
++    _RATE_INPUT = Locator(By.ID, "interest-rate")
+@@ -40,0 +41,3 @@ class MortgageCalcPage(ZillowBasePage):
++        # three new lines
++        # in a method
++        # body
+@@ -60,2 +62,0 @@ class MortgageCalcPage(ZillowBasePage):
+-        removed = True
+-        return removed
+diff --git a/old_notes.py b/old_notes.py
+deleted file mode 100644
+--- a/old_notes.py
++++ /dev/null
+@@ -1 +0,0 @@
+-notes = None
+"""
+
+_PAGE_SOURCE = '''from enum import Enum
+
+
+class LoanPrograms(Enum):
+    FIXED_30 = "Fixed30Year"
+
+
+class MortgageCalcPage(ZillowBasePage):
+    """
+    The calculator
+    """
+    _RATE_INPUT = Locator(By.ID, "rate")
+
+    def set_interest_rate(self, rate):
+        return self
+
+    @property
+    def _rate_input(self):
+        return self.get_element(self._RATE_INPUT)
+'''
+
+
+def test_diff_is_parsed_to_changed_lines():
+    """
+    Test that added and changed lines are reported in the new file, removed lines blame their neighbours, and deleted
+    files are left out
+    """
+    assert parse_diff(_DIFF) == {"pages/mortage_calculator_page.py": {12, 41, 42, 43, 62, 63}}
+
+
+def test_lines_are_mapped_to_page_members():
+    """
+    Test that changed lines map to the locator or public method they are in, that private methods (decorators
+    included) name the whole class, docstrings name nothing, and a change outside a page class names every class
+    """
+    assert names_for_lines(_PAGE_SOURCE, {12}) == {"MortgageCalcPage._RATE_INPUT"}
+    assert names_for_lines(_PAGE_SOURCE, {14, 15}) == {"MortgageCalcPage.set_interest_rate"}
+    assert names_for_lines(_PAGE_SOURCE, {17}) == {"MortgageCalcPage"}
+    assert names_for_lines(_PAGE_SOURCE, {10}) == set()
+    assert names_for_lines(_PAGE_SOURCE, {5}) == {"LoanPrograms", "MortgageCalcPage"}
+
+
+def test_git_failures_are_usage_errors(monkeypatch):
+    """
+    Test that a revision git does not know, and git not being installed, stop the run with a usage error
+    """
+    with pytest.raises(pytest.UsageError, match="no-such-revision"):
+        changed_lines("no-such-revision")
+
+    def no_git(*args, **kwargs):
+        raise FileNotFoundError("git")
+    monkeypatch.setattr(impact_analysis.subprocess, "run", no_git)
+    with pytest.raises(pytest.UsageError, match="git was not found"):
+        changed_lines()
+
+
+class _ErrorPage(Page):
+    """
+    Page with a locator that is expected to match nothing
+    """
+    _ERROR_MESSAGE = Locator(By.CSS_SELECTOR, ".error")
+
+    def assert_no_error_message(self):
+        assert self.get_elements(self._ERROR_MESSAGE) == []
+        return self
+
+
+def test_locator_that_matched_nothing_is_recorded(tmp_path, fake_driver):
+    """
+    Test that a step looking for elements that are not there still depends on their locator, so changing the locator
+    selects the test
+    """
+    steps = []
+    step_tracker.add_listener(steps.append)
+    try:
+        _ErrorPage(fake_driver([])).assert_no_error_message()
+    finally:
+        step_tracker.remove_listener(steps.append)
+
+    impact_map = ImpactMap(os.path.join(str(tmp_path), "impact.json"))
+    impact_map.record("test_no_error", steps)
+    assert impact_map.select(["test_no_error"], {"_ErrorPage._ERROR_MESSAGE"}, set()) == {"test_no_error"}
+    assert impact_map.select(["test_no_error"], {"_ErrorPage._OTHER"}, set()) == set()
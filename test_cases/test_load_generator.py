@@ -0,0 +1,110 @@
+"""
+Unit tests for the load generator, these do not need a browser
+"""
+
+import pytest
+
+from benchmarks import load_generator
+from benchmarks.load_generator import LoadGenerator, LoadStats, Pacer
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Fixture for a clock the load generator reads instead of time.monotonic, tests move it forward by hand
+    """
+    now = [100.0]
+    monkeypatch.setattr(load_generator.time, "monotonic", lambda: now[0])
+    return now
+
+
+class _Stop(object):
+    """
+    Stand in for the stop event, remembers how long it was asked to wait instead of waiting
+    """
+
+    def __init__(self):
+        self.waits = []
+
+    def wait(self, seconds):
+        self.waits.append(round(seconds, 6))
+        return False
+
+    def is_set(self):
+        return False
+
+
+def test_snapshot_rates_and_percentiles(clock):
+    """
+    Test that the rate is per second since the last snapshot, the mean rate is over the whole run, and the percentiles
+    are over the most recent durations only
+    """
+    stats = LoadStats()
+    for seconds in range(1, 101):
+        stats.record("flow.stub", seconds / 100)
+    stats.record("flow.stub", 5, failed=True)
+    clock[0] += 2
+    first = stats.snapshot()["flow.stub"]
+    assert (first["count"], first["failures"], first["rate"], first["mean_rate"]) == (101, 1, 50.5, 50.5)
+    assert first["p50"] == pytest.approx(0.51)
+
+    stats.record("flow.stub", 1)
+    clock[0] += 2
+    second = stats.snapshot()["flow.stub"]
+    assert (second["rate"], second["mean_rate"]) == (0.5, 25.5)
+
+
+def test_snapshot_keeps_a_window_of_durations(clock, monkeypatch):
+    """
+    Test that only the newest WINDOW_SIZE durations of an action are used for its percentiles
+    """
+    monkeypatch.setattr(load_generator, "WINDOW_SIZE", 10)
+    stats = LoadStats()
+    for seconds in [100] * 10 + [1] * 10:
+        stats.record("flow.stub", seconds)
+    clock[0] += 1
+    assert stats.snapshot()["flow.stub"]["p99"] == 1
+
+
+def test_pacer_shares_slots_without_catching_up(clock):
+    """
+    Test that sessions asking together get consecutive slots, and that a pacer that fell behind starts right away
+    instead of bursting through the slots it missed
+    """
+    pacer = Pacer(rate=10)
+    stop = _Stop()
+    assert pacer.wait(stop) and pacer.wait(stop) and pacer.wait(stop)
+    assert stop.waits == [0, 0.1, 0.2]
+
+    clock[0] += 5
+    stop.waits = []
+    pacer.wait(stop)
+    pacer.wait(stop)
+    assert stop.waits == [0, 0.1]
+    assert Pacer(rate=0).wait(stop) and stop.waits == [0, 0.1]
+
+
+def test_session_gets_a_fresh_browser_after_a_failed_flow(monkeypatch, fake_driver):
+    """
+    Test that a flow that raises quits its browser, the next flow gets a new one, and active sessions are counted
+    """
+    drivers = []
+    active = []
+
+    def stub_flow(driver, root_url):
+        active.append(generator._active)
+        if len(active) == 1:
+            raise RuntimeError("payment never showed up")
+        if len(active) == 3:
+            generator._stop.set()
+    monkeypatch.setitem(load_generator.FLOWS, "stub", stub_flow)
+    generator = LoadGenerator("http://localhost/", ["stub"], sessions=1,
+                              driver_factory=lambda: drivers.append(fake_driver()) or drivers[-1])
+
+    generator._session(0)
+    assert len(drivers) == 2
+    assert drivers[0].calls == ["quit"] and drivers[1].calls == ["quit"]
+    assert active == [1, 1, 1] and generator._active == 0
+    snapshot = generator.stats.snapshot()
+    assert (snapshot["flow.stub"]["count"], snapshot["flow.stub"]["failures"]) == (3, 1)
+    assert snapshot["browser.start"]["count"] == 2
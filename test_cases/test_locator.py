@@ -0,0 +1,49 @@
+"""
+Unit tests for the Locator fallback chain, these do not need a browser
+"""
+
+import os
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+from selenium_util.locator import Locator
+from selenium_util.locator_cache import LocatorCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """
+    Fixture for a locator cache in a temp directory
+    """
+    return LocatorCache(os.path.join(str(tmp_path), "cache.json"))
+
+
+def test_fallback_is_used_and_remembered(cache, fake_driver):
+    """
+    Test that when the primary strategy breaks the fallback finds the element, and that a new cache reading the same
+    file tries the fallback first
+    """
+    locator = Locator(By.ID, "gone", fallbacks=[Locator(By.CSS_SELECTOR, "[y=\"20\"]")], cache=cache)
+    locator.name = "Page._THING"
+    driver = fake_driver([(By.CSS_SELECTOR, "[y=\"20\"]")])
+
+    assert locator.find_element(driver).find_with == "[y=\"20\"]"
+    assert driver.lookups == [(By.ID, "gone"), (By.CSS_SELECTOR, "[y=\"20\"]")]
+
+    locator._cache = LocatorCache(cache.path)
+    driver.lookups = []
+    locator.find_element(driver)
+    assert driver.lookups == [(By.CSS_SELECTOR, "[y=\"20\"]")]
+
+
+def test_no_strategy_found(cache, fake_driver):
+    """
+    Test that a chain where nothing matches raises the same exception selenium would
+    """
+    locator = Locator(By.ID, "gone", fallbacks=[Locator(By.ID, "also-gone")], cache=cache)
+
+    with pytest.raises(NoSuchElementException):
+        locator.find_element(fake_driver([]))
+    assert locator.find_elements(fake_driver([])) == []
@@ -0,0 +1,97 @@
+"""
+Unit tests for the locator preflight and the fail fast waits it enables, these do not need a browser
+"""
+
+import os
+import types
+
+import pytest
+from selenium.webdriver.common.by import By
+
+import conftest
+from pages.page import Page
+from selenium_util.locator import Locator
+from selenium_util.locator_cache import LocatorCache
+from selenium_util.locator_manifest import LocatorManifest, MissingLocatorError
+from test_cases.fake_driver import FakeElement
+
+
+@pytest.fixture
+def locators(tmp_path):
+    """
+    Fixture for a present, a missing, an ambiguous and a fallback locator, sharing a cache in a temp directory
+    """
+    cache = LocatorCache(os.path.join(str(tmp_path), "cache.json"))
+    return {"price": Locator(By.ID, "price", cache=cache),
+            "gone": Locator(By.ID, "gone", cache=cache),
+            "rows": Locator(By.CSS_SELECTOR, "tr", cache=cache),
+            "rate": Locator(By.ID, "old-rate", fallbacks=[Locator(By.ID, "rate")], cache=cache)}
+
+
+def test_manifest_sorts_locators_in_one_call(locators, fake_driver):
+    """
+    Test that one script call finds which locators are present, missing and ambiguous, and remembers the fallback
+    that worked
+    """
+    driver = fake_driver([(By.ID, "price"), (By.CSS_SELECTOR, "tr"), (By.ID, "rate")])
+    driver.elements["tr"] = [FakeElement("tr"), FakeElement("tr")]
+    manifest = LocatorManifest(driver, locators)
+
+    assert driver.calls == ["execute_script"]
+    assert manifest.present == ["price", "rate"]
+    assert manifest.missing == ["gone"]
+    assert manifest.ambiguous == ["rows"]
+    assert manifest.counts == {"gone": 0, "price": 1, "rate": 1, "rows": 2}
+    assert manifest.is_missing(locators["gone"])
+    assert not manifest.is_missing(Locator(By.ID, "gone"))
+    assert locators["rate"].strategies()[0] == (By.ID, "rate")
+
+
+def test_waits_fail_fast_on_missing_locators(locators, fake_driver):
+    """
+    Test that the page's waits, and the waits of the handles it built, raise MissingLocatorError without looking for
+    the element, while handles of present locators are left alone
+    """
+    driver = fake_driver([(By.ID, "price")])
+    page = Page(driver)
+    gone = page.get_element(locators["gone"])
+    price = page.get_element(locators["price"])
+    page.locator_manifest = page.pending_elements.manifest = LocatorManifest(driver, locators)
+    driver.calls = []
+
+    for wait in (lambda: page.wait_for_element_to_exist(locators["gone"]),
+                 lambda: page.wait_for_network_idle(locators["gone"]),
+                 lambda: gone.wait_for_element_to_have_text("300,000"),
+                 lambda: gone.wait_for_element_to_have_value("300,000"),
+                 lambda: gone.wait_for_element_to_be_clickable()):
+        with pytest.raises(MissingLocatorError):
+            wait()
+    assert driver.calls == []
+
+    price.fail_if_missing()
+    assert price.element.find_with == "price"
+
+
+def test_missing_locator_failures_are_skipped_with_the_option():
+    """
+    Test that --skip-missing-locators turns a MissingLocatorError into a skip, and leaves other failures alone
+    """
+    def report_for(error, skip_missing):
+        item = types.SimpleNamespace(config=types.SimpleNamespace(getoption=lambda name: skip_missing),
+                                     path="test_cases/test_mortgage_calc.py", location=("", 12, ""))
+        try:
+            raise error
+        except Exception:
+            call = types.SimpleNamespace(excinfo=pytest.ExceptionInfo.from_current())
+        report = types.SimpleNamespace(when="call", outcome="failed", longrepr="error")
+        hook = conftest.pytest_runtest_makereport(item, call)
+        next(hook)
+        with pytest.raises(StopIteration):
+            hook.send(types.SimpleNamespace(get_result=lambda: report))
+        return report
+
+    skipped = report_for(MissingLocatorError("gone was missing"), True)
+    assert skipped.outcome == "skipped"
+    assert skipped.longrepr[1] == 13
+    assert report_for(MissingLocatorError("gone was missing"), False).outcome == "failed"
+    assert report_for(AssertionError("wrong payment"), True).outcome == "failed"
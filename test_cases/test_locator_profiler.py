@@ -0,0 +1,55 @@
+"""
+Unit tests for the locator profiler and the locators it finds on pages, these do not need a browser
+"""
+
+from selenium.webdriver.common.by import By
+
+from pages.page import Page
+from selenium_util.locator import Locator
+from utilities.locator_profiler import LocatorProfiler, _SUGGEST_SELECTORS_JS, _TIME_IN_BROWSER_JS
+
+
+class ParentPage(Page):
+    _SHARED = Locator(By.ID, "parent-shared")
+    _PARENT_ONLY = Locator(By.ID, "parent-only")
+
+
+class ChildPage(ParentPage):
+    _SHARED = Locator(By.ID, "child-shared")
+    _CHILD_ONLY = Locator(By.ID, "child-only")
+
+
+def test_declared_locators_include_inherited():
+    """
+    Test that a page's locators include its parents', with the child's locator winning a shared name
+    """
+    locators = ChildPage.get_declared_locators()
+
+    assert {name: locator.find_with for name, locator in locators.items()} == \
+        {"_SHARED": "child-shared", "_PARENT_ONLY": "parent-only", "_CHILD_ONLY": "child-only"}
+
+
+def test_profile_suggests_faster_selectors_and_skips_ids(fake_driver):
+    """
+    Test that only suggestions faster than the locator are kept, fastest first, and that an ID locator does not ask the
+    browser for suggestions at all
+    """
+    link = Locator(By.XPATH, "//a[text()=\"See current rates\"]")
+    driver = fake_driver([link.as_args(), (By.ID, "rate")])
+    suggested = []
+
+    def suggest_selectors(by, find_with):
+        suggested.append(find_with)
+        return ["a.slow", "#fast", "a.faster"]
+
+    driver.scripts[_SUGGEST_SELECTORS_JS] = suggest_selectors
+    # microseconds per lookup, the locator's own first
+    driver.scripts[_TIME_IN_BROWSER_JS] = lambda pairs, iterations: [10, 20, 2, 5][:len(pairs)]
+    profiler = LocatorProfiler(driver, repeats=2)
+
+    profile = profiler.profile_locator("Page._LINK", link)
+    assert profile.is_unique() and profile.in_browser_us == 10
+    assert [suggestion["css_selector"] for suggestion in profile.suggestions] == ["#fast", "a.faster"]
+
+    profile = profiler.profile_locator("Page._RATE", Locator(By.ID, "rate"))
+    assert profile.suggestions == [] and suggested == [link.find_with]
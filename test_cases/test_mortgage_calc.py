@@ -8,11 +8,14 @@ Author: Nick Coriale
 """
 
 
-from pages.mortage_calculator_page import LoanPrograms
+import pytest
+
+from selenium_util.request_stubs import STUBBED_RATE
 
 # Not directly invoked so the IDE thinks this import is unused which is not true, pytest is using it
 # noinspection PyUnresolvedReferences
 from test_cases.testcase import create_driver, start
+from utilities.loan_programs import LoanPrograms
 from utilities.mortgage_math import calculate_payment, calculate_down_payment
 
 # $300,000 with 20% down for 30 years are the default values in the inputs when the page loads
@@ -33,6 +36,33 @@ def test_default_interest_rate(create_driver):
         .assert_payment_given_input_values()
 
 
+@pytest.mark.stub_rates
+def test_stubbed_interest_rate(create_driver):
+    """
+    Test that the interest rate input is filled in from the rates backend, with the backend answered by a local fixture
+    so the expected rate is known
+    :param create_driver: fixture to create a web driver, found in testcase.py
+    """
+    start(create_driver) \
+        .click_mortgage_calculator_link() \
+        .assert_interest_rate(STUBBED_RATE) \
+        .assert_payment_given_input_values()
+
+
+@pytest.mark.stub_rates
+def test_payment_chart(create_driver):
+    """
+    Test that the payment chart drawn for the default values (with the stubbed rate, so the chart is the same every run)
+    looks like its baseline, test_cases/visual_baselines/payment_chart_default.png
+    :param create_driver: fixture to create a web driver, found in testcase.py
+    """
+    start(create_driver) \
+        .click_mortgage_calculator_link() \
+        .assert_interest_rate(STUBBED_RATE) \
+        .assert_payment_given_input_values() \
+        .assert_payment_chart_looks_like("payment_chart_default")
+
+
 def test_five_percent_interest_rate(create_driver):
     """
     Test that a 5% interest rate gives the correct calculation (with the default values on the page and
@@ -0,0 +1,73 @@
+"""
+Unit tests for the mortgage math, these do not need a browser
+"""
+
+import numpy as np
+
+from utilities.loan_programs import LoanPrograms
+from utilities.mortgage_math import calculate_arm_payments, calculate_payment, implied_interest_rates, \
+    max_home_prices, random_index_paths
+
+
+def test_arm_with_flat_index_matches_fixed_payment():
+    """
+    Test that an ARM whose fully indexed rate never moves from the initial rate pays the same as a fixed loan, for the
+    whole term
+    """
+    rates, payments = calculate_arm_payments(240000, 5, np.full(25, 2.25), margin=2.75)
+
+    assert rates.shape == (1, 360)
+    np.testing.assert_allclose(payments, calculate_payment(300000, 60000, 5, LoanPrograms.ARM_5))
+    np.testing.assert_allclose(payments, calculate_payment(300000, 60000, 5, LoanPrograms.FIXED_30))
+
+
+def test_arm_caps():
+    """
+    Test that the initial, periodic and lifetime caps and the floor hold across many random index paths
+    """
+    index_paths = random_index_paths(5000, 25, start_index=4, volatility=2, seed=1)
+    rates, payments = calculate_arm_payments(240000, 5, index_paths, margin=2.75, initial_cap=2, periodic_cap=1,
+                                             lifetime_cap=5)
+    yearly_rates = rates[:, 59::12]
+
+    assert np.all(rates[:, :60] == 5)
+    assert np.all(np.abs(yearly_rates[:, 1] - 5) <= 2 + 1e-9)
+    assert np.all(np.abs(np.diff(yearly_rates[:, 1:], axis=1)) <= 1 + 1e-9)
+    assert np.all((rates >= 2.75 - 1e-9) & (rates <= 10 + 1e-9))
+    assert np.all(payments > 0)
+
+
+def test_arm_pays_off_loan():
+    """
+    Test that re-amortizing at every adjustment pays the loan off exactly, for every path
+    """
+    index_paths = random_index_paths(100, 25, start_index=4, seed=2)
+    rates, payments = calculate_arm_payments(240000, 5, index_paths, margin=2.75)
+
+    balance = np.full(100, 240000.0)
+    for month in range(360):
+        balance = balance * (1 + rates[:, month] / 1200) - payments[:, month]
+    np.testing.assert_allclose(balance, 0, atol=1e-6)
+
+
+def test_max_home_price_inverts_payment():
+    """
+    Test that the home price solved for from a payment gives that payment back, with a percent and an amount down
+    """
+    rates = np.linspace(0, 100, 1001)
+    payments = np.array([calculate_payment(300000, 60000, rate, LoanPrograms.FIXED_30) for rate in rates])
+
+    np.testing.assert_allclose(max_home_prices(payments, rates, LoanPrograms.FIXED_30, down_payment_percent=20), 300000)
+    np.testing.assert_allclose(max_home_prices(payments, rates, LoanPrograms.FIXED_30, down_payment=60000), 300000)
+
+
+def test_implied_rate_inverts_payment():
+    """
+    Test that the rate solved for from a payment matches the rate the payment was calculated with
+    """
+    rates = np.concatenate([[0], np.geomspace(0.001, 100, 2000)])
+    payments = np.array([calculate_payment(150000, 2000, rate, LoanPrograms.FIXED_15) for rate in rates])
+
+    np.testing.assert_allclose(implied_interest_rates(payments, 148000, LoanPrograms.FIXED_15), rates, rtol=1e-7,
+                               atol=1e-6)
+    assert np.isnan(implied_interest_rates(1, 148000, LoanPrograms.FIXED_15))
@@ -0,0 +1,102 @@
+"""
+Unit tests for following a page's requests through the DevTools performance log, these do not need a browser
+"""
+
+import pytest
+from selenium.webdriver.common.by import By
+
+from pages.page import Page
+from selenium_util import network_idle
+from selenium_util.event_log import event_log
+from selenium_util.locator import Locator
+from selenium_util.network_idle import NetworkTracker
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Fixture for a clock the tracker reads instead of time.monotonic, tests move it forward by hand
+    """
+    now = [100.0]
+    monkeypatch.setattr(network_idle.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _send(driver, request_id, url):
+    driver.add_network_event("Network.requestWillBeSent", requestId=request_id, request={"url": url})
+
+
+def test_requests_in_flight_are_counted(fake_driver, clock):
+    """
+    Test that requests are in flight from being sent until they finish or fail, and idle needs idle_ms of quiet after
+    the last one
+    """
+    driver = fake_driver()
+    tracker = NetworkTracker(driver)
+    _send(driver, "1", "https://www.zillow.com/mortgage-rates/api")
+    _send(driver, "2", "https://www.zillow.com/static/app.js")
+    assert not tracker.is_idle(0)
+    assert sorted(tracker.in_flight()) == ["https://www.zillow.com/mortgage-rates/api",
+                                           "https://www.zillow.com/static/app.js"]
+
+    driver.add_network_event("Network.loadingFinished", requestId="1")
+    driver.add_network_event("Network.loadingFailed", requestId="2")
+    assert not tracker.is_idle(500)
+    assert tracker.in_flight() == []
+    clock[0] += 0.5
+    assert tracker.is_idle(500)
+
+
+def test_ignored_and_data_urls_are_not_followed(fake_driver, clock):
+    """
+    Test that analytics beacons and data: urls never keep the page from being idle
+    """
+    driver = fake_driver()
+    tracker = NetworkTracker(driver)
+    clock[0] += 1
+    _send(driver, "1", "https://www.google-analytics.com/g/collect?v=2")
+    _send(driver, "2", "data:image/png;base64,AAAA")
+    _send(driver, "3", "https://www.zillow.com/beacon")
+    assert tracker.is_idle(500)
+    assert tracker.in_flight() == []
+
+
+def test_stale_requests_stop_counting(fake_driver, clock):
+    """
+    Test that a request that never finishes stops counting as in flight after stale_after seconds
+    """
+    driver = fake_driver()
+    tracker = NetworkTracker(driver, stale_after=15)
+    _send(driver, "1", "https://www.zillow.com/long-poll")
+    tracker.poll()
+    clock[0] += 14
+    assert not tracker.is_idle(500)
+    clock[0] += 1
+    assert tracker.is_idle(500)
+
+
+def test_unsupported_driver_is_always_idle(fake_driver):
+    """
+    Test that a driver without a performance log is idle right away, and is only asked for it once
+    """
+    driver = fake_driver()
+    driver.logs = {}
+    tracker = NetworkTracker(driver)
+    assert tracker.is_idle(10 ** 6)
+    assert tracker.is_idle(10 ** 6)
+    assert driver.calls == ["get_log"]
+    assert not tracker.supported
+
+
+def test_busy_network_only_waits_for_the_element(fake_driver):
+    """
+    Test that a network that never goes quiet is logged, and the wait goes on to the element instead of failing
+    """
+    driver = fake_driver([(By.ID, "payment")])
+    _send(driver, "1", "https://www.zillow.com/long-poll")
+    event_log.start("test_busy_network")
+
+    element = Page(driver).wait_for_network_idle(Locator(By.ID, "payment"), timeout_in_seconds=0.1)
+    assert element.element.find_with == "payment"
+    timeouts = [fields for _, event, fields in event_log.events() if event == "network_idle_timeout"]
+    assert [fields["in_flight"] for fields in timeouts] == [["https://www.zillow.com/long-poll"]]
@@ -0,0 +1,24 @@
+"""
+Unit tests for the page registry, these do not need a browser
+"""
+
+import pytest
+
+from pages.registry import PAGE_MODULES, page_class
+
+
+def test_every_registered_page_resolves():
+    """
+    Test that every page in the registry is declared in the module it is registered under
+    """
+    for name, module in PAGE_MODULES.items():
+        klass = page_class(name)
+        assert klass.__name__ == name and klass.__module__ == module
+
+
+def test_unknown_page():
+    """
+    Test that asking for a page that is not registered says how to fix it
+    """
+    with pytest.raises(KeyError, match="PAGE_MODULES"):
+        page_class("NoSuchPage")
@@ -0,0 +1,29 @@
+"""
+Unit tests for formatting amounts the way the mortgage calculator page does, these do not need a browser
+"""
+
+import numpy as np
+
+from utilities.payment_format import acceptable_displays, format_currency_like_page, format_number_like_page, \
+    rounding_ambiguous
+
+
+def test_halves_round_away_from_zero():
+    """
+    Test that halves round up like the page's Intl.NumberFormat, where python's format would round to even
+    """
+    assert "{:,.0f}".format(1234.5) == "1,234"
+    assert format_number_like_page(1234.5) == "1,235"
+    assert format_currency_like_page(1234.5) == "$1,235"
+    assert format_currency_like_page(1000000.49) == "$1,000,000"
+    assert format_currency_like_page(-2.5) == "-$3"
+
+
+def test_ambiguous_values():
+    """
+    Test that values close to a half are flagged, in bulk, and accept both roundings
+    """
+    np.testing.assert_array_equal(rounding_ambiguous([1264.14, 1264.498, 1264.5, 1264.503, 1264.51]),
+                                  [False, True, True, True, False])
+    assert acceptable_displays(1264.14) == ["$1,264"]
+    assert acceptable_displays(1264.498) == ["$1,264", "$1,265"]
@@ -0,0 +1,28 @@
+"""
+Unit tests for the request stubs, these do not need a browser
+"""
+
+import json
+
+from selenium_util.request_stubs import _STUB_JS, RequestStub
+
+
+def test_status_text_follows_the_status():
+    """
+    Test that a stub reports the reason phrase of its own status, unless it is given one
+    """
+    assert RequestStub("rates", {}).to_dict()["status_text"] == "OK"
+    assert RequestStub("rates", {}, status=500).to_dict()["status_text"] == "Internal Server Error"
+    assert RequestStub("rates", {}, status=599).to_dict()["status_text"] == ""
+    assert RequestStub("rates", {}, status=503, status_text="Down").to_dict()["status_text"] == "Down"
+
+
+def test_stub_script_takes_the_stubs():
+    """
+    Test that the page script is filled in with the stubs as JSON, and that what it sets on a stubbed xhr can be set
+    again when the xhr is reused
+    """
+    stubs = [RequestStub("rates", {"rate": 6.5}).to_dict()]
+    source = _STUB_JS % json.dumps(stubs)
+    assert source.rstrip().endswith("})(" + json.dumps(stubs) + ");")
+    assert "configurable: true" in source
@@ -0,0 +1,101 @@
+"""
+Unit tests for the step tracker and the results store it feeds, these do not need a browser
+"""
+
+import os
+import sqlite3
+
+import pytest
+from selenium.webdriver.common.by import By
+
+from selenium_util.locator import Locator
+from selenium_util.step_tracker import StepRecord, StepTracker
+from utilities.results_store import ResultsStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    """
+    Fixture for a results store in a temp directory, committing every 3 rows
+    """
+    results_store = ResultsStore(os.path.join(str(tmp_path), "results.sqlite"), batch_size=3)
+    yield results_store
+    results_store.close()
+
+
+def _step(page, method, duration, outcome="passed"):
+    """
+    :return: a finished StepRecord
+    """
+    record = StepRecord(page, method, 0)
+    record.duration, record.outcome = duration, outcome
+    return record
+
+
+def test_rows_are_written_in_batches(store):
+    """
+    Test that rows stay queued until a batch is full, and that close writes what is left
+    """
+    store.add_test_result("run", "main", "test_a", "passed", 1.0, None, 100)
+    store.add_step_result("run", "main", "test_a", _step("MortgageCalcPage", "set_home_price", 0.2), None)
+    assert not os.path.exists(store.path)
+
+    store.add_step_result("run", "main", "test_a", _step("MortgageCalcPage", "get_payment", 0.1), None)
+    store.add_test_result("run", "main", "test_b", "failed", 2.0, None, 101)
+    with sqlite3.connect(store.path) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM step_results").fetchone() == (2,)
+        assert connection.execute("SELECT COUNT(*) FROM test_results").fetchone() == (1,)
+
+    store.close()
+    with sqlite3.connect(store.path) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM test_results").fetchone() == (2,)
+
+
+def test_query_helpers(store):
+    """
+    Test the slowest steps, the duration trend of a test and the flake rates
+    """
+    for started_at, outcome in enumerate(["passed", "failed", "passed", "passed", "skipped"]):
+        store.add_test_result("run" + str(started_at), "main", "test_flaky", outcome, started_at, None, started_at)
+        store.add_test_result("run" + str(started_at), "main", "test_steady", "passed", 1.0, None, started_at)
+    for duration in (0.1, 0.3):
+        store.add_step_result("run", "main", "test_steady", _step("MortgageCalcPage", "get_payment", duration), None)
+    store.add_step_result("run", "main", "test_steady", _step("MortgageRatesPage", "get_rate", 0.5), None)
+    store.flush()
+
+    slowest = store.slowest_steps(limit=2)
+    assert [(step["method"], step["calls"]) for step in slowest] == [("get_rate", 1), ("get_payment", 2)]
+    assert slowest[1]["avg_duration"] == pytest.approx(0.2)
+    assert [run["duration"] for run in store.duration_trend("test_flaky", limit=3)] == [2, 3, 4]
+    assert store.flake_rates(min_runs=4) == [{"nodeid": "test_flaky", "runs": 4, "failures": 1, "flake_rate": 0.25}]
+    assert store.flake_rates(min_runs=5) == []
+
+
+def test_steps_report_nested_locators_to_listeners():
+    """
+    Test that finished steps reach the listeners, innermost first, with the locators of the steps they called, and
+    that a step that raises is failed
+    """
+    tracker = StepTracker()
+    tracker.touch(Locator(By.ID, "outside"))
+    records = []
+    tracker.add_listener(records.append)
+
+    with tracker.step("MortgageCalcPage", "set_down_payment"):
+        tracker.touch(Locator(By.ID, "price"))
+        with pytest.raises(ValueError):
+            with tracker.step("MortgageCalcPage", "get_home_price"):
+                tracker.touch(Locator(By.ID, "price"))
+                tracker.touch(Locator(By.ID, "down"))
+                raise ValueError("not a number")
+
+    inner, outer = records
+    assert (inner.method, inner.depth, inner.outcome) == ("get_home_price", 1, "failed")
+    assert (outer.method, outer.depth, outer.outcome) == ("set_down_payment", 0, "passed")
+    assert outer.locators == ["Locator(id, 'price')", "Locator(id, 'down')"]
+    assert outer.duration >= inner.duration
+
+    tracker.remove_listener(records.append)
+    with tracker.step("MortgageCalcPage", "get_payment"):
+        pass
+    assert len(records) == 2
@@ -0,0 +1,53 @@
+"""
+Unit tests for the sampling profiler, these do not need a browser
+"""
+
+import time
+
+from utilities.sampling_profiler import SamplingProfiler, WEBDRIVER_IO
+
+
+def _module(name, source):
+    """
+    :param name: module name the functions should look like they are from
+    :param source: python source defining functions
+    :return: the namespace the source was run in
+    """
+    namespace = {"__name__": name, "time": time}
+    exec(source, namespace)
+    return namespace
+
+
+def test_samples_attributed_and_io_kept_apart():
+    """
+    Test that running python, waiting on a WebDriver command and sleeping are told apart, and attributed to the pages.*
+    frame they happened in
+    """
+    socket = _module("socket", "def recv_into():\n    time.sleep(0.15)\n")
+    connection = _module("selenium.webdriver.remote.remote_connection",
+                         "def execute(recv_into):\n    recv_into()\n")
+    page = _module("pages.fake_page", """
+def busy():
+    end = time.perf_counter() + 0.15
+    while time.perf_counter() < end:
+        pass
+
+def assert_payment(execute, recv_into):
+    busy()
+    execute(recv_into)
+    time.sleep(0.15)
+""")
+
+    profiler = SamplingProfiler(0.002).start()
+    page["assert_payment"](connection["execute"], socket["recv_into"])
+    profiler.stop()
+
+    # each part takes a third of the time, only shares are compared so a slow or busy machine does not fail the test
+    summary = profiler.summary()
+    total = summary["python_ms"] + summary["webdriver_io_ms"] + summary["blocked_ms"]
+    owner = summary["pages"]["pages.fake_page:assert_payment"]
+    for share in (summary["pages"]["pages.fake_page:busy"]["python"], owner["webdriver_io"], owner["blocked"]):
+        assert share > total * 0.2, summary
+    assert any(line.startswith("test_cases.test_sampling_profiler:test_samples_attributed_and_io_kept_apart;"
+                               "pages.fake_page:assert_payment;selenium.webdriver.remote.remote_connection:execute;"
+                               + WEBDRIVER_IO + " ") for line in profiler.collapsed())
@@ -0,0 +1,57 @@
+"""
+Unit tests for scenario checkpoints, these do not need a browser
+"""
+
+import pytest
+
+from scenarios.checkpoint import ScenarioCheckpoint, read_results
+from scenarios.scenario import fingerprint, sweep
+from utilities.loan_programs import LoanPrograms
+
+
+def test_resume_after_crash(tmp_path):
+    """
+    Test that resuming keeps the committed results, drops a result cut off in the middle of a commit and refuses a
+    different set of scenarios
+    """
+    path = str(tmp_path / "run.jsonl")
+    scenarios = sweep(prices=[100000, 200000], down_payment_percents=[20], rates=[5],
+                      loan_programs=[LoanPrograms.FIXED_30])
+
+    checkpoint = ScenarioCheckpoint(path, fingerprint(scenarios), commit_every=1).open()
+    checkpoint.record({"id": scenarios[0].id, "status": "passed"})
+    # a crash while the second result was being written
+    checkpoint._file.write('{"id": "' + scenarios[1].id)
+    checkpoint._file.close()
+
+    with pytest.raises(FileExistsError):
+        ScenarioCheckpoint(path, fingerprint(scenarios)).open()
+    with pytest.raises(ValueError, match="different set of scenarios"):
+        ScenarioCheckpoint(path, fingerprint(scenarios[:1])).open(resume=True)
+
+    with ScenarioCheckpoint(path, fingerprint(scenarios)).open(resume=True) as resumed:
+        assert resumed.completed == {scenarios[0].id} and resumed.counts == {"passed": 1}
+        resumed.record({"id": scenarios[1].id, "status": "failed"})
+
+    assert [result["status"] for result in read_results(path)] == ["passed", "failed"]
+
+
+def test_errors_are_retried_on_resume(tmp_path):
+    """
+    Test that a resumed checkpoint does not count scenarios that ended in an error as done, and that read_results
+    gives the result of their retry
+    """
+    path = str(tmp_path / "run.jsonl")
+    scenarios = sweep(prices=[100000, 200000], down_payment_percents=[20], rates=[5],
+                      loan_programs=[LoanPrograms.FIXED_30])
+
+    with ScenarioCheckpoint(path, fingerprint(scenarios)).open() as checkpoint:
+        checkpoint.record({"id": scenarios[0].id, "status": "passed"})
+        checkpoint.record({"id": scenarios[1].id, "status": "error", "error": "chrome not reachable"})
+
+    with ScenarioCheckpoint(path, fingerprint(scenarios)).open(resume=True) as resumed:
+        assert resumed.completed == {scenarios[0].id} and resumed.counts == {"passed": 1}
+        resumed.record({"id": scenarios[1].id, "status": "passed"})
+
+    assert [(result["id"], result["status"]) for result in read_results(path)] == \
+        [(scenarios[0].id, "passed"), (scenarios[1].id, "passed")]
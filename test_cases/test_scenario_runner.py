@@ -0,0 +1,40 @@
+"""
+Unit tests for how the scenario runner recovers from WebDriver errors, these do not need a browser
+"""
+
+from selenium.common.exceptions import InvalidSessionIdException, StaleElementReferenceException
+
+from scenarios import runner
+from scenarios.checkpoint import ScenarioCheckpoint
+from scenarios.runner import ScenarioRunner
+from scenarios.scenario import fingerprint, sweep
+from utilities.loan_programs import LoanPrograms
+
+
+def test_only_a_lost_browser_is_restarted(tmp_path, monkeypatch, fake_driver):
+    """
+    Test that a stale element is retried on the same page, a lost session gets a new browser, and a scenario that
+    runs out of attempts is recorded as an error
+    """
+    scenarios = sweep(prices=[100000, 200000, 300000], down_payment_percents=[20], rates=[5],
+                      loan_programs=[LoanPrograms.FIXED_30])
+    errors = {scenarios[0].id: [StaleElementReferenceException("redrawn")],
+              scenarios[1].id: [InvalidSessionIdException("invalid session id")],
+              scenarios[2].id: [StaleElementReferenceException("redrawn")] * 3}
+    pages = []
+
+    def run_scenario(page, scenario):
+        if errors[scenario.id]:
+            raise errors[scenario.id].pop()
+        return {"id": scenario.id, "status": "passed"}
+    monkeypatch.setattr(runner, "open_calculator", lambda driver, root_url: pages.append(driver) or driver)
+    monkeypatch.setattr(runner, "run_scenario", run_scenario)
+    drivers = []
+    scenario_runner = ScenarioRunner("http://localhost/", lambda: drivers.append(fake_driver()) or drivers[-1])
+
+    with ScenarioCheckpoint(str(tmp_path / "run.jsonl"), fingerprint(scenarios)).open() as checkpoint:
+        counts = scenario_runner.run(scenarios, checkpoint)
+
+    assert counts == {"passed": 2, "error": 1}
+    assert len(drivers) == 2 and drivers[0].calls == ["quit"]
+    assert pages == drivers
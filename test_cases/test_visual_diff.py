@@ -0,0 +1,78 @@
+"""
+Unit tests for the visual diff math, these do not need a browser (or Pillow)
+"""
+
+import os
+
+import numpy as np
+
+from utilities.visual_diff import VisualBaselines, _count_bits_by_byte, changed_pixels, changed_regions, \
+    hamming_distances, perceptual_hashes
+
+
+def _chart(bar_height):
+    """
+    :param bar_height: height of the first bar drawn on the chart, in pixels
+    :return: a 120x200 image of three bars on a gradient
+    """
+    y, x = np.mgrid[:120, :200]
+    image = np.stack([(x + y) % 256, 255 - x, 128 + y // 2], axis=-1).astype(np.uint8)
+    for index, (left, height) in enumerate([(20, bar_height), (90, 40), (150, 90)]):
+        image[120 - height:, left:left + 30] = (20 + 60 * index, 60, 200)
+    return image
+
+
+def test_perceptual_hash_ignores_noise_but_not_shapes():
+    """
+    Test that rendering noise barely moves the hash while a different chart moves it a lot, in one batch
+    """
+    baseline = _chart(60)
+    noisy = np.clip(baseline.astype(np.int16) + np.random.default_rng(1).integers(-6, 7, baseline.shape), 0,
+                    255).astype(np.uint8)
+    hashes = perceptual_hashes(np.stack([baseline, noisy, _chart(100)]))
+
+    distances = hamming_distances(hashes, hashes[0])
+    assert distances[0] == 0 and distances[1] <= 2 and distances[2] > 8
+
+
+def test_changed_regions():
+    """
+    Test that changed pixels are grouped into one rectangle per area of touching tiles
+    """
+    baseline = _chart(60)
+    actual = baseline.copy()
+    actual[5:10, 5:10] = 0
+    actual[100:110, 150:190] = 0
+
+    changed = changed_pixels(baseline, actual)
+    assert changed.sum() == 25 + 400
+    assert sorted(changed_regions(changed)) == [(0, 0, 16, 16), (144, 96, 48, 16)]
+
+
+def test_bits_are_counted_without_bitwise_count():
+    """
+    Test that the byte table used on numpy older than 2.0 counts the same bits as np.bitwise_count
+    """
+    values = np.random.default_rng(7).integers(0, 2 ** 63, size=1000, dtype=np.uint64) * np.uint64(2)
+    values[:2] = [0, np.iinfo(np.uint64).max]
+    expected = [bin(int(value)).count("1") for value in values]
+    assert _count_bits_by_byte(values).tolist() == expected
+    assert hamming_distances(values, 0).tolist() == expected
+    assert _count_bits_by_byte(np.uint64(7)) == 3
+
+
+def test_missing_baseline_fails_unless_updating(tmp_path):
+    """
+    Test that a screenshot with no baseline fails (and is written out to look at) instead of becoming the baseline,
+    and that updating saves it
+    """
+    baselines = VisualBaselines(str(tmp_path / "baselines"), str(tmp_path / "output"))
+    result = baselines.check("payment_chart_default", b"\x89PNG chart")
+    assert not result.passed and result.missing_baseline
+    assert "--update-visual-baselines" in result.describe()
+    assert os.listdir(result.output_dir) == ["actual.png"]
+    assert not os.path.exists(baselines.baseline_dir)
+
+    baselines.update = True
+    assert baselines.check("payment_chart_default", b"\x89PNG chart").passed
+    assert os.listdir(baselines.baseline_dir) == ["payment_chart_default.png"]
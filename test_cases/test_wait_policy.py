@@ -0,0 +1,87 @@
+"""
+Unit tests for the learned wait timeouts, these do not need a browser
+"""
+
+import json
+import os
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from selenium_util.wait_policy import WaitPolicy
+
+
+@pytest.fixture
+def policy(tmp_path):
+    """
+    Fixture for a wait policy with its history in a temp directory
+    """
+    return WaitPolicy(os.path.join(str(tmp_path), "history.json"), default_timeout=10, percentile=90, margin=2,
+                      floor=1, min_samples=3, max_history=10)
+
+
+def test_timeout_is_learned_from_enough_samples(policy):
+    """
+    Test that the default is used until a key has min_samples, then the percentile times the margin, kept between the
+    floor and the default
+    """
+    for seconds in (0.4, 0.2):
+        policy.record("fast", seconds)
+    assert policy.timeout_for("fast") == 10
+
+    policy.record("fast", 0.1)
+    assert policy.timeout_for("fast") == 1
+    for seconds in (0.3, 0.8, 1.0, 1.5, 1.6, 1.7, 2.0, 3.0):
+        policy.record("fast", seconds)
+    # the oldest samples fall out, the 90th percentile of the last 10 is 2.0
+    assert policy.timeout_for("fast") == 4
+
+    for seconds in (8, 9, 7):
+        policy.record("slow", seconds)
+    assert policy.timeout_for("slow") == 10
+    assert policy.timeout_for("never waited") == 10
+
+
+def test_timeouts_are_not_samples_and_reset_the_timeout(policy, fake_driver):
+    """
+    Test that a wait that timed out is not recorded as a sample, sends its key back to the default timeout, and that a
+    success goes back to the learned timeout
+    """
+    for seconds in (0.1, 0.2, 0.3):
+        policy.record("price", seconds)
+    policy.default_timeout = 0.05
+
+    with pytest.raises(TimeoutException):
+        policy.wait(fake_driver(), "price", lambda the_driver: False, poll_frequency=0.01)
+    assert policy._history["price"] == [0.1, 0.2, 0.3]
+
+    policy.default_timeout = 10
+    assert policy.timeout_for("price") == 10
+    policy.record("price", 0.2)
+    assert policy.timeout_for("price") == 1
+
+
+def test_save_merges_with_other_processes(policy):
+    """
+    Test that saving adds this process's samples and timeouts to what another process saved in the meantime, and that
+    the older, samples only, history file is still read
+    """
+    with open(policy.path, "w") as history_file:
+        json.dump({"price": [0.5]}, history_file)
+    policy.record("price", 0.6)
+    policy.record_timeout("rate")
+
+    other = WaitPolicy(policy.path)
+    other.record("price", 0.7)
+    other.record_timeout("rate")
+    other.save()
+    policy.save()
+
+    with open(policy.path) as history_file:
+        saved = json.load(history_file)
+    assert saved == {"samples": {"price": [0.5, 0.7, 0.6]}, "timeouts": {"rate": 2}}
+
+    other.record("rate", 0.4)
+    other.save()
+    with open(policy.path) as history_file:
+        assert json.load(history_file)["timeouts"] == {}
@@ -0,0 +1,45 @@
+"""
+Unit tests for the lazy element handles, these do not need a browser
+"""
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException
+from selenium.webdriver.common.by import By
+
+from pages.page import Page
+from selenium_util.locator import Locator
+
+
+def test_handles_resolve_together_on_first_use(fake_driver):
+    """
+    Test that building handles costs nothing, and that the first use resolves every pending handle in one call
+    """
+    driver = fake_driver([(By.ID, "price"), (By.ID, "rate")])
+    page = Page(driver)
+    price = page.get_element(Locator(By.ID, "price"))
+    rate = page.get_element(Locator(By.ID, "rate"))
+    assert driver.calls == []
+
+    assert rate.element.find_with == "rate"
+    assert price.element.find_with == "price"
+    assert driver.calls == ["execute_script"]
+
+
+def test_missing_handle_finds_its_own_element(fake_driver):
+    """
+    Test that a handle the batch did not find falls back to selenium's find_element (and its exception) when used,
+    and that a lone handle skips the batch script
+    """
+    driver = fake_driver([(By.ID, "price")])
+    page = Page(driver)
+    price = page.get_element(Locator(By.ID, "price"))
+    gone = page.get_element(Locator(By.ID, "gone"))
+
+    assert price.element.find_with == "price"
+    with pytest.raises(NoSuchElementException):
+        gone.element
+    assert driver.calls == ["execute_script", "find_element"]
+
+    driver.calls = []
+    assert page.get_element(Locator(By.ID, "price")).element.find_with == "price"
+    assert driver.calls == ["find_element"]
@@ -4,13 +4,15 @@ Static Test Case python file, used to setup, and teardown test cases
 Author: Nick Coriale
 """
 
+import functools
 import platform
 import pytest
 import os
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 
-from pages.zillow_home_page import ZillowHomePage
+from pages.registry import new_page
+from selenium_util.artifact_capture import artifact_capture
+from selenium_util.browser_profile import ProfileSnapshot
+from selenium_util.request_stubs import rates_backend
 
 '''
 The following 3 lines of code are to figure out the current directory, move up a level and path to the 
@@ -27,18 +29,79 @@ if non_windows_os:
     executable = "chromedriver"
 
 chrome_driver_path = os.path.join(this_dir, "..", executable)
-chrome_service = Service(executable_path=chrome_driver_path)
+
+
+@functools.lru_cache(maxsize=None)
+def chrome_service():
+    """
+    The chromedriver Service every driver is started with, made the first time a driver is needed so that collecting
+    tests (or running tests that need no browser) does not import selenium
+    :return: a selenium chrome Service
+    """
+    from selenium.webdriver.chrome.service import Service
+    return Service(executable_path=chrome_driver_path)
+
+
+def new_chrome_driver(headless=False, user_data_dir=None):
+    """
+    Create a Chrome driver with the options every test needs
+    :param headless: True to run without a window, ex: for benchmarks and load generation
+    :param user_data_dir: profile directory for chrome to use, ex: a clone of the warm profile snapshot. None for a
+    new empty profile
+    :return: a new webdriver
+    """
+    from selenium import webdriver
+    from selenium_util.network_idle import enable_network_events
+
+    options = enable_network_events(webdriver.ChromeOptions())
+    if headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1280,1024")
+    if user_data_dir is not None:
+        options.add_argument("--user-data-dir=" + user_data_dir)
+    return webdriver.Chrome(service=chrome_service(), options=options)
+
+
+@functools.lru_cache(maxsize=None)
+def warm_profile(max_age_hours):
+    """
+    The warm profile snapshot of this process, see browser_profile.py
+    :param max_age_hours: hours after which the snapshot is rebuilt
+    :return: a ProfileSnapshot of the pages the tests load
+    """
+    from pages.zillow_base_page import ROOT_ZILLOW_URL
+    return ProfileSnapshot([ROOT_ZILLOW_URL + "mortgage-calculator/", ROOT_ZILLOW_URL + "mortgage-rates/"],
+                           max_age_hours=max_age_hours)
 
 
 @pytest.fixture
-def create_driver():
+def create_driver(request):
     """
     Fixture to create a driver for a test method.
-    Creates it, yields it, and then closes it when the test method ends (clean run or not)
+    Creates it, yields it, and then closes it when the test method ends (clean run or not). Tests marked stub_rates (or
+    every test, with --stub-rates) get the current rates from a local fixture instead of Zillow's backend. With
+    --warm-profile each test's browser starts from a clone of a profile that already has the pages cached. If the test
+    failed, a screenshot, the DOM and the browser's console log are captured first, and written in the background to
+    test_output/artifacts
     """
-    driver = webdriver.Chrome(service=chrome_service)
+    profile_dir = None
+    if request.config.getoption("--warm-profile"):
+        # the first test to get here builds the snapshot if there is no recent one, every test runs in its own clone
+        profile_dir = warm_profile(request.config.getoption("--warm-profile-max-age")).clone(
+            lambda snapshot_dir: new_chrome_driver(user_data_dir=snapshot_dir))
+
+    driver = new_chrome_driver(user_data_dir=profile_dir)
+    request.node.user_properties.append(
+        ("browser", driver.capabilities.get("browserName", "") + " " + driver.capabilities.get("browserVersion", "")))
+    if request.config.getoption("--stub-rates") or request.node.get_closest_marker("stub_rates") is not None:
+        rates_backend(request.config.getoption("--stub-latency-ms")).install(driver)
     yield driver
+    rep_call = getattr(request.node, "rep_call", None)
+    if rep_call is not None and rep_call.failed:
+        artifact_capture.capture(driver, request.node.nodeid)
     driver.quit()
+    if profile_dir is not None:
+        ProfileSnapshot.release(profile_dir)
 
 
 def start(driver):
@@ -50,4 +113,4 @@ def start(driver):
     # No point in navigating to the root url, there is a human check so we cannot interact with the page. See comment
     # in zillow_base_page.py for more detail
     # driver.get(ROOT_ZILLOW_URL)
-    return ZillowHomePage(driver)
+    return new_page("ZillowHomePage", driver)
@@ -0,0 +1,257 @@
+"""
+Test impact analysis, remembers which page methods and locators every test used, and picks only the tests affected by a
+change on the next run.
+
+Changes to page modules are narrowed down to the page methods and locators they touch. A change to any other python
+file (selenium_util, utilities, conftest...) could affect any test, so it selects everything, and a changed test module
+selects all of its tests
+"""
+
+import ast
+import json
+import os
+import re
+import subprocess
+import threading
+
+import pytest
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Default location of the impact map, at the root of the project
+DEFAULT_IMPACT_MAP = os.path.join(ROOT_DIR, ".impact_map.json")
+
+# directory of the page modules, changes in here are narrowed down to methods and locators
+_PAGES_DIR = "pages/"
+
+# page modules every page depends on, the methods in them are not recorded as steps
+_SHARED_PAGE_MODULES = {"pages/page.py", "pages/__init__.py", "pages/registry.py"}
+
+_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+
+class ImpactMap(object):
+    """
+    Which page steps (ex: MortgageCalcPage.set_interest_rate) and locators (ex: MortgageCalcPage._RATE_INPUT) each test
+    used the last time it ran
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        path of the JSON file the map is persisted to
+
+    Methods
+    -------
+    record(self, nodeid, steps)
+        Remember what a test used, from the StepRecords of its run
+    forget(self, nodeid)
+        Forget what a test used
+    save(self)
+        Merge the tests recorded by this process into the map file
+    select(self, nodeids, changed_names, changed_test_files)
+        Pick the tests affected by a change
+    """
+
+    def __init__(self, path=DEFAULT_IMPACT_MAP):
+        """
+        Create an ImpactMap, reading the map file if there is one
+        :param path: path of the JSON file the map is persisted to
+        """
+        self.path = path
+        self._tests = self._read_file()
+        self._recorded = {}
+        self._lock = threading.Lock()
+
+    def _read_file(self):
+        """
+        :return: the map stored in the file, a dict of test id to a list of names it used
+        """
+        try:
+            with open(self.path) as map_file:
+                return json.load(map_file)
+        except (OSError, ValueError):
+            return {}
+
+    def record(self, nodeid, steps):
+        """
+        Remember what a test used. Only record passing runs, a run that failed part way did not use everything the test
+        normally uses (see forget)
+        :param nodeid: pytest id of the test
+        :param steps: the StepRecords of the test's run
+        """
+        names = set()
+        for step in steps:
+            names.add(step.page + "." + step.method)
+            names.update(step.locators)
+        with self._lock:
+            self._recorded[nodeid] = sorted(names)
+            self._tests[nodeid] = self._recorded[nodeid]
+
+    def forget(self, nodeid):
+        """
+        Forget what a test used, it will be selected by every change until it is recorded again
+        :param nodeid: pytest id of the test
+        """
+        with self._lock:
+            self._recorded[nodeid] = None
+            self._tests.pop(nodeid, None)
+
+    def save(self):
+        """
+        Merge the tests recorded by this process into the map file, tests that did not run keep what they had
+        """
+        with self._lock:
+            if not self._recorded:
+                return
+            merged = self._read_file()
+            for nodeid, names in self._recorded.items():
+                if names is None:
+                    merged.pop(nodeid, None)
+                else:
+                    merged[nodeid] = names
+            self._recorded = {}
+
+            temp_path = self.path + "." + str(os.getpid()) + ".tmp"
+            with open(temp_path, "w") as map_file:
+                json.dump(merged, map_file, indent=1, sort_keys=True)
+            os.replace(temp_path, self.path)
+
+    def select(self, nodeids, changed_names, changed_test_files):
+        """
+        Pick the tests affected by a change
+        :param nodeids: pytest ids of the collected tests
+        :param changed_names: set of changed page steps and locators, ex: MortgageCalcPage._RATE_INPUT. A bare class
+        name (ex: MortgageCalcPage) matches everything on that class
+        :param changed_test_files: set of changed test modules, relative to the root of the project
+        :return: the set of test ids that should run
+        """
+        changed_classes = {name for name in changed_names if "." not in name}
+        selected = set()
+        for nodeid in nodeids:
+            used = self._tests.get(nodeid)
+            # never ran before, or its module changed, so we cannot know what it uses
+            if used is None or nodeid.split("::")[0] in changed_test_files:
+                selected.add(nodeid)
+            elif any(name in changed_names or name.split(".")[0] in changed_classes for name in used):
+                selected.add(nodeid)
+        return selected
+
+
+def changed_lines(base="HEAD"):
+    """
+    Ask git which lines changed since a commit, including uncommitted changes
+    :param base: git revision to compare against
+    :return: dict of file path (relative to the root of the project) to a set of changed line numbers in the current
+    version of the file
+    """
+    try:
+        diff = subprocess.run(["git", "diff", "-U0", "--no-color", base, "--", "."], cwd=ROOT_DIR, check=True,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True).stdout
+    except FileNotFoundError:
+        raise pytest.UsageError("--impact-select needs git, and git was not found")
+    except subprocess.CalledProcessError as e:
+        raise pytest.UsageError("--impact-select could not diff against [" + base + "]: " + e.stderr.strip())
+    return parse_diff(diff)
+
+
+def parse_diff(diff):
+    """
+    :param diff: output of git diff -U0
+    :return: dict of file path to a set of changed line numbers in the new version of the file, see changed_lines
+    """
+    lines = {}
+    current_file = None
+    for line in diff.splitlines():
+        if line.startswith("+++ "):
+            current_file = None if line[4:] == "/dev/null" else line[6:]
+            if current_file is not None:
+                lines.setdefault(current_file, set())
+        elif line.startswith("@@") and current_file is not None:
+            match = _HUNK_HEADER.match(line)
+            start = int(match.group(1))
+            count = 1 if match.group(2) is None else int(match.group(2))
+            if count == 0:
+                # only lines were removed, blame the lines around where they were
+                lines[current_file].update((start, start + 1))
+            else:
+                lines[current_file].update(range(start, start + count))
+    return lines
+
+
+def names_for_lines(source, line_numbers):
+    """
+    Map changed lines of a page module to the page methods and locators they are part of
+    :param source: python source of the module
+    :param line_numbers: set of changed line numbers
+    :return: set of names. A class name on its own when the change is in a page class but not in a public method or
+    locator (private methods are not recorded as steps), and every class of the module when the change is outside of
+    any page class (ex: an import, or the LoanPrograms enum)
+    """
+    tree = ast.parse(source)
+    classes = [node for node in tree.body if isinstance(node, ast.ClassDef)]
+    names = set()
+    for line_number in line_numbers:
+        owner = next((klass for klass in classes if _first_line(klass) <= line_number <= klass.end_lineno), None)
+        # page classes are the ones extending another page, ex: class MortgageCalcPage(ZillowBasePage)
+        if owner is None or not any(isinstance(base, ast.Name) and base.id.endswith("Page") for base in owner.bases):
+            names.update(klass.name for klass in classes)
+            continue
+
+        member = next((node for node in owner.body if _first_line(node) <= line_number <= node.end_lineno), None)
+        if isinstance(member, (ast.FunctionDef, ast.AsyncFunctionDef)) and \
+                (member.name == "__init__" or not member.name.startswith("_")):
+            names.add(owner.name + "." + member.name)
+        elif isinstance(member, ast.Assign) and len(member.targets) == 1 and isinstance(member.targets[0], ast.Name):
+            names.add(owner.name + "." + member.targets[0].id)
+        elif not (isinstance(member, ast.Expr) and isinstance(member.value, ast.Constant)):
+            # the class statement, a private method or something else we cannot narrow down, anything on the class
+            # may be affected. Docstrings and string comments affect nothing
+            names.add(owner.name)
+    return names
+
+
+def _first_line(node):
+    """
+    :param node: an ast node
+    :return: the first line of the node, including any decorators
+    """
+    return min([node.lineno] + [decorator.lineno for decorator in getattr(node, "decorator_list", [])])
+
+
+def analyze_changes(base="HEAD", extra_changes=()):
+    """
+    Work out what changed since a commit
+    :param base: git revision to compare against
+    :param extra_changes: names (ex: MortgageCalcPage._PAYMENT_TEXT) or files given by hand, added to what git reports
+    :return: (changed names, changed test files, True if a change could affect any test)
+    """
+    changed_names = set()
+    changed_test_files = set()
+    affects_everything = False
+
+    files = {}
+    for change in extra_changes:
+        if change.endswith(".py"):
+            files[change.replace(os.sep, "/")] = None
+        else:
+            changed_names.add(change)
+    for path, line_numbers in changed_lines(base).items():
+        files[path] = line_numbers
+
+    for path, line_numbers in files.items():
+        if not path.endswith(".py"):
+            continue
+        if os.path.basename(path).startswith("test_"):
+            changed_test_files.add(path)
+        elif path.startswith(_PAGES_DIR) and path not in _SHARED_PAGE_MODULES \
+                and os.path.exists(os.path.join(ROOT_DIR, path)):
+            with open(os.path.join(ROOT_DIR, path)) as source_file:
+                source = source_file.read()
+            if line_numbers is None:
+                line_numbers = set(range(1, source.count("\n") + 2))
+            changed_names.update(names_for_lines(source, line_numbers))
+        else:
+            affects_everything = True
+    return changed_names, changed_test_files, affects_everything
@@ -0,0 +1,34 @@
+"""
+Static python file, the loan programs the mortgage calculator offers
+
+Kept out of the page objects so the mortgage math, and the tests that only need the programs, do not import selenium
+"""
+
+from enum import Enum
+
+
+class LoanPrograms(Enum):
+    """
+    A class to represent the loan programs that are available in the web select element
+
+    Each value is (html value, term in years, years the rate is fixed for). An ARM's term is the full length of the
+    loan, its rate is only fixed for the first few years (see calculate_arm_payments in mortgage_math.py)
+
+    Note to developer, if you change the structure of this enum, make sure you fix all references to it, there are some
+    references to the 0th, 1st and 2nd indexes of the tuple values
+    """
+    FIXED_30 = ("Fixed30Year", 30, 30)
+    FIXED_15 = ("Fixed15Year", 15, 15)
+    ARM_5 = ("ARM5", 30, 5)
+
+    @staticmethod
+    def lookup(html_value):
+        """
+        If you have an html value and you need the corresponding enum, use this static helper method
+        :param html_value: the html "value" attribute on a <option> that you would like the enum for
+        :return: The enum that represents that value
+        """
+        for program in LoanPrograms:
+            if program.value[0] == html_value:
+                return program
+        assert False, "Failed to find [" + html_value + "] in LoanPrograms enum, please add a new enum value"
@@ -0,0 +1,315 @@
+"""
+Locator profiler, times every Locator declared on our Page classes against a loaded page, checks that each one
+resolves to exactly one element, and suggests faster CSS selectors that find the same element uniquely.
+
+Results are appended as one JSON line per run to a report file so the cost of our locators can be tracked over time.
+
+Run it from the root of the project with:
+    python -m utilities.locator_profiler
+"""
+
+import argparse
+import datetime
+import json
+import os
+import statistics
+import time
+
+from selenium_util.locator_js import FIND_ALL_JS
+
+# where the report is appended to by default, relative to the root of the project
+DEFAULT_REPORT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test_output",
+                                   "locator_profile.jsonl")
+
+# Times each strategy inside the browser, arguments[0] is a list of [by, value] pairs, arguments[1] the iteration count.
+# Returns the average microseconds per lookup for each pair
+_TIME_IN_BROWSER_JS = FIND_ALL_JS + """
+var pairs = arguments[0], iterations = arguments[1], results = [];
+for (var p = 0; p < pairs.length; p++) {
+    var start = performance.now();
+    for (var i = 0; i < iterations; i++) {
+        findAll(pairs[p][0], pairs[p][1]);
+    }
+    results.push(((performance.now() - start) * 1000) / iterations);
+}
+return results;
+"""
+
+# Builds candidate CSS selectors for the first element a locator finds and keeps the ones that find only that element.
+# arguments[0] and arguments[1] are the by and value of the locator
+_SUGGEST_SELECTORS_JS = FIND_ALL_JS + """
+var found = findAll(arguments[0], arguments[1]);
+if (found.length === 0) {
+    return [];
+}
+var element = found[0];
+var tag = element.tagName.toLowerCase();
+var candidates = [];
+if (element.id) {
+    candidates.push("#" + CSS.escape(element.id));
+}
+["data-testid", "data-test", "name", "aria-label", "title", "type", "role", "y"].forEach(function (attribute) {
+    var value = element.getAttribute(attribute);
+    if (value) {
+        var selector = "[" + attribute + "=\\"" + CSS.escape(value) + "\\"]";
+        candidates.push(selector);
+        candidates.push(tag + selector);
+    }
+});
+Array.prototype.forEach.call(element.classList, function (className) {
+    candidates.push(tag + "." + CSS.escape(className));
+});
+var unique = [];
+candidates.forEach(function (selector) {
+    var matches;
+    try {
+        matches = document.querySelectorAll(selector);
+    } catch (e) {
+        return;
+    }
+    if (matches.length === 1 && matches[0] === element && unique.indexOf(selector) === -1) {
+        unique.push(selector);
+    }
+});
+return unique;
+"""
+
+
+class LocatorProfile(object):
+    """
+    The result of profiling a single locator
+
+    ...
+
+    Attributes
+    ----------
+    name : str
+        qualified name of the locator, ex: MortgageCalcPage._RATE_INPUT
+    by : str
+        the selenium By strategy of the locator
+    find_with : str
+        the value used with the By strategy
+    match_count : int
+        how many elements the locator found, anything other than 1 is a problem
+    round_trip_ms : float
+        median milliseconds for a driver.find_elements call using this locator, includes the WebDriver round trip
+    in_browser_us : float
+        average microseconds for the lookup itself, measured inside the browser
+    suggestions : list
+        dicts describing unique CSS selectors that are faster in the browser than this locator, fastest first
+
+    Methods
+    -------
+    is_unique
+        True if the locator found exactly one element
+    to_dict
+        Return this profile as a JSON serializable dict
+    """
+
+    def __init__(self, name, by, find_with, match_count, round_trip_ms, in_browser_us, suggestions):
+        """
+        Create a LocatorProfile
+        :param name: qualified name of the locator
+        :param by: the selenium By strategy of the locator
+        :param find_with: the value used with the By strategy
+        :param match_count: how many elements the locator found
+        :param round_trip_ms: median milliseconds for a driver.find_elements call
+        :param in_browser_us: average microseconds for the lookup measured inside the browser
+        :param suggestions: faster unique CSS selectors, fastest first
+        """
+        self.name = name
+        self.by = by
+        self.find_with = find_with
+        self.match_count = match_count
+        self.round_trip_ms = round_trip_ms
+        self.in_browser_us = in_browser_us
+        self.suggestions = suggestions
+
+    def is_unique(self):
+        """
+        :return: True if the locator found exactly one element
+        """
+        return self.match_count == 1
+
+    def to_dict(self):
+        """
+        :return: this profile as a JSON serializable dict
+        """
+        return {
+            "name": self.name,
+            "by": self.by,
+            "find_with": self.find_with,
+            "match_count": self.match_count,
+            "unique": self.is_unique(),
+            "round_trip_ms": round(self.round_trip_ms, 3),
+            "in_browser_us": round(self.in_browser_us, 3),
+            "suggestions": self.suggestions,
+        }
+
+
+class LocatorProfiler(object):
+    """
+    Times the locators of page classes against whatever page the driver currently has loaded
+
+    ...
+
+    Attributes
+    ----------
+    driver : webdriver
+        webdriver that has the page to profile loaded
+    repeats : int
+        how many driver.find_elements calls are timed per locator
+    in_browser_iterations : int
+        how many lookups are averaged when timing inside the browser
+
+    Methods
+    -------
+    profile_page_class(self, page_class)
+        Profile every locator declared on a page class (including inherited locators)
+    profile_locator(self, name, locator)
+        Profile a single locator
+    """
+
+    def __init__(self, driver, repeats=5, in_browser_iterations=200):
+        """
+        Create a LocatorProfiler
+        :param driver: webdriver that has the page to profile loaded
+        :param repeats: how many driver.find_elements calls are timed per locator
+        :param in_browser_iterations: how many lookups are averaged when timing inside the browser
+        """
+        self.driver = driver
+        self.repeats = repeats
+        self.in_browser_iterations = in_browser_iterations
+
+    def profile_page_class(self, page_class):
+        """
+        Profile every locator declared on a page class, including inherited locators
+        :param page_class: a Page subclass
+        :return: a list of LocatorProfile objects
+        """
+        return [self.profile_locator(locator.name or page_class.__name__ + "." + attribute_name, locator)
+                for attribute_name, locator in sorted(page_class.get_declared_locators().items())]
+
+    def profile_locator(self, name, locator):
+        """
+        Profile a single locator, time it, count its matches and look for faster unique selectors
+        :param name: name to report the locator under
+        :param locator: the Locator to profile
+        :return: a LocatorProfile
+        """
+        timings = []
+        match_count = 0
+        for _ in range(self.repeats):
+            start = time.perf_counter()
+            match_count = len(self.driver.find_elements(*locator.as_args()))
+            timings.append((time.perf_counter() - start) * 1000)
+
+        candidates = []
+        # an ID lookup is already as fast as it gets, nothing to suggest so no need to ask the browser
+        if match_count > 0 and locator.by != "id":
+            candidates = self.driver.execute_script(_SUGGEST_SELECTORS_JS, locator.by, locator.find_with)
+
+        pairs = [[locator.by, locator.find_with]] + [["css selector", candidate] for candidate in candidates]
+        in_browser = self.driver.execute_script(_TIME_IN_BROWSER_JS, pairs, self.in_browser_iterations)
+
+        suggestions = sorted(
+            [{"css_selector": candidate, "in_browser_us": round(cost, 3)}
+             for candidate, cost in zip(candidates, in_browser[1:]) if cost < in_browser[0]],
+            key=lambda suggestion: suggestion["in_browser_us"])
+
+        return LocatorProfile(name, locator.by, locator.find_with, match_count, statistics.median(timings),
+                              in_browser[0], suggestions)
+
+
+def iter_page_classes():
+    """
+    Import every page in the page registry and return every Page subclass that exists
+    :return: a list of Page subclasses, sorted by name
+    """
+    from pages.page import Page
+    from pages.registry import PAGE_MODULES, page_class
+
+    for name in PAGE_MODULES:
+        page_class(name)
+
+    found = []
+    pending = list(Page.__subclasses__())
+    while pending:
+        klass = pending.pop()
+        if klass not in found:
+            found.append(klass)
+            pending.extend(klass.__subclasses__())
+    return sorted(found, key=lambda klass: klass.__name__)
+
+
+def write_report(profiles_by_page, report_path=DEFAULT_REPORT_PATH):
+    """
+    Append the results of a profiling run to the report as a single JSON line
+    :param profiles_by_page: dict of page class name to a list of LocatorProfile objects
+    :param report_path: path of the report file
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+    run = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "pages": {page_name: [profile.to_dict() for profile in profiles]
+                  for page_name, profiles in profiles_by_page.items()},
+    }
+    with open(report_path, "a") as report:
+        report.write(json.dumps(run, sort_keys=True) + "\n")
+
+
+def print_summary(profiles_by_page):
+    """
+    Print a human readable summary of a profiling run
+    :param profiles_by_page: dict of page class name to a list of LocatorProfile objects
+    """
+    for page_name, profiles in profiles_by_page.items():
+        print(page_name)
+        for profile in sorted(profiles, key=lambda p: p.in_browser_us, reverse=True):
+            status = "OK" if profile.is_unique() else "MATCHED " + str(profile.match_count)
+            print("  {:<55} {:>9.1f}us {:>8.2f}ms  {}".format(profile.name, profile.in_browser_us,
+                                                              profile.round_trip_ms, status))
+            for suggestion in profile.suggestions[:3]:
+                print("      try " + suggestion["css_selector"] + " ({:.1f}us)".format(suggestion["in_browser_us"]))
+
+
+def main():
+    """
+    Load each page we can reach, profile the locators of the page classes that describe it and append a report
+    """
+    parser = argparse.ArgumentParser(description="Profile the locators declared on our page objects")
+    parser.add_argument("--report", default=DEFAULT_REPORT_PATH, help="file to append the JSON line report to")
+    parser.add_argument("--repeats", type=int, default=5, help="driver.find_elements calls timed per locator")
+    args = parser.parse_args()
+
+    from pages.mortage_calculator_page import MortgageCalcPage
+    from pages.mortgage_rates_page import MortgageRatesPage
+    from test_cases.testcase import new_chrome_driver, start
+
+    driver = new_chrome_driver()
+    try:
+        profiler = LocatorProfiler(driver, repeats=args.repeats)
+        profiles_by_page = {}
+
+        # ZillowHomePage cannot be loaded because of the human check (see zillow_base_page.py), the locators it
+        # inherits are profiled as part of the pages below
+        calc_page = start(driver).click_mortgage_calculator_link()
+        profiles_by_page[MortgageCalcPage.__name__] = profiler.profile_page_class(MortgageCalcPage)
+
+        calc_page.click_see_current_rates()
+        profiles_by_page[MortgageRatesPage.__name__] = profiler.profile_page_class(MortgageRatesPage)
+
+        unreached = [klass.__name__ for klass in iter_page_classes()
+                     if klass.__name__ not in profiles_by_page and klass.get_declared_locators()
+                     and not any(issubclass(reached, klass) for reached in (MortgageCalcPage, MortgageRatesPage))]
+        if unreached:
+            print("WARNING, these pages were not loaded and not profiled: " + ", ".join(unreached))
+
+        print_summary(profiles_by_page)
+        write_report(profiles_by_page, args.report)
+    finally:
+        driver.quit()
+
+
+if __name__ == "__main__":
+    main()
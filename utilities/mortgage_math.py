@@ -1,7 +1,11 @@
 """
 Static python file, contains math functions around mortgages
+
+The batch functions work on numpy arrays so thousands of scenarios can be calculated at once
 """
 
+import numpy as np
+
 
 def calculate_down_payment(price, percent):
     """
@@ -20,7 +24,8 @@ def calculate_payment(home_price, down_payment, interest_rate, term):
     :param down_payment: down payment amount
     :param interest_rate: interest rate of the loan
     :param term: LoanProgram object indicating what kind of mortgage this is
-    :return: the monthly payment for this loan, given the parameters
+    :return: the monthly payment for this loan, given the parameters. For an ARM this is the payment during the fixed
+    rate years, see calculate_arm_payments for the payments after that
     """
     principal = home_price - down_payment
     # Enum value of index 1 is the amount of years, so we multiply by 12 for the total number of payments over the life
@@ -39,3 +44,169 @@ def calculate_payment(home_price, down_payment, interest_rate, term):
            (((1 + monthly_rate) ** payment_count) - 1)
 
 
+def max_home_prices(payments, interest_rate, term, down_payment=0, down_payment_percent=None):
+    """
+    Inverse of calculate_payment, the most expensive home each monthly payment can buy (closed form, vectorized)
+    :param payments: monthly principal and interest payments, number or array
+    :param interest_rate: interest rate of the loan in percent, number or array
+    :param term: LoanProgram object indicating what kind of mortgage this is
+    :param down_payment: down payment amount, number or array, ignored if down_payment_percent is given
+    :param down_payment_percent: down payment as a percent of the price, number or array
+    :return: array of home prices
+    """
+    payment_count = term.value[1] * 12
+    principal = np.asarray(payments, dtype=float) / amortized_payments(1, interest_rate, payment_count)
+    if down_payment_percent is not None:
+        return principal / (1 - np.asarray(down_payment_percent, dtype=float) / 100)
+    return principal + down_payment
+
+
+def implied_interest_rates(payments, principals, term, tolerance=1e-12, max_iterations=100):
+    """
+    Inverse of calculate_payment for the rate, the interest rate that makes each principal cost each monthly payment.
+    There is no closed form, so Newton's method is run on every entry at once.
+
+    The payment is an increasing, convex function of the rate, so starting above the answer (payment / principal is
+    always above the monthly rate) every Newton step moves down towards it without overshooting
+
+    :param payments: monthly principal and interest payments, number or array
+    :param principals: amounts borrowed, number or array
+    :param term: LoanProgram object indicating what kind of mortgage this is
+    :param tolerance: stop once every monthly rate moves less than this in a step
+    :param max_iterations: most Newton steps to take
+    :return: array of yearly interest rates in percent, nan where the payment cannot pay the principal off
+    """
+    payments, principals = np.broadcast_arrays(np.asarray(payments, dtype=float),
+                                               np.asarray(principals, dtype=float))
+    payment_count = term.value[1] * 12
+    zero_rate_payments = principals / payment_count
+
+    monthly_rate = payments / principals
+    active = payments > zero_rate_payments * (1 + 1e-12)
+    for _ in range(max_iterations):
+        if not active.any():
+            break
+        rate = monthly_rate[active]
+        principal = principals[active]
+        # expm1 and log1p keep (1 + rate) ** payment_count - 1 accurate for tiny rates
+        growth_less_one = np.expm1(payment_count * np.log1p(rate))
+        growth = growth_less_one + 1
+        value = principal * rate * growth / growth_less_one - payments[active]
+        slope = principal * (growth * growth_less_one - rate * payment_count * growth / (1 + rate)) / \
+            growth_less_one ** 2
+        step = value / slope
+        monthly_rate[active] = rate - step
+        active[active] = np.abs(step) > tolerance
+
+    # a payment of exactly principal / payment_count is a 0% loan, anything less never pays the loan off
+    monthly_rate = np.where(np.isclose(payments, zero_rate_payments, rtol=1e-12, atol=0), 0, monthly_rate)
+    monthly_rate = np.where(payments < zero_rate_payments * (1 - 1e-12), np.nan, monthly_rate)
+    return monthly_rate * 12 * 100
+
+
+def calculate_arm_payments(principal, initial_rate, index_paths, margin, fixed_years=5, adjustment_months=12,
+                           initial_cap=2, periodic_cap=2, lifetime_cap=5, rate_floor=None, term_years=30):
+    """
+    Calculate the monthly rates and payments of an adjustable rate mortgage (ARM), for many index paths at once.
+
+    The rate is fixed for the first fixed_years, then adjusts every adjustment_months to the index plus the margin,
+    limited by the caps. At each adjustment the payment is re-amortized over the months that are left. The loop is over
+    the adjustment dates (25 for a 5/1 ARM), every path is calculated at the same time
+
+    :param principal: amount borrowed, a number or an array with one value per path
+    :param initial_rate: interest rate (percent) for the fixed years, a number or an array with one value per path
+    :param index_paths: index rate (percent) at each adjustment date, shape (paths, adjustments), or (adjustments,) for
+    a single path. Needs at least one column per adjustment of the loan
+    :param margin: percent added to the index to get the fully indexed rate
+    :param fixed_years: years the initial rate is fixed for, ex: 5 for a 5/1 ARM
+    :param adjustment_months: months between adjustments, ex: 12 for a 5/1 ARM
+    :param initial_cap: most the rate can move at the first adjustment, in percent
+    :param periodic_cap: most the rate can move at each later adjustment, in percent
+    :param lifetime_cap: most the rate can ever be above (or below) the initial rate, in percent
+    :param rate_floor: lowest the rate can ever be, defaults to the margin
+    :param term_years: length of the loan in years
+    :return: (rates, payments) arrays of shape (paths, months), the rate (percent) and payment of every month
+    """
+    index_paths = np.atleast_2d(np.asarray(index_paths, dtype=float))
+    path_count = index_paths.shape[0]
+    term_months = term_years * 12
+    fixed_months = fixed_years * 12
+    adjustment_count = int(np.ceil((term_months - fixed_months) / adjustment_months))
+    if index_paths.shape[1] < adjustment_count:
+        raise ValueError("index_paths needs " + str(adjustment_count) + " adjustments per path, it has " +
+                         str(index_paths.shape[1]))
+
+    initial_rate = np.broadcast_to(np.asarray(initial_rate, dtype=float), (path_count,))
+    balance = np.broadcast_to(np.asarray(principal, dtype=float), (path_count,)).copy()
+    lowest_rate = np.maximum(margin if rate_floor is None else rate_floor, initial_rate - lifetime_cap)
+    highest_rate = initial_rate + lifetime_cap
+
+    rates = np.empty((path_count, term_months))
+    payments = np.empty((path_count, term_months))
+
+    rate = initial_rate.copy()
+    month = 0
+    for adjustment in range(adjustment_count + 1):
+        if adjustment > 0:
+            cap = initial_cap if adjustment == 1 else periodic_cap
+            fully_indexed = index_paths[:, adjustment - 1] + margin
+            rate = np.clip(np.clip(fully_indexed, rate - cap, rate + cap), lowest_rate, highest_rate)
+
+        months = min(fixed_months if adjustment == 0 else adjustment_months, term_months - month)
+        payment = amortized_payments(balance, rate, term_months - month)
+        rates[:, month:month + months] = rate[:, None]
+        payments[:, month:month + months] = payment[:, None]
+        balance = remaining_balances(balance, rate, payment, months)
+        month += months
+
+    return rates, payments
+
+
+def amortized_payments(principal, interest_rate, payment_count):
+    """
+    Vectorized monthly payment that pays off a balance in payment_count months
+    :param principal: balance to pay off, number or array
+    :param interest_rate: yearly interest rate in percent, number or array
+    :param payment_count: number of monthly payments, number or array
+    :return: array of monthly payments
+    """
+    principal = np.asarray(principal, dtype=float)
+    monthly_rate = np.asarray(interest_rate, dtype=float) / 100 / 12
+    growth = (1 + monthly_rate) ** payment_count
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payment = principal * monthly_rate * growth / (growth - 1)
+    # a rate of 0 is a special case, the formula above divides by 0
+    return np.where(monthly_rate == 0, principal / payment_count, payment)
+
+
+def remaining_balances(principal, interest_rate, payment, months):
+    """
+    Vectorized balance left after making a monthly payment for a number of months
+    :param principal: starting balance, number or array
+    :param interest_rate: yearly interest rate in percent, number or array
+    :param payment: monthly payment, number or array
+    :param months: how many payments were made
+    :return: array of balances, 0 once the loan is paid off
+    """
+    principal = np.asarray(principal, dtype=float)
+    monthly_rate = np.asarray(interest_rate, dtype=float) / 100 / 12
+    growth = (1 + monthly_rate) ** months
+    with np.errstate(divide="ignore", invalid="ignore"):
+        balance = principal * growth - payment * (growth - 1) / monthly_rate
+    balance = np.where(monthly_rate == 0, principal - payment * months, balance)
+    return np.maximum(balance, 0)
+
+
+def random_index_paths(path_count, adjustment_count, start_index, volatility=0.75, seed=None):
+    """
+    Random walk index paths for Monte Carlo checks of ARM scenarios
+    :param path_count: how many paths to make
+    :param adjustment_count: how many adjustment dates each path has
+    :param start_index: index rate (percent) today
+    :param volatility: standard deviation (percent) of the change between two adjustments
+    :param seed: seed for repeatable paths
+    :return: array of shape (path_count, adjustment_count), never below 0
+    """
+    generator = np.random.default_rng(seed)
+    steps = generator.normal(0, volatility, (path_count, adjustment_count))
+    return np.maximum(start_index + np.cumsum(steps, axis=1), 0)
@@ -0,0 +1,66 @@
+"""
+Static python file, formats numbers the way the mortgage calculator page displays them
+
+The page formats with javascript's Intl.NumberFormat, which rounds halves away from zero (1,234.5 shows as 1,235) where
+python's "{:,.0f}" rounds halves to even (1,234.5 becomes 1,234). On top of that the page does its own floating point
+math, so a value we calculate within a fraction of a cent of .5 can round either way on the page. Those values are
+"ambiguous", and either rounding has to be accepted for them
+"""
+
+import decimal
+
+import numpy as np
+
+# how close (in dollars) to a half a value has to be for its rounding on the page to be unpredictable
+DEFAULT_AMBIGUITY_TOLERANCE = 0.005
+
+
+def format_number_like_page(value):
+    """
+    Format a number the way the page displays amounts in inputs, ex: 1,235
+    :param value: number to format
+    :return: the value rounded half away from zero to a whole number, with thousands separators
+    """
+    # Decimal(float) is the exact binary value of the float, which is what the browser rounds
+    rounded = int(decimal.Decimal(value).quantize(decimal.Decimal(1), rounding=decimal.ROUND_HALF_UP))
+    return "{:,}".format(rounded)
+
+
+def format_currency_like_page(value):
+    """
+    Format a number the way the page displays dollar amounts, ex: $1,235
+    :param value: number to format
+    :return: the value rounded half away from zero to whole dollars, with a $ and thousands separators
+    """
+    formatted = format_number_like_page(value)
+    if formatted.startswith("-"):
+        return "-$" + formatted[1:]
+    return "$" + formatted
+
+
+def rounding_ambiguous(values, tolerance=DEFAULT_AMBIGUITY_TOLERANCE):
+    """
+    Find the values whose rounding on the page cannot be predicted, vectorized so whole batches of generated scenarios
+    can be checked (and skipped or handled specially) before they ever reach a browser
+    :param values: number or array of numbers
+    :param tolerance: how close (in dollars) to a half a value has to be to be ambiguous
+    :return: boolean array, True where the value is ambiguous
+    """
+    fractions = np.mod(np.abs(np.asarray(values, dtype=float)), 1)
+    return np.abs(fractions - 0.5) <= tolerance
+
+
+def acceptable_displays(value, formatter=format_currency_like_page, tolerance=DEFAULT_AMBIGUITY_TOLERANCE):
+    """
+    Every way the page could display a value, one for most values and two for an ambiguous value
+    :param value: number the page is expected to show
+    :param formatter: format_currency_like_page or format_number_like_page
+    :param tolerance: how close (in dollars) to a half a value has to be to be ambiguous
+    :return: a list of displays, the one we expect most first
+    """
+    displays = [formatter(value)]
+    if rounding_ambiguous(value, tolerance):
+        for neighbour in (value - tolerance * 2, value + tolerance * 2):
+            if formatter(neighbour) not in displays:
+                displays.append(formatter(neighbour))
+    return displays
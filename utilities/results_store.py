@@ -0,0 +1,197 @@
+"""
+SQLite backed history of test outcomes and page step timings, used to find slow steps, duration trends and flaky tests
+
+Writes are buffered in memory and committed in batches, and the database runs in WAL mode with a busy timeout so that
+several pytest-xdist workers can write to the same file at once
+"""
+
+import os
+import sqlite3
+import threading
+
+# Default location of the database, at the root of the project
+DEFAULT_RESULTS_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "test_output", "results.sqlite")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS test_results (
+    run_id TEXT NOT NULL,
+    worker TEXT NOT NULL,
+    nodeid TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    duration REAL NOT NULL,
+    browser TEXT,
+    started_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS test_results_nodeid ON test_results (nodeid, started_at);
+
+CREATE TABLE IF NOT EXISTS step_results (
+    run_id TEXT NOT NULL,
+    worker TEXT NOT NULL,
+    nodeid TEXT NOT NULL,
+    page TEXT NOT NULL,
+    method TEXT NOT NULL,
+    locators TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    outcome TEXT NOT NULL,
+    browser TEXT,
+    started_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS step_results_method ON step_results (page, method);
+"""
+
+
+class ResultsStore(object):
+    """
+    Local store of test and step results
+
+    ...
+
+    Attributes
+    ----------
+    path : str
+        path of the SQLite database file
+    batch_size : int
+        how many pending rows trigger a commit
+
+    Methods
+    -------
+    add_test_result(self, run_id, worker, nodeid, outcome, duration, browser, started_at)
+        Queue a test result to be written
+    add_step_result(self, run_id, worker, nodeid, step, browser)
+        Queue a step result to be written
+    flush(self)
+        Write every queued row in a single transaction
+    close(self)
+        Flush and close the database
+    slowest_steps(self, limit=20)
+        Page methods with the highest average duration
+    duration_trend(self, nodeid, limit=50)
+        Most recent durations and outcomes of a test
+    flake_rates(self, min_runs=5)
+        Tests that have both passed and failed, with how often they fail
+    """
+
+    def __init__(self, path=DEFAULT_RESULTS_DB, batch_size=500):
+        """
+        Create a ResultsStore, the database is opened the first time it is needed
+        :param path: path of the SQLite database file
+        :param batch_size: how many pending rows trigger a commit
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self._connection = None
+        self._pending_tests = []
+        self._pending_steps = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        """
+        :return: the open connection, opening it (and creating the schema) if needed
+        """
+        if self._connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            # timeout makes a writer wait for another worker's transaction instead of failing with "database is locked"
+            self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(_SCHEMA)
+        return self._connection
+
+    def add_test_result(self, run_id, worker, nodeid, outcome, duration, browser, started_at):
+        """
+        Queue a test result to be written
+        :param run_id: id shared by every worker of a test session
+        :param worker: id of the worker process, ex: gw0
+        :param nodeid: pytest id of the test
+        :param outcome: passed, failed or skipped
+        :param duration: seconds the test took
+        :param browser: browser name and version, None if the test did not use one
+        :param started_at: epoch seconds the test started
+        """
+        with self._lock:
+            self._pending_tests.append((run_id, worker, nodeid, outcome, duration, browser, started_at))
+            pending = len(self._pending_tests) + len(self._pending_steps)
+        if pending >= self.batch_size:
+            self.flush()
+
+    def add_step_result(self, run_id, worker, nodeid, step, browser):
+        """
+        Queue a step result to be written
+        :param run_id: id shared by every worker of a test session
+        :param worker: id of the worker process, ex: gw0
+        :param nodeid: pytest id of the test the step ran in
+        :param step: StepRecord of the step
+        :param browser: browser name and version, None if the test did not use one
+        """
+        with self._lock:
+            self._pending_steps.append((run_id, worker, nodeid, step.page, step.method, ",".join(step.locators),
+                                        step.depth, step.duration, step.outcome, browser, step.started))
+            pending = len(self._pending_tests) + len(self._pending_steps)
+        if pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write every queued row in a single transaction
+        """
+        with self._lock:
+            tests, self._pending_tests = self._pending_tests, []
+            steps, self._pending_steps = self._pending_steps, []
+            if not tests and not steps:
+                return
+            connection = self._connect()
+            with connection:
+                connection.executemany("INSERT INTO test_results VALUES (?, ?, ?, ?, ?, ?, ?)", tests)
+                connection.executemany("INSERT INTO step_results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", steps)
+
+    def close(self):
+        """
+        Flush and close the database
+        """
+        self.flush()
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _query(self, sql, parameters=()):
+        """
+        :return: every row of a query, as a list of dicts
+        """
+        with self._lock:
+            cursor = self._connect().execute(sql, parameters)
+            columns = [description[0] for description in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def slowest_steps(self, limit=20):
+        """
+        Page methods with the highest average duration
+        :param limit: how many to return
+        :return: list of dicts with page, method, calls, avg_duration and max_duration, slowest first
+        """
+        return self._query("SELECT page, method, COUNT(*) AS calls, AVG(duration) AS avg_duration, "
+                           "MAX(duration) AS max_duration FROM step_results GROUP BY page, method "
+                           "ORDER BY avg_duration DESC LIMIT ?", (limit,))
+
+    def duration_trend(self, nodeid, limit=50):
+        """
+        Most recent durations and outcomes of a test
+        :param nodeid: pytest id of the test
+        :param limit: how many runs to return
+        :return: list of dicts with started_at, duration, outcome and browser, oldest first
+        """
+        rows = self._query("SELECT started_at, duration, outcome, browser FROM test_results WHERE nodeid = ? "
+                           "ORDER BY started_at DESC LIMIT ?", (nodeid, limit))
+        return list(reversed(rows))
+
+    def flake_rates(self, min_runs=5):
+        """
+        Tests that have both passed and failed, with how often they fail
+        :param min_runs: tests with fewer recorded runs than this are left out
+        :return: list of dicts with nodeid, runs, failures and flake_rate, flakiest first
+        """
+        return self._query("SELECT nodeid, COUNT(*) AS runs, SUM(outcome = 'failed') AS failures, "
+                           "AVG(outcome = 'failed') AS flake_rate FROM test_results WHERE outcome != 'skipped' "
+                           "GROUP BY nodeid HAVING runs >= ? AND failures > 0 AND failures < runs "
+                           "ORDER BY flake_rate DESC", (min_runs,))
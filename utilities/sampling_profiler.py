@@ -0,0 +1,232 @@
+"""
+Low overhead sampling profiler for one thread, to tell whether a slow test spends its time in our page object layer or
+waiting on the browser
+
+A background thread looks at the profiled thread's python stack every few milliseconds, nothing is added to the
+profiled code itself. Each sample is also checked against the profiled thread's CPU clock: a thread that used no CPU
+since the last sample was blocked, and if it was blocked inside selenium's remote connection it was waiting for a
+WebDriver HTTP response (chromedriver, and so the browser). Those samples are kept apart from the samples that ran
+python, as are other blocked samples (ex: the sleeps between polls of a wait)
+
+A thread running python holds the GIL, so the sampling thread gets to look at it later than it asked to. Each sample
+is weighted by the wall time since the previous one, so that busy stretches are not under counted against blocked ones
+
+The output is a collapsed stack file (one "frame;frame;frame milliseconds" line per distinct stack, what flamegraph.pl
+and speedscope read) and a summary attributing the time to the innermost pages.* and selenium_util.* frame it was
+spent in
+"""
+
+import collections
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Default location profiles are written to
+DEFAULT_PROFILE_DIR = os.path.join(ROOT_DIR, "test_output", "profiles")
+
+# packages samples are attributed to in the summary
+ATTRIBUTED_PACKAGES = ("pages", "selenium_util")
+
+# top level packages of this project, stacks are trimmed to start at the first of their frames so the pytest (or
+# runner) frames above the test are left out
+_PROJECT_PACKAGES = {"pages", "selenium_util", "utilities", "test_cases", "scenarios", "benchmarks"}
+
+# selenium sends every WebDriver command from this module
+_WEBDRIVER_CONNECTION_MODULE = "selenium.webdriver.remote.remote_connection"
+
+# a blocked thread whose innermost python frame is in one of these is waiting on the network
+_IO_MODULES = ("socket", "ssl", "selectors", "http.client", "urllib3")
+
+# markers added as the innermost frame of blocked samples
+WEBDRIVER_IO = "[webdriver http io]"
+BLOCKED = "[blocked]"
+
+# the kinds of samples, see the module docstring
+_KINDS = ("python", "webdriver_io", "blocked")
+
+
+def _cpu_clock(thread_id):
+    """
+    :param thread_id: threading ident of a thread
+    :return: clock id of the thread's CPU time, None where python cannot read another thread's CPU time (ex: Windows)
+    """
+    try:
+        return time.pthread_getcpuclockid(thread_id)
+    except (AttributeError, OSError):
+        return None
+
+
+class SamplingProfiler(object):
+    """
+    Samples the stack of one thread until stopped, see the module docstring
+
+    ...
+
+    Attributes
+    ----------
+    interval : float
+        seconds between samples
+    sample_count : int
+        samples taken so far
+
+    Methods
+    -------
+    start(self, thread_id=None)
+        Start sampling a thread
+    stop(self)
+        Stop sampling
+    collapsed(self)
+        The samples as collapsed stack lines
+    summary(self)
+        How much time of each kind was sampled, per pages.* and selenium_util.* frame
+    write(self, name, directory=DEFAULT_PROFILE_DIR)
+        Write the collapsed stacks and the summary
+    """
+
+    def __init__(self, interval=0.005):
+        """
+        Create a SamplingProfiler
+        :param interval: seconds between samples
+        """
+        self.interval = interval
+        self.sample_count = 0
+        # (code objects outermost first, blocked) -> seconds
+        self._seconds = collections.Counter()
+        # code object -> module name, code objects do not know their module and the frames do not outlive the sample
+        self._modules = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._thread_id = None
+
+    def start(self, thread_id=None):
+        """
+        Start sampling a thread
+        :param thread_id: threading ident of the thread to sample, defaults to the calling thread
+        :return: self
+        """
+        self._thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop sampling, waiting for the sampling thread to finish
+        :return: self
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def _sample(self):
+        """
+        Body of the sampling thread
+        """
+        clock = _cpu_clock(self._thread_id)
+        last_cpu = time.clock_gettime(clock) if clock is not None else None
+        # share of the wall time between two samples a blocked thread can have used the CPU for
+        blocked_share = 0.1
+        last_sample = time.perf_counter()
+
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            now = time.perf_counter()
+            elapsed, last_sample = now - last_sample, now
+            if frame is None:
+                continue
+            blocked = None
+            if clock is not None:
+                cpu = time.clock_gettime(clock)
+                # a thread is blocked if it used next to no CPU since the last sample
+                blocked = cpu - last_cpu < elapsed * blocked_share
+                last_cpu = cpu
+
+            codes = []
+            while frame is not None:
+                code = frame.f_code
+                if code not in self._modules:
+                    self._modules[code] = frame.f_globals.get("__name__", "?")
+                codes.append(code)
+                frame = frame.f_back
+            codes.reverse()
+            # without a CPU clock, a thread waiting on the network is told apart by where it is
+            if blocked is None:
+                blocked = self._modules[codes[-1]].startswith(_IO_MODULES)
+            self._seconds[tuple(codes), blocked] += elapsed
+            self.sample_count += 1
+
+    def _frames(self, codes, blocked):
+        """
+        Turn a raw sample into frame names, trimmed to start at our code, with the blocked marker added
+        :param codes: the sample's code objects, outermost first
+        :param blocked: True if the thread was blocked when the sample was taken
+        :return: (list of frame names, kind of sample)
+        """
+        modules = [self._modules[code] for code in codes]
+        start = next((index for index, module in enumerate(modules)
+                      if module.split(".")[0] in _PROJECT_PACKAGES and module != "conftest"), 0)
+        names = [module + ":" + getattr(code, "co_qualname", code.co_name)
+                 for module, code in zip(modules[start:], codes[start:])]
+        if not blocked:
+            return names, "python"
+
+        connection = [index for index, module in enumerate(modules[start:]) if module == _WEBDRIVER_CONNECTION_MODULE]
+        if connection:
+            # what http.client and urllib3 do while waiting does not matter, only that it is a WebDriver command
+            return names[:connection[-1] + 1] + [WEBDRIVER_IO], "webdriver_io"
+        return names + [BLOCKED], "blocked"
+
+    def collapsed(self):
+        """
+        :return: list of "frame;frame;frame milliseconds" lines, outermost frame first
+        """
+        stacks = collections.Counter()
+        for (codes, blocked), seconds in self._seconds.items():
+            stacks[";".join(self._frames(codes, blocked)[0])] += seconds
+        return [stack + " " + str(round(seconds * 1000)) for stack, seconds in sorted(stacks.items())
+                if round(seconds * 1000) > 0]
+
+    def summary(self):
+        """
+        :return: dict with the milliseconds of each kind (python, webdriver_io and blocked) in total, and per innermost
+        pages.* and selenium_util.* frame they were spent in ("(none)" for time outside of them)
+        """
+        totals = dict.fromkeys(_KINDS, 0.0)
+        attributed = {package: {} for package in ATTRIBUTED_PACKAGES}
+        for (codes, blocked), seconds in self._seconds.items():
+            names, kind = self._frames(codes, blocked)
+            totals[kind] += seconds * 1000
+            for package in ATTRIBUTED_PACKAGES:
+                owner = next((name for name in reversed(names) if name.startswith(package + ".")), "(none)")
+                kinds = attributed[package].setdefault(owner, dict.fromkeys(_KINDS, 0.0))
+                kinds[kind] += seconds * 1000
+
+        # most time first, rounded to whole milliseconds
+        for package in ATTRIBUTED_PACKAGES:
+            attributed[package] = {owner: {kind: round(ms) for kind, ms in kinds.items()} for owner, kinds in
+                                   sorted(attributed[package].items(), key=lambda item: -sum(item[1].values()))}
+        return dict(samples=self.sample_count, interval_ms=self.interval * 1000,
+                    **{kind + "_ms": round(ms) for kind, ms in totals.items()}, **attributed)
+
+    def write(self, name, directory=DEFAULT_PROFILE_DIR):
+        """
+        Write the collapsed stacks to <name>.collapsed and the summary to <name>.summary.json
+        :param name: name of the profile, ex: a test's node id
+        :param directory: directory to write to
+        :return: path of the collapsed stack file
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, re.sub(r"[^A-Za-z0-9_.-]+", "_", name))
+        with open(path + ".collapsed", "w") as collapsed_file:
+            collapsed_file.writelines(line + "\n" for line in self.collapsed())
+        with open(path + ".summary.json", "w") as summary_file:
+            json.dump(dict(self.summary(), name=name), summary_file, indent=1)
+        return path + ".collapsed"
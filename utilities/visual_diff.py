@@ -0,0 +1,404 @@
+"""
+Visual regression checks, compares element screenshots against baseline images
+
+Two measures are used, both vectorized with numpy so a comparison takes milliseconds and thousands of scenario
+screenshots can be checked against a baseline in batches:
+    - a perceptual hash (the low frequencies of a 32x32 DCT), which ignores anti-aliasing and sub-pixel rendering noise
+      but changes when the shapes in the image change
+    - a region diff, the pixels that changed by more than a tolerance, grouped into tiles so the report says where the
+      image changed and not only that it did
+
+Pillow is needed to decode and write PNGs, the math itself only needs numpy
+"""
+
+import functools
+import os
+import threading
+
+import numpy as np
+
+# Pillow is optional, it is only needed once screenshots are actually compared
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+# Default location of the baseline images, kept with the tests
+DEFAULT_BASELINE_DIR = os.path.join(ROOT_DIR, "test_cases", "visual_baselines")
+
+# Default location the images of failed comparisons are written to
+DEFAULT_OUTPUT_DIR = os.path.join(ROOT_DIR, "test_output", "visual")
+
+# side of the square the images are shrunk to before the DCT, and of the block of low frequencies kept from it
+_HASH_INPUT_SIZE = 32
+_HASH_SIZE = 8
+
+# how many bits are set in each byte value, counts bits on numpy older than 2.0, which has no np.bitwise_count
+_BYTE_BIT_COUNTS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+
+def load_png(png):
+    """
+    Decode a PNG
+    :param png: PNG bytes, ex: from an element screenshot
+    :return: uint8 array of shape (height, width, 3)
+    """
+    if Image is None:
+        raise ImportError("Visual checks need Pillow to decode screenshots, install it with: python -m pip install "
+                          "Pillow")
+    import io
+    with Image.open(io.BytesIO(png)) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+@functools.lru_cache(maxsize=64)
+def _area_weights(output_size, input_size):
+    """
+    Matrix that shrinks a length of input_size pixels to output_size by averaging the pixels each output covers, with
+    partial pixels weighted by how much of them is covered
+    :param output_size: length after shrinking
+    :param input_size: length before shrinking
+    :return: float32 array of shape (output_size, input_size)
+    """
+    edges = np.linspace(0, input_size, output_size + 1)
+    pixels = np.arange(input_size)
+    overlap = np.clip(np.minimum(edges[1:, None], pixels[None, :] + 1) - np.maximum(edges[:-1, None], pixels[None, :]),
+                      0, None)
+    return (overlap / overlap.sum(axis=1, keepdims=True)).astype(np.float32)
+
+
+@functools.lru_cache(maxsize=1)
+def _dct_matrix(size):
+    """
+    :param size: length of the signal
+    :return: orthonormal DCT-II matrix of shape (size, size)
+    """
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.sqrt(2 / size) * np.cos(np.pi * (2 * n + 1) * k / (2 * size))
+    matrix[0] /= np.sqrt(2)
+    return matrix.astype(np.float32)
+
+
+def perceptual_hashes(images):
+    """
+    Perceptual hash of a batch of images of the same size
+    :param images: uint8 array of shape (count, height, width, 3), or a single (height, width, 3) image
+    :return: uint64 array with a 64 bit hash per image
+    """
+    images = np.asarray(images)
+    if images.ndim == 3:
+        images = images[None]
+    gray = images[..., :3].astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+    rows = _area_weights(_HASH_INPUT_SIZE, gray.shape[1])
+    columns = _area_weights(_HASH_INPUT_SIZE, gray.shape[2])
+    small = rows @ gray @ columns.T
+
+    dct = _dct_matrix(_HASH_INPUT_SIZE)[:_HASH_SIZE]
+    low = np.einsum("ki,bij,lj->bkl", dct, small, dct, optimize=True).reshape(len(gray), -1)
+    # the first coefficient is the average brightness, it says nothing about shapes and would skew the median
+    bits = low > np.median(low[:, 1:], axis=1, keepdims=True)
+    return np.packbits(bits, axis=1).view(">u8").ravel().astype(np.uint64)
+
+
+def hamming_distances(hashes, other_hashes):
+    """
+    :param hashes: uint64 hash or array of hashes
+    :param other_hashes: uint64 hash or array of hashes to compare with
+    :return: array of how many bits differ between each pair of hashes
+    """
+    differences = np.bitwise_xor(np.asarray(hashes, dtype=np.uint64), np.asarray(other_hashes, dtype=np.uint64))
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(differences)
+    return _count_bits_by_byte(differences)
+
+
+def _count_bits_by_byte(values):
+    """
+    :param values: uint64 array
+    :return: array of how many bits are set in each value, counted a byte at a time with a lookup table
+    """
+    return _BYTE_BIT_COUNTS[np.ascontiguousarray(values)[..., None].view(np.uint8)].sum(axis=-1)
+
+
+def changed_pixels(baseline, actuals, pixel_tolerance=24):
+    """
+    Which pixels changed by more than anti-aliasing does
+    :param baseline: uint8 array of shape (height, width, 3)
+    :param actuals: uint8 array of shape (height, width, 3), or a batch of shape (count, height, width, 3)
+    :param pixel_tolerance: how far (0-255) any channel of a pixel can move before the pixel has changed
+    :return: boolean array of shape (height, width), or (count, height, width) for a batch
+    """
+    actuals = np.asarray(actuals, dtype=np.uint8)
+    baseline = np.asarray(baseline, dtype=np.uint8)
+    # max - min is the absolute difference without widening to a signed type, and comparing the channels one by one
+    # is several times faster than numpy reducing over an axis of length 3
+    difference = np.maximum(actuals, baseline) - np.minimum(actuals, baseline)
+    return (difference[..., 0] > pixel_tolerance) | (difference[..., 1] > pixel_tolerance) \
+        | (difference[..., 2] > pixel_tolerance)
+
+
+def changed_regions(changed, tile_size=16):
+    """
+    Group changed pixels into rectangles, tiles with a changed pixel that touch each other make one rectangle
+    :param changed: boolean array of shape (height, width) from changed_pixels
+    :param tile_size: side of the tiles in pixels
+    :return: list of (x, y, width, height) rectangles, in pixels
+    """
+    height, width = changed.shape
+    padded = np.zeros((-(-height // tile_size) * tile_size, -(-width // tile_size) * tile_size), dtype=bool)
+    padded[:height, :width] = changed
+    tiles = padded.reshape(padded.shape[0] // tile_size, tile_size, -1, tile_size).any(axis=(1, 3))
+
+    regions = []
+    seen = np.zeros_like(tiles)
+    for start in zip(*np.nonzero(tiles)):
+        if seen[start]:
+            continue
+        seen[start] = True
+        pending = [start]
+        top, left, bottom, right = start[0], start[1], start[0], start[1]
+        while pending:
+            row, column = pending.pop()
+            top, left, bottom, right = min(top, row), min(left, column), max(bottom, row), max(right, column)
+            for neighbour in ((row - 1, column), (row + 1, column), (row, column - 1), (row, column + 1)):
+                if 0 <= neighbour[0] < tiles.shape[0] and 0 <= neighbour[1] < tiles.shape[1] \
+                        and tiles[neighbour] and not seen[neighbour]:
+                    seen[neighbour] = True
+                    pending.append(neighbour)
+        x, y = int(left) * tile_size, int(top) * tile_size
+        regions.append((x, y, min((int(right) + 1) * tile_size, width) - x,
+                        min((int(bottom) + 1) * tile_size, height) - y))
+    return regions
+
+
+class VisualCheck(object):
+    """
+    The result of comparing one screenshot to its baseline
+
+    ...
+
+    Attributes
+    ----------
+    name : str
+        name of the baseline
+    passed : bool
+        True if the screenshot matches the baseline closely enough
+    hash_distance : int
+        how many bits of the perceptual hashes differ, 0-64
+    changed_fraction : float
+        fraction of the pixels that changed, 1 if the sizes differ
+    regions : list
+        (x, y, width, height) rectangles where the image changed
+    new_baseline : bool
+        True if baselines are being updated and the screenshot became the baseline
+    missing_baseline : bool
+        True if there was no baseline to compare with, which fails the check
+    output_dir : str
+        where the baseline, actual and diff images were written if the check failed, otherwise None
+    """
+
+    def __init__(self, name, passed, hash_distance=0, changed_fraction=0.0, regions=(), new_baseline=False,
+                 output_dir=None, missing_baseline=False):
+        """
+        Create a VisualCheck, see the class attributes
+        """
+        self.name = name
+        self.passed = passed
+        self.hash_distance = hash_distance
+        self.changed_fraction = changed_fraction
+        self.regions = list(regions)
+        self.new_baseline = new_baseline
+        self.output_dir = output_dir
+        self.missing_baseline = missing_baseline
+
+    def describe(self):
+        """
+        :return: a one line summary of the result, for assertion messages
+        """
+        if self.new_baseline:
+            return "[" + self.name + "] saved as a new baseline"
+        if self.missing_baseline:
+            return "[" + self.name + "] has no baseline, the screenshot is in " + self.output_dir + ", run with " \
+                "--update-visual-baselines to save it as the baseline"
+        return "[{}] hash distance {}, {:.2%} of pixels changed in {} region(s) {}{}".format(
+            self.name, self.hash_distance, self.changed_fraction, len(self.regions), self.regions[:5],
+            ", see " + self.output_dir if self.output_dir else "")
+
+
+class VisualBaselines(object):
+    """
+    Baseline images by name, and the comparison of screenshots against them
+
+    A screenshot passes if its perceptual hash is within max_hash_distance bits of the baseline's and no more than
+    max_changed_fraction of its pixels changed. A byte for byte identical screenshot passes without being decoded.
+    Decoded baselines are kept in memory, so checking many screenshots against the same baseline only decodes it once
+
+    A screenshot with no baseline fails, a check that recorded whatever it was shown would pass anything. Baselines are
+    only saved while update is True, when every screenshot becomes its baseline (and passes)
+
+    ...
+
+    Attributes
+    ----------
+    baseline_dir : str
+        directory of the baseline PNGs
+    output_dir : str
+        directory the images of failed comparisons are written to
+    max_hash_distance : int
+        most bits the perceptual hashes can differ by
+    max_changed_fraction : float
+        largest fraction of pixels that can change
+    pixel_tolerance : int
+        how far (0-255) a channel of a pixel can move before it counts as changed
+    update : bool
+        True to save every screenshot as the new baseline instead of comparing it
+
+    Methods
+    -------
+    check(self, name, png)
+        Compare a screenshot to its baseline
+    check_many(self, name, pngs, chunk_size=256)
+        Compare many screenshots of the same size to one baseline
+    """
+
+    def __init__(self, baseline_dir=DEFAULT_BASELINE_DIR, output_dir=DEFAULT_OUTPUT_DIR, max_hash_distance=4,
+                 max_changed_fraction=0.002, pixel_tolerance=24, update=False):
+        """
+        Create VisualBaselines, see the class attributes
+        """
+        self.baseline_dir = baseline_dir
+        self.output_dir = output_dir
+        self.max_hash_distance = max_hash_distance
+        self.max_changed_fraction = max_changed_fraction
+        self.pixel_tolerance = pixel_tolerance
+        self.update = update
+        self._decoded = {}
+        self._lock = threading.Lock()
+
+    def _baseline_path(self, name):
+        """
+        :param name: name of the baseline
+        :return: path of the baseline PNG
+        """
+        return os.path.join(self.baseline_dir, name + ".png")
+
+    def _baseline(self, name):
+        """
+        :param name: name of the baseline
+        :return: (PNG bytes, decoded image, perceptual hash) of the baseline, None if there is no baseline
+        """
+        with self._lock:
+            if name not in self._decoded:
+                try:
+                    with open(self._baseline_path(name), "rb") as baseline_file:
+                        png = baseline_file.read()
+                except FileNotFoundError:
+                    return None
+                image = load_png(png)
+                self._decoded[name] = (png, image, perceptual_hashes(image)[0])
+            return self._decoded[name]
+
+    def _save_baseline(self, name, png):
+        """
+        Make a screenshot the baseline
+        :param name: name of the baseline
+        :param png: PNG bytes of the screenshot
+        :return: a passing VisualCheck
+        """
+        os.makedirs(self.baseline_dir, exist_ok=True)
+        with open(self._baseline_path(name), "wb") as baseline_file:
+            baseline_file.write(png)
+        with self._lock:
+            self._decoded.pop(name, None)
+        return VisualCheck(name, True, new_baseline=True)
+
+    def check(self, name, png):
+        """
+        Compare a screenshot to its baseline, writing the baseline, actual and diff images to output_dir if it fails
+        :param name: name of the baseline, ex: payment_chart_default
+        :param png: PNG bytes of the screenshot
+        :return: a VisualCheck
+        """
+        if self.update:
+            return self._save_baseline(name, png)
+        baseline = self._baseline(name)
+        if baseline is None:
+            return VisualCheck(name, False, changed_fraction=1.0, output_dir=self._write_failure(name, None, png),
+                               missing_baseline=True)
+        baseline_png, baseline_image, baseline_hash = baseline
+        if png == baseline_png:
+            return VisualCheck(name, True)
+
+        actual = load_png(png)
+        if actual.shape != baseline_image.shape:
+            result = VisualCheck(name, False, int(hamming_distances(perceptual_hashes(actual)[0], baseline_hash)), 1.0,
+                                 [(0, 0, actual.shape[1], actual.shape[0])])
+        else:
+            changed = changed_pixels(baseline_image, actual, self.pixel_tolerance)
+            distance = int(hamming_distances(perceptual_hashes(actual)[0], baseline_hash))
+            fraction = float(changed.mean())
+            result = VisualCheck(name, distance <= self.max_hash_distance and fraction <= self.max_changed_fraction,
+                                 distance, fraction, changed_regions(changed))
+            if not result.passed:
+                result.output_dir = self._write_failure(name, baseline_png, png, baseline_image, changed)
+        if not result.passed and result.output_dir is None:
+            result.output_dir = self._write_failure(name, baseline_png, png)
+        return result
+
+    def check_many(self, name, pngs, chunk_size=256):
+        """
+        Compare many screenshots of the same size to one baseline, ex: the chart of thousands of scenarios. Hashes and
+        pixel differences are computed for a chunk of screenshots at a time. No failure images are written, use check
+        on the failures to get them
+        :param name: name of the baseline
+        :param pngs: list of PNG bytes
+        :param chunk_size: how many decoded screenshots are compared at once, bounds the memory used
+        :return: (passed, hash distances, changed fractions) arrays, one entry per screenshot
+        """
+        baseline = self._baseline(name)
+        if baseline is None:
+            raise FileNotFoundError("No baseline named [" + name + "] in " + self.baseline_dir)
+        baseline_png, baseline_image, baseline_hash = baseline
+
+        distances = np.zeros(len(pngs), dtype=np.int64)
+        fractions = np.zeros(len(pngs))
+        for start in range(0, len(pngs), chunk_size):
+            chunk = pngs[start:start + chunk_size]
+            images = [load_png(png) for png in chunk]
+            same_size = np.array([image.shape == baseline_image.shape for image in images])
+            fractions[start:start + len(chunk)][~same_size] = 1.0
+            distances[start:start + len(chunk)][~same_size] = 64
+            if same_size.any():
+                batch = np.stack([image for image, fits in zip(images, same_size) if fits])
+                indexes = start + np.nonzero(same_size)[0]
+                distances[indexes] = hamming_distances(perceptual_hashes(batch), baseline_hash)
+                fractions[indexes] = changed_pixels(baseline_image, batch, self.pixel_tolerance).mean(axis=(1, 2))
+        passed = (distances <= self.max_hash_distance) & (fractions <= self.max_changed_fraction)
+        return passed, distances, fractions
+
+    def _write_failure(self, name, baseline_png, png, baseline_image=None, changed=None):
+        """
+        Write the images of a failed comparison: the baseline (if there is one), the screenshot and (when they are the
+        same size) the baseline with the changed pixels in red
+        :return: the directory the images were written to
+        """
+        folder = os.path.join(self.output_dir, name)
+        os.makedirs(folder, exist_ok=True)
+        if baseline_png is not None:
+            with open(os.path.join(folder, "baseline.png"), "wb") as baseline_file:
+                baseline_file.write(baseline_png)
+        with open(os.path.join(folder, "actual.png"), "wb") as actual_file:
+            actual_file.write(png)
+        if changed is not None:
+            highlighted = baseline_image.copy()
+            highlighted[changed] = (255, 0, 0)
+            Image.fromarray(highlighted).save(os.path.join(folder, "diff.png"))
+        return folder
+
+
+# The baselines page objects check against, update is turned on by the --update-visual-baselines pytest option
+visual_baselines = VisualBaselines()